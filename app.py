@@ -32,16 +32,26 @@ from routes.overview import overview_bp
 from routes.institution import institution_bp
 from routes.country import country_bp
 from routes.field import field_bp
+from routes.admin import admin_bp
+from routes.metrics import metrics_bp
+from routes.etag import etag_bp
+
+# Also sent by asgi.py on the routes it serves natively
+CORS_ORIGINS = "*"
 
 app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "*"}})
+CORS(app, resources={r"/*": {"origins": CORS_ORIGINS}})
 
+app.register_blueprint(articles_bp)
 app.register_blueprint(institution_bp)
 app.register_blueprint(analytics_bp)
 app.register_blueprint(researcher_bp)
 app.register_blueprint(overview_bp)
 app.register_blueprint(country_bp)
 app.register_blueprint(field_bp)
+app.register_blueprint(admin_bp)
+app.register_blueprint(metrics_bp)
+app.register_blueprint(etag_bp)
 
 
 if __name__ == "__main__":
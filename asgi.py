@@ -0,0 +1,250 @@
+"""
+asyncio entry point, an alternative to the WSGI app in app.py:
+
+    uvicorn asgi:app --workers 4
+
+Serves the same routes as app.py. Routes that have a native async
+handler (registered with db.async_views.async_view) run on the event
+loop with the async PostgREST client, and their independent queries are
+awaited together, so one worker holds many in-flight requests while they
+wait on Supabase. Every other route runs through the Flask app in a
+worker thread (at most ASGI_SYNC_THREADS at a time).
+
+Response caching (with gzip/brotli variants), ETags, request
+coalescing, CORS and upstream accounting (Server-Timing, /metrics) behave as they do
+under app.py.
+"""
+import contextvars
+import io
+import logging
+import os
+import sys
+import time
+from urllib.parse import parse_qsl
+
+import anyio
+from werkzeug.datastructures import MultiDict
+
+from app import CORS_ORIGINS, app as flask_app
+from db.async_supabase import close_async_client
+from db.async_views import ASYNC_VIEWS
+from db.cache import CachedResponse, cacheable, current_key, make_cache_key, response_cache
+from db.compression import VARY, negotiate
+from db.etag import etag_headers, if_none_match, request_etag
+from db.metrics import start_request, end_request, finish_request
+from db.singleflight import ENABLED as COALESCE, DISABLED_ROUTES, async_request_flights
+
+logger = logging.getLogger(__name__)
+
+SYNC_THREADS = int(os.getenv("ASGI_SYNC_THREADS", "40"))
+_sync_limiter = None
+_DONE = object()
+
+
+def sync_limiter():
+    global _sync_limiter
+    if _sync_limiter is None:
+        _sync_limiter = anyio.CapacityLimiter(SYNC_THREADS)
+    return _sync_limiter
+
+
+# --------------------------------------------------
+# Helper: send a complete response
+# --------------------------------------------------
+async def send_response(send, status: int, body: bytes, headers):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(k.lower().encode("latin-1"), str(v).encode("latin-1")) for k, v in headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def header(scope, name: bytes):
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+# --------------------------------------------------
+# Native async routes
+# --------------------------------------------------
+async def render(view, handler, endpoint, rule, key, encoding, args, view_args, headers):
+    """(status, body, content type), through the response cache and coalescing."""
+    # Same per-route settings as the Flask view (@cached / @coalesced)
+    ttl = getattr(view, "cache_ttl", None)
+    entry_key = current_key(key) if ttl else None
+    entry = response_cache.get(entry_key, rule) if ttl else None
+
+    if entry is None:
+        async def compute():
+            try:
+                result = await handler(args, **view_args)
+            except Exception:
+                logger.exception("async view %s failed", endpoint)
+                result = {"error": "internal server error"}, 500
+            payload, status = result if isinstance(result, tuple) else (result, 200)
+            # byte-for-byte what jsonify() produces
+            return status, flask_app.json.dumps(payload, separators=(",", ":")).encode() + b"\n"
+
+        if getattr(view, "coalesced", False) and COALESCE and rule not in DISABLED_ROUTES:
+            (status, body), waiters = await async_request_flights.do(key, compute, rule)
+            headers.append(("X-Coalesced-Waiters", waiters))
+        else:
+            status, body = await compute()
+
+        if not (ttl and cacheable(status)):
+            return status, body, "application/json"
+        entry = CachedResponse(body, status, "application/json", ttl)
+        response_cache.set(entry_key, entry)
+
+    # cached bytes, compressed once per encoding
+    body, used = entry.encoded(encoding)
+    if used:
+        headers.append(("Content-Encoding", used))
+    return entry.status, body, entry.content_type
+
+
+async def serve_async(scope, send, endpoint, view_args):
+    handler = ASYNC_VIEWS[endpoint]
+    view = flask_app.view_functions[endpoint]
+    rule = scope["rule"]
+    args = MultiDict(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True))
+
+    started = time.perf_counter()
+    stats, token = start_request()
+    try:
+        headers = [("Access-Control-Allow-Origin", CORS_ORIGINS)]
+
+        key = make_cache_key(scope["path"], args)
+        encoding = negotiate(header(scope, b"accept-encoding"))
+
+        # Conditional GET, as routes/etag.py does for the Flask app
+        etag = request_etag("GET", scope["path"], key, encoding)
+        if etag and if_none_match(header(scope, b"if-none-match"), etag):
+            status, body, content_type = 304, b"", None
+        else:
+            status, body, content_type = await render(view, handler, endpoint, rule, key, encoding, args, view_args, headers)
+
+        headers += etag_headers(etag, status)
+        headers.append(("Vary", VARY))
+
+        elapsed = time.perf_counter() - started
+        if content_type:
+            headers.append(("Content-Type", content_type))
+        headers.append(("Server-Timing", finish_request(rule, elapsed, stats)))
+    finally:
+        end_request(token)
+
+    await send_response(send, status, body, headers)
+
+
+# --------------------------------------------------
+# Everything else: the Flask app in a worker thread
+# --------------------------------------------------
+def wsgi_environ(scope, body: bytes):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": str(client[0]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[name] = value
+        else:
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def serve_wsgi(scope, receive, send):
+    environ = wsgi_environ(scope, await read_body(receive))
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = headers
+
+    # Every step of the request runs in this one context, whichever
+    # worker thread it lands on (Flask keeps its request context in it).
+    ctx = contextvars.copy_context()
+    limiter = sync_limiter()
+    result = await anyio.to_thread.run_sync(ctx.run, flask_app.wsgi_app, environ, start_response, limiter=limiter)
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": started["status"],
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in started["headers"]],
+        })
+        # Streamed bodies (db/streaming.py) are pulled chunk by chunk
+        chunks = iter(result)
+        while True:
+            chunk = await anyio.to_thread.run_sync(ctx.run, next, chunks, _DONE, limiter=limiter)
+            if chunk is _DONE:
+                break
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        if hasattr(result, "close"):
+            await anyio.to_thread.run_sync(ctx.run, result.close, limiter=limiter)
+
+
+# --------------------------------------------------
+# ASGI application
+# --------------------------------------------------
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_async_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    adapter = flask_app.url_map.bind("localhost", script_name=scope.get("root_path") or None)
+    try:
+        rule, view_args = adapter.match(scope["path"], scope["method"], return_rule=True)
+    except Exception:
+        # 404 / 405 / redirects: let Flask answer exactly as app.py would
+        rule, view_args = None, None
+
+    if rule is not None and rule.endpoint in ASYNC_VIEWS and scope["method"] == "GET":
+        await read_body(receive)
+        await serve_async({**scope, "rule": rule.rule}, send, rule.endpoint, view_args)
+    else:
+        await serve_wsgi(scope, receive, send)
@@ -0,0 +1,184 @@
+"""
+Endpoint benchmark against the in-memory PostgREST stand-in.
+
+    python -m bench.run --articles 5000 --repeat 30 --json bench_5k.json
+
+Generates synthetic data, serves it through db.local_postgrest, calls
+every GET route of the app and reports p50/p99 latency, upstream round
+trips and upstream bytes per endpoint. Run it at several scales and
+diff the JSON files to compare.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import threading
+import time
+
+import httpx
+
+os.environ.setdefault("SUPABASE_URL", "http://local-postgrest")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "bench")
+
+from bench.synthetic import generate, TAXONOMY  # noqa: E402
+from db.local_postgrest import LocalPostgrestTransport  # noqa: E402
+from db.supabase import set_transport  # noqa: E402
+
+
+# --------------------------------------------------
+# Transport wrapper: count round trips and bytes
+# --------------------------------------------------
+class CountingTransport(httpx.BaseTransport):
+    def __init__(self, inner):
+        self.inner = inner
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.bytes = 0
+
+    def handle_request(self, request):
+        response = self.inner.handle_request(request)
+        body = response.read()
+        with self.lock:
+            self.calls += 1
+            self.bytes += len(body)
+        return response
+
+    def reset(self):
+        with self.lock:
+            calls, nbytes = self.calls, self.bytes
+            self.calls = self.bytes = 0
+        return calls, nbytes
+
+
+# --------------------------------------------------
+# Sample query args per route (path params are filled from the data)
+# --------------------------------------------------
+def sample_requests(rule: str, data):
+    busiest_country = max(
+        (c["id"] for c in data["country_info"]),
+        key=lambda cid: sum(1 for a in data["authorships"] if a["country_id"] == cid),
+    )
+    top_field = next(iter(TAXONOMY.values()))[0].lower()
+    domain = next(iter(TAXONOMY)).lower()
+
+    args = {
+        "/analytics": [{}, {"country_id": busiest_country}, {"field": domain}],
+        "/api/fields/search": [{"q": "comp"}, {}],
+        "/api/field/overview": [{"field": top_field}],
+        "/api/field/countries": [{"field": top_field}],
+        "/api/field/country/researchers": [{"field": top_field, "country_id": busiest_country}],
+        "/api/countries/search": [{"q": "a"}],
+        "/api/institutions/search": [{"country_id": busiest_country, "q": "univ"}],
+        "/api/researchers/search": [{"q": "am"}],
+        "/api/researchers/all": [{"page": 1, "limit": 20}],
+        "/api/researcher/<researcher_id>/coauthors": [{}, {"limit": 10}],
+        "/api/researchers/batch": [{"ids": ",".join(str(r["id"]) for r in data["researchers"][:50])}],
+        "/api/institutions/batch": [{"ids": ",".join(str(i["id"]) for i in data["institution_info"][:50])}],
+        "/api/countries/batch": [{"ids": ",".join(str(c["id"]) for c in data["country_info"])}],
+        "/api/researcher/<researcher_id>/articles": [{}, {"order": "cited_by_count", "fields": "id,title"}],
+    }.get(rule, [{}])
+
+    path_values = {
+        "country_id": busiest_country,
+        "institution_id": data["institution_info"][0]["id"],
+        "researcher_id": data["researchers"][0]["id"],
+    }
+    path = re.sub(r"<(?:\w+:)?(\w+)>", lambda m: str(path_values.get(m.group(1), 1)), rule)
+    return [(path, a) for a in args]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    k = max(0, min(len(values) - 1, round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+# --------------------------------------------------
+# Runner
+# --------------------------------------------------
+def run(articles: int, repeat: int, warm_cache: bool = False):
+    data = generate(articles)
+    counter = CountingTransport(LocalPostgrestTransport(data))
+    set_transport(counter)
+
+    from app import app
+    from db.cache import response_cache
+
+    client = app.test_client()
+    results = []
+    seen = set()
+
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        if "GET" not in rule.methods or rule.rule.startswith(("/static", "/admin")):
+            continue
+        # Several blueprints register the same path; only the first one serves it
+        if rule.rule in seen:
+            continue
+        seen.add(rule.rule)
+
+        for path, args in sample_requests(rule.rule, data):
+            # Warm-up: in-process indexes build here, outside the timings
+            client.get(path, query_string=args).get_data()
+            counter.reset()
+
+            latencies, calls, nbytes, status = [], [], [], None
+            for _ in range(repeat):
+                if not warm_cache:
+                    response_cache.invalidate()
+                start = time.perf_counter()
+                response = client.get(path, query_string=args)
+                response.get_data()
+                latencies.append((time.perf_counter() - start) * 1000)
+                status = response.status_code
+                c, b = counter.reset()
+                calls.append(c)
+                nbytes.append(b)
+
+            label = path + ("?" + "&".join(f"{k}={v}" for k, v in args.items()) if args else "")
+            results.append({
+                "endpoint": label,
+                "status": status,
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p99_ms": round(percentile(latencies, 99), 3),
+                "round_trips": statistics.mean(calls),
+                "upstream_bytes": int(statistics.mean(nbytes)),
+            })
+
+    return {
+        "articles": articles,
+        "authorships": len(data["authorships"]),
+        "researchers": len(data["researchers"]),
+        "repeat": repeat,
+        "warm_cache": warm_cache,
+        "endpoints": results,
+    }
+
+
+def print_report(report):
+    print(
+        f"articles={report['articles']} authorships={report['authorships']} "
+        f"researchers={report['researchers']} repeat={report['repeat']} warm_cache={report['warm_cache']}"
+    )
+    width = max(len(r["endpoint"]) for r in report["endpoints"])
+    print(f"{'endpoint':<{width}}  status    p50 ms    p99 ms  trips     bytes")
+    for r in report["endpoints"]:
+        print(
+            f"{r['endpoint']:<{width}}  {r['status']:>6}  {r['p50_ms']:>8.2f}  {r['p99_ms']:>8.2f}"
+            f"  {r['round_trips']:>5.1f}  {r['upstream_bytes']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every GET endpoint against synthetic data.")
+    parser.add_argument("--articles", type=int, default=2000, help="scale: number of synthetic articles")
+    parser.add_argument("--repeat", type=int, default=20, help="timed requests per endpoint")
+    parser.add_argument("--warm-cache", action="store_true", help="keep the response cache between requests")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.articles, args.repeat, args.warm_cache)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,126 @@
+import random
+
+# Top-level domain → sub-fields; research_area_path is "Domain > Sub-field"
+TAXONOMY = {
+    "Computer Science": ["Machine Learning", "Computer Vision", "Quantum Computing", "Networks", "Databases", "Security"],
+    "Medicine": ["Oncology", "Cardiology", "Neurology", "Epidemiology", "Immunology"],
+    "Physics": ["Condensed Matter", "Optics", "Astrophysics", "Particle Physics"],
+    "Chemistry": ["Organic Chemistry", "Catalysis", "Electrochemistry", "Polymers"],
+    "Biology": ["Genetics", "Ecology", "Microbiology", "Bioinformatics"],
+    "Engineering": ["Civil Engineering", "Robotics", "Materials", "Energy Systems", "Control Theory"],
+    "Mathematics": ["Algebra", "Statistics", "Optimization", "Number Theory"],
+    "Earth Sciences": ["Climatology", "Geology", "Hydrology"],
+    "Economics": ["Econometrics", "Finance", "Development Economics"],
+    "Agriculture": ["Agronomy", "Food Science", "Soil Science"],
+}
+
+FIRST_NAMES = ["Amina", "Karim", "Sara", "Yacine", "Lina", "Omar", "Nadia", "Walid", "Maya", "Rayan",
+               "Ines", "Sofiane", "Leila", "Mehdi", "Nour", "Hugo", "Clara", "Ahmed", "Yasmine", "Adam"]
+LAST_NAMES = ["Benali", "Haddad", "Mansouri", "Belkacem", "Saidi", "Brahimi", "Cherif", "Kaci", "Ziani",
+              "Martin", "Bernard", "Dubois", "Rossi", "Garcia", "Nguyen", "Kim", "Schmidt", "Silva", "Khan", "Ali"]
+COUNTRY_NAMES = ["Algeria", "France", "Germany", "Italy", "Spain", "Morocco", "Tunisia", "Egypt", "Canada",
+                 "Brazil", "India", "China", "Japan", "Korea", "Nigeria", "Kenya", "Mexico", "Chile", "Turkey",
+                 "Poland", "Sweden", "Norway", "Portugal", "Greece", "Vietnam", "Indonesia", "Pakistan",
+                 "Argentina", "Peru", "Ghana"]
+
+
+# --------------------------------------------------
+# Synthetic tables shaped like our Supabase schema
+# --------------------------------------------------
+def generate(articles: int = 2000, seed: int = 42):
+    """
+    Build the five core tables at a given scale (number of articles).
+    Everything else scales from that: ~articles/2 researchers,
+    ~articles/20 institutions, up to 30 countries and ~3 authors per
+    article. Field and author popularity are skewed, like the real data.
+    """
+    rng = random.Random(seed)
+
+    n_countries = min(len(COUNTRY_NAMES), max(3, articles // 100))
+    n_institutions = max(5, articles // 20)
+    n_researchers = max(10, articles // 2)
+
+    countries = [
+        {
+            "id": i,
+            "name": name,
+            "iso_code": name[:2].upper(),
+            "average_h_index": round(rng.uniform(2, 40), 2),
+            "average_rii": round(rng.uniform(0.1, 3), 3),
+            "ranking": i,
+        }
+        for i, name in enumerate(COUNTRY_NAMES[:n_countries], 1)
+    ]
+
+    institutions = [
+        {
+            "id": i,
+            "name": f"University {i} of {countries[(i - 1) % n_countries]['name']}",
+            "country_id": countries[(i - 1) % n_countries]["id"],
+            "average_h_index": round(rng.uniform(0, 40), 2),
+            "average_rii": round(rng.uniform(0, 3), 3),
+            "ranking": i,
+        }
+        for i in range(1, n_institutions + 1)
+    ]
+
+    researchers = []
+    for i in range(1, n_researchers + 1):
+        h = int(rng.paretovariate(1.5) * 3)
+        researchers.append({
+            "id": i,
+            "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            "orcid": f"0000-0002-{i // 10000:04d}-{i % 10000:04d}",
+            "h_index": h if rng.random() > 0.02 else None,
+            "rii": round(rng.uniform(0, 4), 3),
+            "total_publications": 0,
+            "total_citations": 0,
+            "co_authorship": "",
+        })
+    # Each researcher has a home institution
+    home = {r["id"]: rng.randrange(1, n_institutions + 1) for r in researchers}
+
+    paths = [f"{domain} > {sub}" for domain, subs in TAXONOMY.items() for sub in subs]
+    path_weights = [1 / (rank + 1) for rank in range(len(paths))]
+    author_weights = [1 / (rank + 1) ** 0.7 for rank in range(n_researchers)]
+
+    article_rows = []
+    authorships = []
+    coauthors = {r["id"]: set() for r in researchers}
+    for a in range(1, articles + 1):
+        article_rows.append({
+            "id": a,
+            "title": f"Synthetic article {a}",
+            "publication_date": f"{rng.randint(2000, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "journal_name": f"Journal {rng.randint(1, 200)}",
+            "cited_by_count": int(rng.paretovariate(1.2)) - 1,
+            "research_area_path": rng.choices(paths, path_weights)[0],
+        })
+
+        authors = set(rng.choices(range(1, n_researchers + 1), author_weights, k=rng.randint(1, 5)))
+        for rid in authors:
+            inst = institutions[home[rid] - 1]
+            authorships.append({
+                "id": len(authorships) + 1,
+                "article_id": a,
+                "researcher_id": rid,
+                "institution_id": inst["id"],
+                "country_id": inst["country_id"],
+            })
+            coauthors[rid].update(authors - {rid})
+
+    by_id = {r["id"]: r for r in researchers}
+    for row in authorships:
+        by_id[row["researcher_id"]]["total_publications"] += 1
+        by_id[row["researcher_id"]]["total_citations"] += article_rows[row["article_id"] - 1]["cited_by_count"]
+    for r in researchers:
+        names = [by_id[c]["full_name"] for c in sorted(coauthors[r["id"]])]
+        r["co_authorship"] = " / ".join([r["full_name"]] + names)
+
+    return {
+        "country_info": countries,
+        "institution_info": institutions,
+        "researchers": researchers,
+        "articles": article_rows,
+        "authorships": authorships,
+    }
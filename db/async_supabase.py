@@ -0,0 +1,118 @@
+import asyncio
+import weakref
+
+import anyio
+import httpx
+from postgrest import AsyncPostgrestClient
+
+import db.supabase as sync_supabase
+from db.metrics import AsyncAccountingTransport
+from db.singleflight import AsyncCoalescingTransport
+
+_transport_override = None
+# One client per event loop: httpx.AsyncClient pools are loop-bound
+_clients = weakref.WeakKeyDictionary()
+
+
+# --------------------------------------------------
+# Transport: same pool tuning as the sync client
+# --------------------------------------------------
+def make_async_http_transport():
+    return httpx.AsyncHTTPTransport(
+        http2=sync_supabase.HTTP2,
+        limits=httpx.Limits(
+            max_connections=sync_supabase.POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=sync_supabase.POOL_MAX_KEEPALIVE,
+            keepalive_expiry=sync_supabase.KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+class ThreadedTransport(httpx.AsyncBaseTransport):
+    """
+    Runs a sync transport (the local snapshot, a benchmark stand-in) in a
+    worker thread so the event loop never blocks on it.
+    """
+
+    def __init__(self, inner: httpx.BaseTransport):
+        self.inner = inner
+
+    async def handle_async_request(self, request):
+        await request.aread()
+        response = await anyio.to_thread.run_sync(self.inner.handle_request, request)
+        body = await anyio.to_thread.run_sync(response.read)
+        return httpx.Response(
+            response.status_code,
+            headers=[(k, v) for k, v in response.headers.items()
+                     if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")],
+            content=body,
+            request=request,
+        )
+
+
+def make_async_transport():
+    if _transport_override is not None:
+        inner = _transport_override
+    elif sync_supabase._transport_override is not None:
+        # set_transport() on the sync side applies here too
+        inner = ThreadedTransport(sync_supabase._transport_override)
+    elif sync_supabase.snapshot_transport() is not None:
+        # The sync client's snapshot: one in-memory copy per process, and
+        # the version snapshot_version() reports is the one served here
+        inner = ThreadedTransport(sync_supabase.snapshot_transport())
+    else:
+        inner = make_async_http_transport()
+
+    transport = AsyncAccountingTransport(inner)
+    if sync_supabase.COALESCE:
+        transport = AsyncCoalescingTransport(transport)
+    return transport
+
+
+def make_async_client(transport=None):
+    http_client = httpx.AsyncClient(timeout=sync_supabase.timeout, transport=transport or make_async_transport())
+    key = sync_supabase.SUPABASE_KEY
+
+    return AsyncPostgrestClient(
+        base_url=f"{sync_supabase.SUPABASE_URL or 'http://localhost'}/rest/v1",
+        headers={
+            "apikey": key or "",
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json"
+        },
+        http_client=http_client
+    )
+
+
+# --------------------------------------------------
+# One client per event loop
+# --------------------------------------------------
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = make_async_client()
+    return client
+
+
+async def close_async_client():
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def set_async_transport(transport):
+    """Swap the async transport (tests, local stand-ins); new clients only."""
+    global _transport_override
+    _transport_override = transport
+    _clients.clear()
+
+
+class _AsyncClientProxy:
+    """`async_supabase.table(...)` resolves to the running loop's client."""
+
+    def __getattr__(self, name):
+        return getattr(get_async_client(), name)
+
+
+async_supabase = _AsyncClientProxy()
@@ -0,0 +1,15 @@
+# --------------------------------------------------
+# Registry of native asyncio handlers (served by asgi.py)
+# --------------------------------------------------
+# Flask endpoint name ("overview.overview_countries") → coroutine function
+# called as `await handler(args, **view_args)`, where args are the query
+# arguments. It returns the JSON payload, or (payload, status).
+# Routes without one are served by the Flask app in a worker thread.
+ASYNC_VIEWS = {}
+
+
+def async_view(endpoint: str):
+    def decorator(handler):
+        ASYNC_VIEWS[endpoint] = handler
+        return handler
+    return decorator
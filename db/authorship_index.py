@@ -0,0 +1,306 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from db.background import start_refresher
+from db.data_version import data_version, fingerprint
+from db.incremental import DeltaFeed, refresh_engine
+
+REFRESH_SECONDS = float(os.getenv("AUTHORSHIP_INDEX_REFRESH_SECONDS", "600"))
+
+
+# --------------------------------------------------
+# Helper: ids → positions in a sorted id array (-1 when unknown)
+# --------------------------------------------------
+def positions(sorted_ids, ids):
+    if len(sorted_ids) == 0:
+        return np.full(len(ids), -1, dtype=np.int64)
+    pos = np.clip(np.searchsorted(sorted_ids, ids), 0, len(sorted_ids) - 1)
+    return np.where(sorted_ids[pos] == ids, pos, -1)
+
+
+def _ids(values):
+    return np.array([-1 if v is None else v for v in values], dtype=np.int64)
+
+
+def _metric(values):
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _authorship_columns(authorships):
+    columns = {"ids": [], "article": [], "country": [], "researcher_ids": [], "institution_ids": []}
+    for a in authorships:
+        columns["ids"].append(a.get("id"))
+        columns["article"].append(a.get("article_id"))
+        columns["country"].append(a.get("country_id"))
+        columns["researcher_ids"].append(a.get("researcher_id"))
+        columns["institution_ids"].append(a.get("institution_id"))
+    return {name: _ids(values) for name, values in columns.items()}
+
+
+# --------------------------------------------------
+# Helper: insert/replace rows in id-sorted parallel arrays
+# --------------------------------------------------
+def _upsert(ids, arrays, rows, delta, build):
+    """
+    (ids, arrays, rows) with `delta` rows applied by id. `build(rows)`
+    turns rows into values for each of `arrays`; `rows` may be None when
+    no row list is kept.
+    """
+    delta = sorted({r["id"]: r for r in delta}.values(), key=lambda r: r["id"])
+    delta_ids = _ids(r["id"] for r in delta)
+    values = build(delta)
+
+    pos = positions(ids, delta_ids)
+    old = pos >= 0
+    arrays = [a.copy() for a in arrays]
+    for a, v in zip(arrays, values):
+        a[pos[old]] = v[old]
+    if rows is not None:
+        rows = list(rows)
+        for p, i in zip(pos[old], np.flatnonzero(old)):
+            rows[p] = delta[i]
+
+    new = ~old
+    if new.any():
+        at = np.searchsorted(ids, delta_ids[new])
+        ids = np.insert(ids, at, delta_ids[new])
+        arrays = [np.insert(a, at, v[new]) for a, v in zip(arrays, values)]
+        if rows is not None:
+            # two sorted runs: timsort merges them in linear time
+            rows = sorted(rows + [delta[i] for i in np.flatnonzero(new)], key=lambda r: r["id"])
+    return ids, arrays, rows
+
+
+# --------------------------------------------------
+# Helper: which rows of a build are additions to the previous one
+# --------------------------------------------------
+def added_rows(old, cols):
+    """
+    Mask of the authorship rows of `cols` that are new, or whose
+    researcher/institution has just become known, when `cols` only adds
+    to `old`; None if rows or entities changed or went away.
+    """
+    if (positions(cols.r_ids, old.r_ids) < 0).any() or (positions(cols.i_ids, old.i_ids) < 0).any():
+        return None
+    pos = positions(cols.ids, old.ids)
+    if (pos < 0).any():
+        return None
+    for name in ("article", "country", "researcher_ids", "institution_ids"):
+        if not np.array_equal(getattr(cols, name)[pos], getattr(old, name)):
+            return None
+
+    added = np.ones(len(cols.ids), dtype=bool)
+    added[pos] = (
+        ((old.researcher < 0) & (cols.researcher[pos] >= 0))
+        | ((old.institution < 0) & (cols.institution[pos] >= 0))
+    )
+    return added
+
+
+# --------------------------------------------------
+# Helper: top-k positions by a metric, ties broken by id (both desc)
+# --------------------------------------------------
+def top_k(values, ids, candidates, k: int):
+    candidates = candidates[~np.isnan(values[candidates])]
+    if len(candidates) > k:
+        part = np.argpartition(-values[candidates], k - 1)[:k]
+        candidates = candidates[part]
+    order = np.lexsort((-ids[candidates], -values[candidates]))
+    return candidates[order]
+
+
+# --------------------------------------------------
+# Columnar snapshot of authorships + researcher/institution metrics
+# --------------------------------------------------
+class AuthorshipColumns:
+    """
+    Parallel integer arrays, one entry per authorship row:
+
+        article, country        – raw ids (-1 when null)
+        researcher, institution – positions into the metric arrays below
+
+    Researcher metrics (r_*) and institution metrics (i_*) are parallel
+    arrays sorted by id, so filters are boolean masks and groupbys are
+    np.unique over positions. Authorship arrays are sorted by id.
+
+    `updated()` returns a new snapshot with changed or added rows applied,
+    without rereading the tables.
+    """
+
+    def __init__(self, authorships, researchers, institutions):
+        researchers = sorted(researchers, key=lambda r: r["id"])
+        institutions = sorted(institutions, key=lambda i: i["id"])
+
+        self.r_ids = _ids(r["id"] for r in researchers)
+        self.r_h = _metric(r.get("h_index") for r in researchers)
+        self.r_rii = _metric(r.get("rii") for r in researchers)
+        self.r_rows = researchers
+
+        self.i_ids = _ids(i["id"] for i in institutions)
+        self.i_h = _metric(i.get("average_h_index") for i in institutions)
+        self.i_rii = _metric(i.get("average_rii") for i in institutions)
+        self.i_rows = institutions
+
+        columns = _authorship_columns(sorted(authorships, key=lambda a: a["id"]))
+        self.ids = columns["ids"]
+        self.article = columns["article"]
+        self.country = columns["country"]
+        # Raw ids are kept so positions can be recomputed when entities change
+        self.researcher_ids = columns["researcher_ids"]
+        self.institution_ids = columns["institution_ids"]
+        self._link()
+
+    def _link(self):
+        self.researcher = positions(self.r_ids, self.researcher_ids)
+        self.institution = positions(self.i_ids, self.institution_ids)
+
+        # Distinct (country, institution position) pairs, sorted by country:
+        # a country's institutions are one contiguous slice
+        known = (self.country >= 0) & (self.institution >= 0)
+        pairs = np.unique(np.stack([self.country[known], self.institution[known]], axis=1), axis=0)
+        self.ci_country = pairs[:, 0] if len(pairs) else np.empty(0, dtype=np.int64)
+        self.ci_institution = pairs[:, 1] if len(pairs) else np.empty(0, dtype=np.int64)
+
+    def updated(self, authorships=(), researchers=(), institutions=()):
+        """New snapshot with these rows inserted or replacing rows of the same id."""
+        new = object.__new__(AuthorshipColumns)
+        new.__dict__.update(self.__dict__)
+
+        if researchers:
+            new.r_ids, (new.r_h, new.r_rii), new.r_rows = _upsert(
+                self.r_ids, [self.r_h, self.r_rii], self.r_rows, researchers,
+                lambda rows: [_metric(r.get("h_index") for r in rows), _metric(r.get("rii") for r in rows)],
+            )
+        if institutions:
+            new.i_ids, (new.i_h, new.i_rii), new.i_rows = _upsert(
+                self.i_ids, [self.i_h, self.i_rii], self.i_rows, institutions,
+                lambda rows: [_metric(r.get("average_h_index") for r in rows), _metric(r.get("average_rii") for r in rows)],
+            )
+        if authorships:
+            names = ["article", "country", "researcher_ids", "institution_ids"]
+            new.ids, arrays, _ = _upsert(
+                self.ids, [getattr(self, n) for n in names], None, authorships,
+                lambda rows: [c for n, c in _authorship_columns(rows).items() if n != "ids"],
+            )
+            for name, array in zip(names, arrays):
+                setattr(new, name, array)
+
+        new._link()
+        return new
+
+    def mask(self, article_ids=None, country_id=None, institution_id=None):
+        """Boolean mask over authorship rows for the given filters."""
+        m = np.ones(len(self.article), dtype=bool)
+        if article_ids is not None:
+            m &= np.isin(self.article, article_ids)
+        if country_id is not None:
+            m &= self.country == int(country_id)
+        if institution_id is not None:
+            pos = positions(self.i_ids, np.array([int(institution_id)]))[0]
+            if pos < 0:
+                # unknown id: -1 would match every row without an institution
+                m[:] = False
+            else:
+                m &= self.institution == pos
+        return m
+
+    def country_institutions(self, country_id):
+        """Positions of every institution with an authorship in the country."""
+        country_id = int(country_id)
+        start = np.searchsorted(self.ci_country, country_id, side="left")
+        end = np.searchsorted(self.ci_country, country_id, side="right")
+        return self.ci_institution[start:end]
+
+    def researchers_in(self, mask):
+        pos = np.unique(self.researcher[mask])
+        return pos[pos >= 0]
+
+    def institutions_in(self, mask):
+        pos = np.unique(self.institution[mask])
+        return pos[pos >= 0]
+
+
+# --------------------------------------------------
+# Process-level index (refreshed in the background)
+# --------------------------------------------------
+class AuthorshipIndex:
+    def __init__(self, refresh_seconds: float = REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.loaded_at = None
+        # Content fingerprint of the current build, part of the data version
+        self.generation = None
+        self._lock = threading.Lock()
+        # Serializes full rebuilds and delta applies
+        self._swap_lock = threading.Lock()
+        self._pid = None
+        self._columns = None
+        self._feeds = {
+            "authorships": DeltaFeed("authorships", "id,article_id,researcher_id,institution_id,country_id"),
+            "researchers": DeltaFeed("researchers", "id,full_name,h_index,rii,total_publications,total_citations"),
+            "institution_info": DeltaFeed("institution_info", "id,name,average_h_index,average_rii"),
+        }
+        # fn(cols) run on every new build before readers see it
+        self._derived = []
+        data_version.track("authorship-index", lambda: self.generation)
+
+    def derive(self, fn):
+        """
+        Call fn(cols) for the current build and for every later one, in
+        the thread that made it (the refresher's, after the first), before
+        the build is swapped in.
+        """
+        self.get()
+        with self._swap_lock:
+            fn(self._columns)
+            self._derived.append(fn)
+
+    def _swap(self, cols, generation):
+        for fn in self._derived:
+            fn(cols)
+        self._columns = cols
+        self.loaded_at = time.time()
+        if generation != self.generation:
+            self.generation = generation
+            data_version.invalidate()
+
+    def refresh(self):
+        with self._swap_lock:
+            cols = AuthorshipColumns(
+                self._feeds["authorships"].scan(),
+                self._feeds["researchers"].scan(),
+                self._feeds["institution_info"].scan(),
+            )
+            self._swap(cols, fingerprint(
+                cols.ids, cols.article, cols.country, cols.researcher_ids, cols.institution_ids,
+                cols.r_rows, cols.i_rows,
+            ))
+
+    def apply(self, deltas):
+        """Rows added or changed since the last read (see db.incremental)."""
+        with self._swap_lock:
+            cols = self._columns.updated(
+                authorships=deltas.get("authorships", ()),
+                researchers=deltas.get("researchers", ()),
+                institutions=deltas.get("institution_info", ()),
+            )
+            # O(delta): chained onto the previous build's fingerprint
+            self._swap(cols, fingerprint(self.generation, deltas))
+
+    def get(self) -> AuthorshipColumns:
+        # Same per-process lifecycle as the field index: build on first
+        # use in each gunicorn worker, then rebuild in the background.
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self.refresh()
+                    self._pid = pid
+                    start_refresher("authorship-index", self.refresh_seconds, self.refresh)
+                    refresh_engine.register("authorship-index", self._feeds.values(), self.apply)
+        return self._columns
+
+
+authorship_index = AuthorshipIndex()
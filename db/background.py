@@ -0,0 +1,27 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------
+# Helper: run a refresh function forever in a daemon thread
+# --------------------------------------------------
+def start_refresher(name: str, interval: float, refresh):
+    """
+    Call `refresh()` every `interval` seconds in a daemon thread.
+    Errors are logged and the loop keeps going, so a failed rebuild
+    just leaves the previous in-memory data in place.
+    """
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                refresh()
+            except Exception:
+                logger.exception("background refresh %s failed", name)
+
+    thread = threading.Thread(target=loop, name=name, daemon=True)
+    thread.start()
+    return thread
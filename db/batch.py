@@ -0,0 +1,84 @@
+import os
+import threading
+
+from cachetools import TTLCache
+
+from db.async_supabase import async_supabase
+from db.data_version import data_version
+from db.supabase import supabase
+
+# Most ids one batch request may ask for
+MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "100"))
+CACHE_TTL = float(os.getenv("BATCH_CACHE_TTL_SECONDS", "600"))
+CACHE_SIZE = int(os.getenv("BATCH_CACHE_SIZE", "20000"))
+
+
+# --------------------------------------------------
+# Helper: ?ids=3,1,2 → [3, 1, 2]
+# --------------------------------------------------
+def ids_arg(args, max_ids: int = MAX_IDS):
+    """Distinct integer ids in request order; ValueError on bad input."""
+    try:
+        ids = [int(part) for part in args.get("ids", "").split(",") if part.strip()]
+    except ValueError:
+        raise ValueError("ids must be a comma-separated list of integers")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > max_ids:
+        raise ValueError(f"at most {max_ids} ids per request")
+    return ids
+
+
+# --------------------------------------------------
+# Rows by id: one `in` query for the ids not cached yet
+# --------------------------------------------------
+class BatchLoader:
+    """
+    Resolves a list of ids to rows of one table. Rows (and misses) are
+    kept per id for CACHE_TTL seconds, so a page of cards mostly hits
+    memory and the rest costs a single `id=in.(...)` query. Emptied
+    whenever the data version changes.
+    """
+
+    def __init__(self, table: str, columns: str):
+        self.table = table
+        self.columns = columns
+        self._lock = threading.Lock()
+        self._rows = TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+        data_version.on_change(lambda _token: self.invalidate())
+
+    def invalidate(self):
+        with self._lock:
+            self._rows.clear()
+
+    def _query(self, client, ids):
+        return client.table(self.table).select(self.columns).in_("id", ids)
+
+    def _cached(self, ids):
+        # Runs the on_change listeners (and so invalidate()) after a bump
+        data_version.current()
+        with self._lock:
+            found = {i: self._rows[i] for i in ids if i in self._rows}
+        return found, [i for i in ids if i not in found]
+
+    def _store(self, ids, rows, found):
+        by_id = {r["id"]: r for r in rows}
+        with self._lock:
+            for i in ids:
+                # None is cached too: unknown ids are not re-queried
+                self._rows[i] = found[i] = by_id.get(i)
+
+    def _result(self, ids, found):
+        # Keyed by id; jsonify sorts the keys, so the body is in id order
+        return {i: found[i] for i in ids}
+
+    def load(self, ids):
+        found, missing = self._cached(ids)
+        if missing:
+            self._store(missing, self._query(supabase, missing).execute().data or [], found)
+        return self._result(ids, found)
+
+    async def load_async(self, ids):
+        found, missing = self._cached(ids)
+        if missing:
+            self._store(missing, (await self._query(async_supabase, missing).execute()).data or [], found)
+        return self._result(ids, found)
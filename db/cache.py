@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from cachetools import TLRUCache
+from flask import request, make_response
+
+from db.compression import MIN_BYTES as MIN_COMPRESS_BYTES, VARY, compress, negotiate
+
+CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+
+# --------------------------------------------------
+# Cached response entry
+# --------------------------------------------------
+class CachedResponse:
+    __slots__ = ("body", "status", "content_type", "expires_at", "variants")
+
+    def __init__(self, body: bytes, status: int, content_type: str, ttl: float):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.expires_at = time.monotonic() + ttl
+        # encoding → compressed body, filled on first request for it
+        self.variants = {}
+
+    def encoded(self, encoding: str | None):
+        """(body, encoding actually used) for a negotiated encoding."""
+        if encoding is None or len(self.body) < MIN_COMPRESS_BYTES:
+            return self.body, None
+        body = self.variants.get(encoding)
+        if body is None:
+            body = self.variants[encoding] = compress(self.body, encoding)
+        return body, encoding
+
+
+# --------------------------------------------------
+# Process-level response cache (TTL per entry, LRU bounded)
+# --------------------------------------------------
+class ResponseCache:
+    """
+    Serialized responses keyed on route + normalized query args.
+
+    Every entry carries its own TTL (set by the route) and the whole
+    cache is LRU-bounded, so a burst of distinct query strings cannot
+    grow memory without limit.
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._entries = TLRUCache(
+            maxsize=maxsize,
+            ttu=lambda _key, entry, _now: entry.expires_at,
+            timer=time.monotonic,
+        )
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def get(self, key: str, route: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses[route] += 1
+            else:
+                self.hits[route] += 1
+            return entry
+
+    def set(self, key: str, entry: CachedResponse):
+        with self._lock:
+            self._entries[key] = entry
+
+    def invalidate(self, prefix: str = ""):
+        """Drop every entry whose key starts with prefix; returns the count."""
+        with self._lock:
+            keys = [k for k in list(self._entries.keys()) if k.startswith(prefix)]
+            for k in keys:
+                self._entries.pop(k, None)
+            return len(keys)
+
+    def stats(self):
+        with self._lock:
+            routes = sorted(set(self.hits) | set(self.misses))
+            return {
+                "size": len(self._entries),
+                "maxsize": self._entries.maxsize,
+                "routes": {
+                    r: {"hits": self.hits[r], "misses": self.misses[r]}
+                    for r in routes
+                },
+            }
+
+
+response_cache = ResponseCache()
+
+
+# --------------------------------------------------
+# Helper: cache key = path + sorted, stripped query args
+# --------------------------------------------------
+def cache_key():
+    return make_cache_key(request.path, request.args)
+
+
+def versioned_key(key: str, version: str):
+    """Response-cache entry key: a body is only served under the data version it was built for."""
+    return f"{key}#{version}"
+
+
+def current_key(key: str):
+    """Entry key of a request's cache key under the current data version."""
+    # db.data_version imports db.supabase, which imports this module.
+    # Reading the version also runs the on_change listeners after a bump.
+    from db.data_version import data_version
+
+    return versioned_key(key, data_version.current())
+
+
+def cacheable(status: int, streamed: bool = False):
+    """Only complete 200 responses are cached."""
+    return status == 200 and not streamed
+
+
+def make_cache_key(path: str, args):
+    args = sorted(
+        (k, v.strip())
+        for k, values in args.lists()
+        for v in values
+        if v.strip()
+    )
+    query = "&".join(f"{k}={v}" for k, v in args)
+    return f"{path}?{query}" if query else path
+
+
+# --------------------------------------------------
+# Helper: serve a cache entry in the client's preferred encoding
+# --------------------------------------------------
+def cached_response(entry: CachedResponse, response=None):
+    body, encoding = entry.encoded(negotiate(request.headers.get("Accept-Encoding")))
+    if response is None:
+        response = make_response(body, entry.status, {"Content-Type": entry.content_type})
+    else:
+        # the view's own response, on a miss: keep its headers
+        response.set_data(body)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add(VARY)
+    return response
+
+
+# --------------------------------------------------
+# Decorator: cache a view's successful responses for `ttl` seconds
+# --------------------------------------------------
+def cached(ttl: float):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = current_key(cache_key())
+            route = request.url_rule.rule if request.url_rule else request.path
+
+            entry = response_cache.get(key, route)
+            if entry is not None:
+                return cached_response(entry)
+
+            response = make_response(view(*args, **kwargs))
+            if cacheable(response.status_code, response.is_streamed):
+                entry = CachedResponse(
+                    response.get_data(),
+                    response.status_code,
+                    response.content_type,
+                    ttl,
+                )
+                response_cache.set(key, entry)
+                return cached_response(entry, response)
+            return response
+
+        # asgi.py applies the same TTL to the route's async handler
+        wrapper.cache_ttl = ttl
+        return wrapper
+    return decorator
@@ -0,0 +1,211 @@
+import os
+import threading
+
+import numpy as np
+
+from db.authorship_index import added_rows, authorship_index, positions
+
+# Articles with more authors than this add no edges: a 1,000-author
+# paper would otherwise add a million of them.
+MAX_AUTHORS = int(os.getenv("COAUTHOR_MAX_AUTHORS", "200"))
+# Most (researcher, researcher) pairs expanded at once while building
+CHUNK_PAIRS = int(os.getenv("COAUTHOR_CHUNK_PAIRS", str(1 << 22)))
+
+
+def _edge_keys(members, starts, sizes, n):
+    """src * n + dst for every ordered pair within each article, without loops."""
+    squares = sizes * sizes
+    group = np.repeat(np.arange(len(sizes)), squares)
+    local = np.arange(squares.sum()) - np.repeat(np.cumsum(squares) - squares, squares)
+    src = members[starts[group] + local // sizes[group]]
+    dst = members[starts[group] + local % sizes[group]]
+    keep = src != dst
+    return src[keep] * n + dst[keep]
+
+
+def _edges(article, researcher, n):
+    """
+    (sorted src * n + dst keys, shared-article counts) of the graph over
+    these authorship rows; both directions, no loops.
+    """
+    # Distinct (article, researcher) pairs, grouped by article
+    known = (article >= 0) & (researcher >= 0)
+    pairs = np.unique(np.stack([article[known], researcher[known]], axis=1), axis=0)
+    articles, members = pairs[:, 0], pairs[:, 1]
+
+    _, starts, sizes = np.unique(articles, return_index=True, return_counts=True)
+    keep = (sizes > 1) & (sizes <= MAX_AUTHORS)
+    starts, sizes = starts[keep], sizes[keep]
+
+    # Expand pairs a chunk of articles at a time (at most CHUNK_PAIRS
+    # pairs, or one article), counting each chunk's edges as we go
+    keys, counts = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    ends = np.cumsum(sizes * sizes)
+    start = 0
+    while start < len(sizes):
+        base = ends[start - 1] if start else 0
+        end = max(int(np.searchsorted(ends, base + CHUNK_PAIRS, side="right")), start + 1)
+        chunk_keys, chunk_counts = np.unique(
+            _edge_keys(members, starts[start:end], sizes[start:end], n), return_counts=True,
+        )
+        keys.append(chunk_keys)
+        counts.append(chunk_counts)
+        start = end
+
+    # Edge weight = number of articles the pair shares
+    edges, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    weights = np.bincount(inverse, weights=np.concatenate(counts), minlength=len(edges))
+    return edges, weights.astype(np.int64)
+
+
+# --------------------------------------------------
+# Co-authorship graph in CSR form
+# --------------------------------------------------
+class CoauthorGraph:
+    """
+    Nodes are researcher positions in the authorship index (ids sorted
+    ascending). Edges join researchers who share at least one article:
+
+        indptr[p]:indptr[p + 1]   slice of p's neighbours
+        indices                   neighbour positions, ascending per slice
+        weights                   shared-article count of each edge
+
+    Every edge is stored in both directions.
+    """
+
+    def __init__(self, cols, edges=None, weights=None):
+        self.cols = cols
+        n = len(cols.r_ids)
+        if edges is None:
+            edges, weights = _edges(cols.article, cols.researcher, n)
+
+        self.indices = edges % n
+        self.weights = weights.astype(np.int64)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edges // n, minlength=n), out=self.indptr[1:])
+
+    def updated(self, cols):
+        """
+        Graph of `cols`, a build that only adds rows to this one's (see
+        db.authorship_index.added_rows), or None when it does not. Only
+        the articles of the added rows are expanded again.
+        """
+        old = self.cols
+        added = added_rows(old, cols)
+        if added is None or len(old.r_ids) == 0:
+            return None
+
+        n = len(cols.r_ids)
+        # old position → new position; increasing, so key order holds
+        remap = positions(cols.r_ids, old.r_ids)
+        src = np.repeat(np.arange(len(old.r_ids)), np.diff(self.indptr))
+        keys = remap[src] * n + remap[self.indices]
+
+        touched = np.unique(cols.article[added])
+        before = np.isin(old.article, touched[touched >= 0])
+        after = np.isin(cols.article, touched[touched >= 0])
+        old_researcher = old.researcher[before]
+        old_researcher = np.where(old_researcher >= 0, remap[np.maximum(old_researcher, 0)], -1)
+        lost, lost_weights = _edges(old.article[before], old_researcher, n)
+        won, won_weights = _edges(cols.article[after], cols.researcher[after], n)
+
+        delta, inverse = np.unique(np.concatenate([lost, won]), return_inverse=True)
+        change = np.bincount(inverse, weights=np.concatenate([-lost_weights, won_weights]), minlength=len(delta))
+        change = change.astype(np.int64)
+
+        # Merge the changes into the sorted edge list
+        at = np.searchsorted(keys, delta)
+        found = at < len(keys)
+        found[found] = keys[at[found]] == delta[found]
+        weights = self.weights.copy()
+        weights[at[found]] += change[found]
+        keys = np.insert(keys, at[~found], delta[~found])
+        weights = np.insert(weights, at[~found], change[~found])
+        keep = weights > 0
+        return CoauthorGraph(cols, keys[keep], weights[keep])
+
+    # ---------- lookups ----------
+    def node(self, researcher_id: int):
+        """Position of a researcher id, or None when unknown."""
+        pos = positions(self.cols.r_ids, np.array([researcher_id], dtype=np.int64))[0]
+        return None if pos < 0 else int(pos)
+
+    def neighbours(self, node: int):
+        start, end = self.indptr[node], self.indptr[node + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    def _ranked(self, nodes, scores, k):
+        # score desc, ties broken by id desc (as db.authorship_index.top_k)
+        order = np.lexsort((-self.cols.r_ids[nodes], -scores))
+        if k is not None:
+            order = order[:k]
+        return nodes[order], scores[order]
+
+    def coauthors(self, node: int, k: int | None = None):
+        """(positions, shared-article counts) of direct co-authors, strongest first."""
+        nodes, weights = self.neighbours(node)
+        return self._ranked(nodes, weights, k)
+
+    def second_degree(self, node: int, k: int | None = None):
+        """
+        Researchers two hops away (co-authors of co-authors, excluding the
+        researcher and their direct co-authors). Returns (positions,
+        shared co-authors, strength), where strength sums min(w1, w2) over
+        the connecting paths; ranked by shared co-authors, then strength.
+        """
+        direct, direct_w = self.neighbours(node)
+        if len(direct) == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty
+
+        starts, ends = self.indptr[direct], self.indptr[direct + 1]
+        lengths = ends - starts
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        reached = self.indices[offsets]
+        strength = np.minimum(self.weights[offsets], np.repeat(direct_w, lengths))
+
+        outside = (reached != node) & ~np.isin(reached, direct)
+        reached, strength = reached[outside], strength[outside]
+
+        nodes, inverse, via = np.unique(reached, return_inverse=True, return_counts=True)
+        total = np.bincount(inverse, weights=strength, minlength=len(nodes)).astype(np.int64)
+
+        # shared co-authors first, then strength, then id
+        order = np.lexsort((-self.cols.r_ids[nodes], -total, -via))
+        if k is not None:
+            order = order[:k]
+        return nodes[order], via[order], total[order]
+
+
+# --------------------------------------------------
+# Process-level graph, rebuilt with the authorship index
+# --------------------------------------------------
+class CoauthorGraphIndex:
+    """
+    Built once on first use; from then on every authorship index build
+    comes with its graph, made in the refresher thread before the build
+    is swapped in, so requests never wait for one. Builds that only add
+    rows (incremental refresh, unchanged full rebuilds) update the
+    previous graph instead of expanding every article again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._graph = None
+
+    def _build(self, cols):
+        graph = self._graph
+        graph = graph.updated(cols) if graph is not None else None
+        self._graph = graph if graph is not None else CoauthorGraph(cols)
+
+    def get(self) -> CoauthorGraph:
+        graph = self._graph
+        if graph is None:
+            with self._lock:
+                if self._graph is None:
+                    authorship_index.derive(self._build)
+                graph = self._graph
+        return graph
+
+
+coauthor_graph = CoauthorGraphIndex()
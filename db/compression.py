@@ -0,0 +1,82 @@
+import gzip
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only without it
+    brotli = None
+
+# Bodies smaller than this are sent as they are
+MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+
+# Preferred first when the client accepts several equally
+SUPPORTED = ["br", "gzip"] if brotli is not None else ["gzip"]
+# Request header the body depends on, for the Vary response header
+VARY = "Accept-Encoding"
+
+
+# --------------------------------------------------
+# Helper: pick an encoding from Accept-Encoding
+# --------------------------------------------------
+def negotiate(accept_encoding: str | None):
+    """
+    'gzip, deflate, br;q=0.9' → 'gzip'. Returns None for identity.
+    Honors q-values (q=0 refuses an encoding) and '*'.
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+# --------------------------------------------------
+# Whole bodies
+# --------------------------------------------------
+def compress(body: bytes, encoding: str):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        # mtime=0: the same body always compresses to the same bytes
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"unsupported encoding {encoding!r}")
+
+
+# --------------------------------------------------
+# Streamed bodies, compressed as they are produced
+# --------------------------------------------------
+def compress_stream(chunks, encoding: str):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        step, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        step, finish = compressor.compress, compressor.flush
+
+    for chunk in chunks:
+        out = step(chunk.encode() if isinstance(chunk, str) else chunk)
+        if out:
+            yield out
+    yield finish()
@@ -0,0 +1,103 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Max upstream queries one request may have in flight at once.
+MAX_PARALLEL = int(os.getenv("SUPABASE_MAX_PARALLEL", "8"))
+
+
+# --------------------------------------------------
+# Helper: run one query per item with bounded concurrency
+# --------------------------------------------------
+def fan_out(fn, items, max_workers: int | None = None):
+    """
+    Call fn(item) for every item, at most `max_workers` at a time,
+    and return the results in input order (so callers merge exactly
+    as they would have in a serial loop).
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    workers = min(max_workers or MAX_PARALLEL, len(items))
+    if workers <= 1:
+        return [fn(item) for item in items]
+
+    # Each task runs in its own copy of the caller's context, so
+    # per-request state (upstream accounting) follows it into the pool.
+    contexts = [contextvars.copy_context() for _ in items]
+
+    def run(ctx, item):
+        return ctx.run(fn, item)
+
+    # A pool per call: nested fan-outs can never starve each other.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, contexts, items))
+
+
+# --------------------------------------------------
+# Request-scoped batch of independent queries
+# --------------------------------------------------
+class QueryBatch:
+    """
+    Collect independent PostgREST queries, then execute them all at once.
+
+        batch = QueryBatch()
+        batch.add("by_h", supabase.table(...).select(...))
+        batch.add("total", supabase.table(...).select("id", count="exact"))
+        res = batch.execute()   # {"by_h": APIResponse, "total": APIResponse}
+
+    The request pays the latency of the slowest query, not the sum.
+    """
+
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max_workers
+        self._queries = {}
+
+    def add(self, name: str, query):
+        self._queries[name] = query
+        return self
+
+    def add_all(self, queries: dict):
+        self._queries.update(queries)
+        return self
+
+    def execute(self):
+        names = list(self._queries)
+        responses = fan_out(
+            lambda query: query.execute(),
+            [self._queries[n] for n in names],
+            max_workers=self.max_workers or len(names),
+        )
+        self._queries = {}
+        return dict(zip(names, responses))
+
+
+# --------------------------------------------------
+# asyncio counterparts (asgi.py, async PostgREST client)
+# --------------------------------------------------
+async def async_fan_out(fn, items, max_workers: int | None = None):
+    """fan_out for coroutines: await fn(item) for every item, in input order."""
+    limit = asyncio.Semaphore(max_workers or MAX_PARALLEL)
+
+    async def run(item):
+        async with limit:
+            return await fn(item)
+
+    # gather() runs each call in a task with a copy of the caller's context
+    return list(await asyncio.gather(*(run(item) for item in items)))
+
+
+class AsyncQueryBatch(QueryBatch):
+    """QueryBatch for async query builders: `res = await batch.execute()`."""
+
+    async def execute(self):
+        names = list(self._queries)
+        responses = await async_fan_out(
+            lambda query: query.execute(),
+            [self._queries[n] for n in names],
+            max_workers=self.max_workers or len(names),
+        )
+        self._queries = {}
+        return dict(zip(names, responses))
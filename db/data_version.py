@@ -0,0 +1,189 @@
+"""
+Data-version token: changes whenever the data behind the read endpoints
+does, and drives their ETags.
+
+    python -m db.data_version bump    # after an ingest run
+    python -m db.data_version show
+
+The token lives in DATA_VERSION_PATH, shared by every worker on the
+host; `bump` (also run by the histogram job and the snapshot sync, and
+exposed as POST /admin/data-version/bump) writes a new one. With
+SUPABASE_READ_SNAPSHOT on, the current snapshot version is part of the
+token too, so a fresh sync changes it without a bump. So is a content
+fingerprint of every in-memory index (see DataVersion.track), so a
+background index refresh that changes what the endpoints return
+changes the token as well.
+
+Response-cache invalidations by path prefix (POST /admin/cache/invalidate)
+are appended to INVALIDATIONS_PATH next to the token, and every worker
+applies them to its own cache when it re-reads the token.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from db.cache import response_cache
+from db.supabase import snapshot_version
+
+DATA_VERSION_PATH = os.getenv("DATA_VERSION_PATH", "data/DATA_VERSION")
+RELOAD_SECONDS = float(os.getenv("DATA_VERSION_RELOAD_SECONDS", "2"))
+INVALIDATIONS_PATH = os.getenv("CACHE_INVALIDATIONS_PATH", f"{DATA_VERSION_PATH}.invalidations")
+
+
+# --------------------------------------------------
+# Write side
+# --------------------------------------------------
+def bump(path: str = DATA_VERSION_PATH):
+    """Write a new token; returns it."""
+    token = str(time.time_ns() // 1000)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(token)
+    os.replace(tmp, path)
+    return token
+
+
+def invalidate_prefix(prefix: str, path: str = INVALIDATIONS_PATH):
+    """Ask every worker to drop its cached responses under `prefix`."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # One short append per call: whole lines, even with several writers
+    with open(path, "a") as f:
+        f.write(json.dumps({"at": time.time(), "prefix": prefix}) + "\n")
+
+
+# --------------------------------------------------
+# Helper: short digest of an index build
+# --------------------------------------------------
+def fingerprint(*parts):
+    """
+    Content digest of arrays, bytes, strings and JSON-able values. Equal
+    data gives equal digests in every worker, so ETags stay shared.
+    """
+    h = hashlib.blake2b(digest_size=6)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            data = np.ascontiguousarray(part).tobytes()
+        elif isinstance(part, bytes):
+            data = part
+        elif isinstance(part, str):
+            data = part.encode()
+        else:
+            data = json.dumps(part, sort_keys=True, default=str).encode()
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+# --------------------------------------------------
+# Read side: current token, re-read at most every RELOAD_SECONDS
+# --------------------------------------------------
+class DataVersion:
+    def __init__(self, path: str = DATA_VERSION_PATH, invalidations_path: str = INVALIDATIONS_PATH):
+        self.path = path
+        self.invalidations_path = invalidations_path
+        # bytes of the invalidations file already applied; None until the
+        # first read (the cache is empty then, earlier entries don't matter)
+        self._invalidations_read = None
+        self._lock = threading.Lock()
+        self._token = None
+        self._checked_at = 0.0
+        self._listeners = []
+        # name → fn() returning the generation of an in-memory index
+        self._sources = {}
+
+    def on_change(self, fn):
+        """Call fn(new_token) whenever the token changes in this process."""
+        self._listeners.append(fn)
+        return fn
+
+    def track(self, name: str, generation):
+        """
+        Make generation() (None until the index is built) part of the
+        token. Indexes call invalidate() after a swap so the change is
+        seen on the next current() call.
+        """
+        self._sources[name] = generation
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                token = f.read().strip() or "0"
+        except OSError:
+            token = "0"
+
+        version = snapshot_version()
+        if version:
+            token = f"{token}.{version}"
+
+        generations = sorted(
+            (name, g) for name, fn in list(self._sources.items()) if (g := fn()) is not None
+        )
+        return f"{token}.{fingerprint(generations)}" if generations else token
+
+    def _apply_invalidations(self):
+        try:
+            size = os.path.getsize(self.invalidations_path)
+        except OSError:
+            size = 0
+        if self._invalidations_read is None or size < self._invalidations_read:
+            self._invalidations_read = size
+            return
+        if size == self._invalidations_read:
+            return
+
+        with open(self.invalidations_path) as f:
+            f.seek(self._invalidations_read)
+            text = f.read(size - self._invalidations_read)
+        # a line still being written is picked up on the next check
+        done = text[:text.rfind("\n") + 1]
+        self._invalidations_read += len(done.encode())
+        for line in done.splitlines():
+            response_cache.invalidate(json.loads(line)["prefix"])
+
+    def invalidate(self):
+        """Re-read the token on the next current() call."""
+        self._checked_at = float("-inf")
+
+    def current(self):
+        now = time.monotonic()
+        if self._token is not None and now - self._checked_at < RELOAD_SECONDS:
+            return self._token
+        with self._lock:
+            if self._token is not None and now - self._checked_at < RELOAD_SECONDS:
+                return self._token
+            self._apply_invalidations()
+            token = self._read()
+            if self._token is not None and token != self._token:
+                # Listeners reload what the bodies are built from: they run
+                # before any request is handed the new token
+                for fn in self._listeners:
+                    fn(token)
+            self._token, self._checked_at = token, now
+        return token
+
+
+data_version = DataVersion()
+
+
+# Entries are keyed by version (see db.cache.versioned_key): the old
+# ones can no longer be served, this frees their memory
+@data_version.on_change
+def drop_cached_responses(_token):
+    response_cache.invalidate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or bump the data-version token.")
+    parser.add_argument("command", choices=["bump", "show"])
+    args = parser.parse_args()
+
+    if args.command == "bump":
+        print(f"data version bumped to {bump()}")
+    else:
+        print(data_version.current())
@@ -0,0 +1,50 @@
+import hashlib
+import os
+
+from db.data_version import data_version
+
+ENABLED = os.getenv("ETAG_ENABLED", "true").lower() in ("1", "true", "yes")
+# Paths that never get ETags
+EXCLUDED_PREFIXES = ("/metrics", "/admin")
+
+
+def etag_applies(method: str, path: str):
+    return ENABLED and method == "GET" and not path.startswith(EXCLUDED_PREFIXES)
+
+
+def request_etag(method: str, path: str, key: str, encoding: str | None):
+    """ETag of a request's response under the current data version; None when it gets none."""
+    if not etag_applies(method, path):
+        return None
+    return make_etag(data_version.current(), key, encoding)
+
+
+def etag_headers(etag: str | None, status: int):
+    """Headers a response sent with this ETag carries (full bodies and 304s only)."""
+    if etag is None or status not in (200, 304):
+        return []
+    # Clients may keep the body but must revalidate it on every use
+    return [("ETag", etag), ("Cache-Control", "no-cache")]
+
+
+# --------------------------------------------------
+# Helper: strong ETag for one representation of one resource
+# --------------------------------------------------
+def make_etag(version: str, key: str, encoding: str | None):
+    """
+    '"<data version>-<digest>"'. The body of a read endpoint only
+    depends on the data version, the request (path + normalized args,
+    see db.cache.cache_key) and the negotiated content encoding.
+    """
+    digest = hashlib.blake2b(f"{key}|{encoding or 'identity'}".encode(), digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def if_none_match(header: str | None, etag: str):
+    """True when an If-None-Match header matches etag (weak comparison)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [t.strip() for t in header.split(",")]
+    return any(t.removeprefix("W/") == etag for t in candidates)
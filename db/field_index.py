@@ -0,0 +1,194 @@
+import bisect
+import os
+import threading
+import time
+
+from pyroaring import BitMap
+
+from db.background import start_refresher
+from db.data_version import data_version, fingerprint
+from db.incremental import DeltaFeed, refresh_engine
+
+REFRESH_SECONDS = float(os.getenv("FIELD_INDEX_REFRESH_SECONDS", "600"))
+PAGE_SIZE = 2000
+
+
+# --------------------------------------------------
+# Helper: normalize research fields
+# --------------------------------------------------
+def normalize_fields(path: str):
+    """
+    'Computer Science > Quantum Computing'
+    → ['computer science', 'quantum computing']
+    """
+    if not path:
+        return []
+    return [p.strip().lower() for p in path.split(">") if p.strip()]
+
+
+# --------------------------------------------------
+# Field taxonomy index (one per process)
+# --------------------------------------------------
+class FieldIndex:
+    """
+    Sorted set of every normalized research field, plus an inverted index
+    field → article ids stored as compressed roaring bitmaps.
+
+    The first call in a process builds it with one paged scan of
+    articles.research_area_path; after that a daemon thread rebuilds it
+    every REFRESH_SECONDS and swaps it in, so readers never wait. New
+    articles are added in between by the incremental refresh engine.
+    """
+
+    def __init__(self, refresh_seconds: float = REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.loaded_at = None
+        # Content fingerprint of the current build, part of the data version
+        self.generation = None
+        self._lock = threading.Lock()
+        # Serializes full rebuilds and delta applies
+        self._swap_lock = threading.Lock()
+        self._feed = DeltaFeed("articles", "id,research_area_path", page_size=PAGE_SIZE)
+        self._pid = None
+        # (sorted fields, fields joined by "\n", start offset of each field)
+        self._data: tuple[list[str], str, list[int]] = ([], "", [])
+        self._articles: dict[str, BitMap] = {}
+        # article id → its fields, so a changed article leaves its old ones
+        # (only read and written under _swap_lock)
+        self._fields_of: dict[int, tuple[str, ...]] = {}
+        data_version.track("field-index", lambda: self.generation)
+
+    # ---------- building ----------
+    def _scan(self):
+        articles: dict[str, BitMap] = {}
+        fields_of = {}
+        for r in self._feed.scan():
+            fields = fields_of[r["id"]] = tuple(normalize_fields(r.get("research_area_path")))
+            for f in fields:
+                bm = articles.get(f)
+                if bm is None:
+                    bm = articles[f] = BitMap()
+                bm.add(r["id"])
+
+        for bm in articles.values():
+            bm.run_optimize()
+        return articles, fields_of
+
+    def _swap(self, articles, generation):
+        fields = sorted(articles)
+        offsets = []
+        pos = 0
+        for f in fields:
+            offsets.append(pos)
+            pos += len(f) + 1
+        # One tuple, one assignment: readers never mix two builds.
+        self._data = (fields, "\n".join(fields), offsets)
+        self._articles = articles
+        self.loaded_at = time.time()
+        if generation != self.generation:
+            self.generation = generation
+            data_version.invalidate()
+
+    def refresh(self):
+        with self._swap_lock:
+            articles, self._fields_of = self._scan()
+            self._swap(articles, fingerprint(
+                *(part for f in sorted(articles) for part in (f, articles[f].serialize()))
+            ))
+
+    def apply(self, deltas):
+        """Articles added or changed since the last read (see db.incremental)."""
+        with self._swap_lock:
+            articles = dict(self._articles)
+            touched = {}
+
+            def bitmap(f):
+                bm = touched.get(f)
+                if bm is None:
+                    # copy on write: readers keep the bitmaps they hold
+                    bm = touched[f] = BitMap(articles.get(f, ()))
+                return bm
+
+            for r in deltas.get("articles", ()):
+                fields = tuple(normalize_fields(r.get("research_area_path")))
+                # A changed article (updated_at marks) leaves fields it lost
+                for f in set(self._fields_of.get(r["id"], ())) - set(fields):
+                    bitmap(f).discard(r["id"])
+                for f in fields:
+                    bitmap(f).add(r["id"])
+                self._fields_of[r["id"]] = fields
+
+            for f, bm in touched.items():
+                if bm:
+                    bm.run_optimize()
+                    articles[f] = bm
+                else:
+                    # no articles left: gone from the taxonomy, as after a rebuild
+                    articles.pop(f, None)
+            # O(delta): chained onto the previous build's fingerprint
+            self._swap(articles, fingerprint(self.generation, [
+                (r["id"], r.get("research_area_path")) for r in deltas.get("articles", ())
+            ]))
+
+    def _ensure_loaded(self):
+        # gunicorn forks workers after import, so track the pid: each
+        # worker builds its own copy and starts its own refresher thread.
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self.refresh()
+            self._pid = pid
+            start_refresher("field-index", self.refresh_seconds, self.refresh)
+            refresh_engine.register("field-index", [self._feed], self.apply)
+
+    # ---------- queries ----------
+    def all(self):
+        self._ensure_loaded()
+        return list(self._data[0])
+
+    def count(self):
+        self._ensure_loaded()
+        return len(self._data[0])
+
+    def articles(self, field: str):
+        """Ids of every article tagged with the exact normalized field."""
+        self._ensure_loaded()
+        return self._articles.get(field.strip().lower(), BitMap())
+
+    def articles_matching(self, *fields: str):
+        """Ids of articles tagged with all of the given fields."""
+        self._ensure_loaded()
+        bitmaps = [self.articles(f) for f in fields]
+        if not bitmaps:
+            return BitMap()
+        return BitMap.intersection(*bitmaps)
+
+    def prefix(self, q: str):
+        """Fields starting with q, in sorted order."""
+        self._ensure_loaded()
+        fields = self._data[0]
+        start = bisect.bisect_left(fields, q)
+        end = bisect.bisect_left(fields, q + "\U0010ffff", lo=start)
+        return fields[start:end]
+
+    def search(self, q: str):
+        """Fields containing q, in sorted order."""
+        self._ensure_loaded()
+        fields, blob, offsets = self._data
+        if not q:
+            return list(fields)
+
+        found = []
+        pos = blob.find(q)
+        while pos != -1:
+            i = bisect.bisect_right(offsets, pos) - 1
+            found.append(fields[i])
+            # skip to the next field, one hit per field is enough
+            pos = blob.find(q, offsets[i] + len(fields[i]) + 1)
+        return found
+
+
+field_index = FieldIndex()
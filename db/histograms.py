@@ -0,0 +1,248 @@
+"""
+Precomputed research-field histograms per country, institution and researcher.
+
+Build or update the snapshot with:
+
+    python -m db.histograms build     # full pass over authorships
+    python -m db.histograms update    # only authorships added since last run
+
+The routes read the snapshot file (FIELD_HISTOGRAM_PATH) and serve the
+stored top-N lists directly; they fall back to live queries until the
+job has been run once.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from db.supabase import supabase
+from db.concurrency import fan_out
+from db.data_version import bump, data_version
+from db.field_index import normalize_fields
+
+HISTOGRAM_PATH = os.getenv("FIELD_HISTOGRAM_PATH", "data/field_histograms.json")
+RELOAD_SECONDS = 30
+PAGE_SIZE = 1000
+TOP_N = 10
+
+
+def leaf_field(path: str):
+    """'Computer Science > Quantum Computing' → 'Quantum Computing'"""
+    if not path:
+        return None
+    return path.split(">")[-1].strip()
+
+
+# --------------------------------------------------
+# Helper: page through a table ordered by id
+# --------------------------------------------------
+def _paged(table: str, columns: str, after_id: int = 0):
+    last_id = after_id
+    while True:
+        rows = (
+            supabase
+            .table(table)
+            .select(columns)
+            .gt("id", last_id)
+            .order("id")
+            .limit(PAGE_SIZE)
+            .execute()
+            .data or []
+        )
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1]["id"]
+
+
+def _article_paths(article_ids):
+    """id → research_area_path for just the given articles."""
+    ids = sorted(set(article_ids))
+
+    def fetch(chunk):
+        return (
+            supabase
+            .table("articles")
+            .select("id, research_area_path")
+            .in_("id", chunk)
+            .execute()
+            .data or []
+        )
+
+    chunks = [ids[i:i + 500] for i in range(0, len(ids), 500)]
+    return {
+        r["id"]: r.get("research_area_path")
+        for rows in fan_out(fetch, chunks)
+        for r in rows
+    }
+
+
+# --------------------------------------------------
+# Helper: counts → stored top-N stats
+# --------------------------------------------------
+def _top(counter: Counter, n: int = TOP_N):
+    total = sum(counter.values())
+    return [
+        {
+            "field": field,
+            "count": count,
+            "percentage": round((count / total) * 100, 2) if total else 0
+        }
+        for field, count in counter.most_common(n)
+    ]
+
+
+# --------------------------------------------------
+# Batch job
+# --------------------------------------------------
+def _count(rows, paths, counts):
+    """Add one pass of authorship rows to the per-entity counters."""
+    last_id = 0
+    for r in rows:
+        last_id = max(last_id, r["id"])
+        path = paths.get(r["article_id"])
+        if not path:
+            continue
+
+        fields = normalize_fields(path)
+        if r.get("country_id") is not None:
+            counts["countries"][str(r["country_id"])].update(fields)
+        if r.get("institution_id") is not None:
+            counts["institutions"][str(r["institution_id"])].update(fields)
+        if r.get("researcher_id") is not None:
+            counts["researchers"][str(r["researcher_id"])][leaf_field(path)] += 1
+    return last_id
+
+
+def _empty_counts():
+    return {
+        "countries": defaultdict(Counter),
+        "institutions": defaultdict(Counter),
+        "researchers": defaultdict(Counter),
+    }
+
+
+def _save(counts, watermark, path=HISTOGRAM_PATH):
+    snapshot = {
+        "built_at": time.time(),
+        "watermark": watermark,
+        "counts": {
+            kind: {key: dict(c) for key, c in per_entity.items()}
+            for kind, per_entity in counts.items()
+        },
+        "top": {
+            kind: {key: _top(c) for key, c in per_entity.items()}
+            for kind, per_entity in counts.items()
+        },
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, path)
+    # Field stats changed: new ETags on the read endpoints
+    bump()
+
+
+def build(path=HISTOGRAM_PATH):
+    """Full rebuild: one pass over articles, one pass over authorships."""
+    paths = {
+        r["id"]: r.get("research_area_path")
+        for r in _paged("articles", "id, research_area_path")
+    }
+    counts = _empty_counts()
+    rows = _paged("authorships", "id, article_id, researcher_id, institution_id, country_id")
+    watermark = _count(rows, paths, counts)
+    _save(counts, watermark, path)
+    return watermark
+
+
+def update(path=HISTOGRAM_PATH):
+    """Incremental rebuild: only authorships with id above the stored watermark."""
+    if not os.path.exists(path):
+        return build(path)
+
+    with open(path) as f:
+        snapshot = json.load(f)
+
+    counts = _empty_counts()
+    for kind, per_entity in snapshot["counts"].items():
+        for key, c in per_entity.items():
+            counts[kind][key] = Counter(c)
+
+    rows = list(_paged(
+        "authorships",
+        "id, article_id, researcher_id, institution_id, country_id",
+        after_id=snapshot["watermark"],
+    ))
+    if not rows:
+        return snapshot["watermark"]
+
+    paths = _article_paths(r["article_id"] for r in rows)
+    watermark = max(snapshot["watermark"], _count(rows, paths, counts))
+    _save(counts, watermark, path)
+    return watermark
+
+
+# --------------------------------------------------
+# Read side: stored top-N per entity
+# --------------------------------------------------
+class FieldHistograms:
+    """
+    Loads the snapshot file and reloads it when the job rewrites it: at
+    the latest after RELOAD_SECONDS, and right away when the data version
+    changes (the job bumps it), so a new token never serves old stats.
+    """
+
+    def __init__(self, path: str = HISTOGRAM_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._top = None
+        self._mtime = None
+        self._checked_at = 0.0
+        data_version.on_change(lambda _token: self.reload())
+
+    def reload(self):
+        """Re-check the file now."""
+        self._checked_at = float("-inf")
+        self._maybe_reload()
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_SECONDS and self._top is not None:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return
+            if mtime == self._mtime:
+                return
+            with open(self.path) as f:
+                self._top = json.load(f)["top"]
+            self._mtime = mtime
+
+    def top(self, kind: str, key, n: int = TOP_N):
+        """
+        Stored top-N field stats for one entity, or None when no snapshot
+        exists yet (callers then compute the stats live).
+        """
+        self._maybe_reload()
+        if self._top is None:
+            return None
+        return self._top.get(kind, {}).get(str(key), [])[:n]
+
+
+field_histograms = FieldHistograms()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("mode", choices=["build", "update"])
+    args = parser.parse_args()
+
+    watermark = build() if args.mode == "build" else update()
+    print(f"field histograms written to {HISTOGRAM_PATH} (authorships up to id {watermark})")
@@ -0,0 +1,183 @@
+"""
+Watermark-based incremental refresh for the in-memory indexes.
+
+Each index reads its tables through DeltaFeeds. A full build scans a
+table once through its feed, which records the high-water mark (largest
+id, or largest value of an updated_at-style column, see
+INCREMENTAL_MARK_COLUMNS). From then on the refresh engine asks every
+feed for the rows past its mark every INCREMENTAL_REFRESH_SECONDS and
+hands them to the index's apply function, so upstream reads follow the
+ingest rate instead of the table size. Applied rows change the data
+version (through the indexes' generations, see db.data_version), which
+empties the response and batch caches.
+
+With id marks only inserts are seen; updates and deletes reach the
+indexes through their periodic full rebuild, which also re-seeds the
+marks.
+"""
+import os
+import threading
+import time
+
+from db.background import start_refresher
+from db.data_version import data_version
+from db.streaming import iter_rows, PAGE_SIZE
+from db.supabase import supabase
+
+REFRESH_SECONDS = float(os.getenv("INCREMENTAL_REFRESH_SECONDS", "30"))
+ENABLED = os.getenv("INCREMENTAL_REFRESH", "true").lower() in ("1", "true", "yes")
+
+
+def _mark_columns(spec: str):
+    """'researchers:updated_at,institution_info:updated_at' → {table: column}"""
+    columns = {}
+    for part in spec.split(","):
+        table, _, column = part.strip().partition(":")
+        if table and column:
+            columns[table] = column
+    return columns
+
+
+# Per-table watermark column (default: id)
+MARK_COLUMNS = _mark_columns(os.getenv("INCREMENTAL_MARK_COLUMNS", ""))
+
+
+# --------------------------------------------------
+# One table read through a high-water mark
+# --------------------------------------------------
+class DeltaFeed:
+    """
+    Rows of `table` past a (mark column, id) watermark.
+
+        feed = DeltaFeed("authorships", "id,article_id,researcher_id")
+        rows = list(feed.scan())   # full read, sets the mark
+        new = feed.fetch()         # only rows added since, moves the mark
+    """
+
+    def __init__(self, table: str, columns: str, page_size: int = PAGE_SIZE):
+        self.table = table
+        self.column = MARK_COLUMNS.get(table, "id")
+        self.page_size = page_size
+        names = [c.strip() for c in columns.split(",")]
+        if self.column not in names:
+            names.append(self.column)
+        self.columns = ",".join(names)
+        # (mark value, id) of the last row seen; None before the first scan
+        self.mark = None
+
+    def _key(self, row):
+        return row.get(self.column), row["id"]
+
+    def _advance(self, rows):
+        # Rows without a mark value are only picked up by full scans
+        keys = [self._key(r) for r in rows if r.get(self.column) is not None]
+        if keys:
+            top = max(keys)
+            if self.mark is None or top > self.mark:
+                self.mark = top
+
+    def scan(self):
+        """Every row of the table; the mark moves to the newest one."""
+        rows = []
+        for row in iter_rows(self.table, self.columns, self.page_size):
+            rows.append(row)
+            yield row
+        self._advance(rows)
+
+    def _after(self, query, mark):
+        value, last_id = mark
+        if self.column == "id":
+            return query.gt("id", last_id)
+        # Quoted: timestamps contain characters the or= syntax reserves
+        return query.or_(f'{self.column}.gt."{value}",and({self.column}.eq."{value}",id.gt.{last_id})')
+
+    def fetch(self):
+        """Rows past the mark, oldest first; moves the mark past them."""
+        if self.mark is None:
+            return []
+
+        found = []
+        mark = self.mark
+        while True:
+            query = supabase.table(self.table).select(self.columns).limit(self.page_size)
+            if self.column != "id":
+                query = query.order(self.column)
+            rows = self._after(query.order("id"), mark).execute().data or []
+            found.extend(rows)
+            if len(rows) < self.page_size:
+                break
+            mark = self._key(rows[-1])
+
+        self._advance(found)
+        return found
+
+
+# --------------------------------------------------
+# Engine: one background loop applying deltas to every registered index
+# --------------------------------------------------
+class RefreshEngine:
+    def __init__(self, refresh_seconds: float = REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._pid = None
+        # name → (feeds, apply)
+        self._targets = {}
+        self._stats = {}
+
+    def register(self, name: str, feeds, apply):
+        """
+        Call apply({table: new rows}) whenever any of `feeds` has rows
+        past its mark. Starts the background loop on first use in each
+        process.
+        """
+        self._targets[name] = (list(feeds), apply)
+        self._stats.setdefault(name, {"runs": 0, "rows": 0, "last_rows": 0, "last_seconds": 0.0, "applied_at": None})
+        self._start()
+
+    def _start(self):
+        pid = os.getpid()
+        if not ENABLED or self._pid == pid:
+            return
+        with self._lock:
+            if self._pid != pid:
+                self._pid = pid
+                start_refresher("incremental-refresh", self.refresh_seconds, self.refresh)
+
+    def refresh(self):
+        """One cycle over every registered index; returns {name: rows applied}."""
+        applied = {}
+        for name, (feeds, apply) in list(self._targets.items()):
+            started = time.perf_counter()
+            deltas = {feed.table: feed.fetch() for feed in feeds}
+            count = sum(len(rows) for rows in deltas.values())
+            if count:
+                apply(deltas)
+
+            stats = self._stats[name]
+            stats["runs"] += 1
+            stats["rows"] += count
+            stats["last_rows"] = count
+            stats["last_seconds"] = round(time.perf_counter() - started, 4)
+            if count:
+                stats["applied_at"] = time.time()
+            applied[name] = count
+
+        if any(applied.values()):
+            # The indexes' generations moved: re-read the token now, which
+            # empties the response and batch caches (data_version.on_change)
+            # here rather than on the next request
+            data_version.invalidate()
+            data_version.current()
+        return applied
+
+    def stats(self):
+        return {
+            name: {
+                **self._stats[name],
+                "marks": {f.table: {"column": f.column, "mark": f.mark} for f in feeds},
+            }
+            for name, (feeds, _apply) in self._targets.items()
+        }
+
+
+refresh_engine = RefreshEngine()
@@ -0,0 +1,260 @@
+import os
+import threading
+
+import numpy as np
+from cachetools import LRUCache
+from sortedcontainers import SortedKeyList
+
+from db.authorship_index import added_rows, authorship_index, positions
+from db.field_index import field_index
+
+# Scopes (country, institution, field, ...) kept materialized per process
+MAX_SCOPES = int(os.getenv("LEADERBOARD_MAX_SCOPES", "512"))
+
+
+# --------------------------------------------------
+# One ranking: entity ids sorted by a metric, best first
+# --------------------------------------------------
+class Leaderboard:
+    """
+    Entity ids kept sorted by (metric desc, id desc). `values` is the
+    shared id → metric-tuple map for this metric; ids without a value
+    (null metric) are not ranked. top-k with an offset is a slice.
+    """
+
+    def __init__(self, members, values: dict):
+        self._values = values
+        self._list = SortedKeyList((m for m in members if m in values), key=self._key)
+
+    def _key(self, entity_id):
+        return tuple(-v for v in self._values[entity_id]) + (-entity_id,)
+
+    def slice(self, offset: int, k: int):
+        return list(self._list.islice(offset, offset + k))
+
+    def __len__(self):
+        return len(self._list)
+
+    # Callers discard *before* changing the value and add *after*
+    def discard(self, entity_id):
+        if entity_id in self._values:
+            self._list.discard(entity_id)
+
+    def add(self, entity_id):
+        if entity_id in self._values:
+            self._list.add(entity_id)
+
+
+# --------------------------------------------------
+# All rankings for one entity kind, per scope
+# --------------------------------------------------
+class Leaderboards:
+    """
+    Sorted rankings per scope and metric over the authorship index.
+
+    Scopes are ("global",) (every entity), ("authored",) (entities with
+    at least one authorship), ("country", id), ("institution", id),
+    ("field", name) and ("field_country", name, id). Each scope is built
+    on first use (one vectorized mask) and kept in an LRU. Every new
+    authorship index build is synced in the thread that made it, before
+    it is swapped in (see AuthorshipIndex.derive): when only metrics
+    changed, the changed entities are moved in every kept ranking instead
+    of re-sorting. Rows only added (incremental refresh) extend the kept
+    scopes the same way; any other membership change drops the scopes,
+    rebuilt lazily.
+    """
+
+    def __init__(self, kind: str, metrics: dict):
+        self.kind = kind            # "researcher" | "institution"
+        self.metrics = metrics      # metric name → attribute names on the columns
+        self._lock = threading.RLock()
+        self._subscribe_lock = threading.Lock()
+        self._subscribed = False
+        self._cols = None
+        self._values = {}
+        self._scopes = LRUCache(maxsize=MAX_SCOPES)
+
+    # ---------- column access ----------
+    def _ids(self, cols):
+        return cols.r_ids if self.kind == "researcher" else cols.i_ids
+
+    def _rows(self, cols):
+        return cols.r_rows if self.kind == "researcher" else cols.i_rows
+
+    def _metric_values(self, cols, metric, pos=None):
+        """id → metric tuple for the entities at `pos` (all by default) with a value."""
+        arrays = [getattr(cols, a) for a in self.metrics[metric]]
+        ids = self._ids(cols)
+        if pos is None:
+            pos = np.arange(len(ids))
+        # first component must be set; later ones rank nulls last
+        pos = pos[~np.isnan(arrays[0][pos])]
+        columns = [np.where(np.isnan(a[pos]), -np.inf, a[pos]).tolist() for a in arrays]
+        return dict(zip(ids[pos].tolist(), zip(*columns)))
+
+    def _changes(self, old, cols, metric):
+        """
+        {id: new metric tuple, or None when it has none} for the entities
+        whose metric differs between two builds.
+        """
+        ids, old_ids = self._ids(cols), self._ids(old)
+        before = positions(old_ids, ids)
+        differs = before < 0
+        if len(old_ids):
+            for attr in self.metrics[metric]:
+                new_values = getattr(cols, attr)
+                old_values = getattr(old, attr)[np.maximum(before, 0)]
+                differs |= ~((new_values == old_values) | (np.isnan(new_values) & np.isnan(old_values)))
+
+        pos = np.flatnonzero(differs)
+        changes = dict.fromkeys(ids[pos].tolist())
+        changes.update(self._metric_values(cols, metric, pos))
+        changes.update(dict.fromkeys(old_ids[positions(ids, old_ids) < 0].tolist()))
+        return changes
+
+    # ---------- scopes ----------
+    def _members(self, cols, scope, within=None):
+        """Entity ids of a scope; `within` limits the authorship rows looked at."""
+        kind = scope[0]
+        if kind == "global":
+            return set(int(i) for i in self._ids(cols))
+
+        if kind == "country" and self.kind == "institution":
+            return set(int(i) for i in self._ids(cols)[cols.country_institutions(scope[1])])
+
+        if kind == "authored":
+            mask = cols.mask()
+        elif kind == "country":
+            mask = cols.mask(country_id=scope[1])
+        elif kind == "institution":
+            mask = cols.mask(institution_id=scope[1])
+        elif kind == "field":
+            mask = cols.mask(article_ids=np.asarray(field_index.articles(scope[1]).to_array(), dtype=np.int64))
+        elif kind == "field_country":
+            articles = np.asarray(field_index.articles(scope[1]).to_array(), dtype=np.int64)
+            mask = cols.mask(article_ids=articles, country_id=scope[2])
+        else:
+            raise ValueError(f"unknown leaderboard scope {scope!r}")
+
+        if within is not None:
+            mask &= within
+
+        pos = cols.researchers_in(mask) if self.kind == "researcher" else cols.institutions_in(mask)
+        return set(int(i) for i in self._ids(cols)[pos])
+
+    def _scope(self, scope):
+        # Field scopes also follow the field index's own rebuilds
+        version = field_index.loaded_at if scope[0].startswith("field") else None
+        entry = self._scopes.get(scope)
+        if entry is None or entry["version"] != version:
+            entry = {"members": self._members(self._cols, scope), "boards": {}, "version": version}
+            self._scopes[scope] = entry
+        return entry
+
+    def _board(self, scope, metric):
+        entry = self._scope(scope)
+        board = entry["boards"].get(metric)
+        if board is None:
+            board = entry["boards"][metric] = Leaderboard(entry["members"], self._values[metric])
+        return board
+
+    # ---------- keeping in step with the authorship index ----------
+    def _subscribe(self):
+        # First use: from now on every authorship build is synced before
+        # it is swapped in, so requests never do it
+        if not self._subscribed:
+            with self._subscribe_lock:
+                if not self._subscribed:
+                    authorship_index.derive(self._sync)
+                    self._subscribed = True
+
+    def _sync(self, cols):
+        # Builds arrive one at a time (AuthorshipIndex serializes them);
+        # the lock is only held while rankings move, not while diffing.
+        old = self._cols
+        if cols is old:
+            return
+
+        same_members = (
+            old is not None
+            and np.array_equal(self._ids(old), self._ids(cols))
+            and np.array_equal(old.ids, cols.ids)
+            and np.array_equal(old.researcher, cols.researcher)
+            and np.array_equal(old.institution, cols.institution)
+        )
+        added = None if same_members or old is None else added_rows(old, cols)
+        if not same_members and added is None:
+            values = {m: self._metric_values(cols, m) for m in self.metrics}
+            with self._lock:
+                self._cols, self._values = cols, values
+                self._scopes.clear()
+            return
+
+        changes = {m: self._changes(old, cols, m) for m in self.metrics}
+        with self._lock:
+            self._cols = cols
+            for metric, changed in changes.items():
+                self.update(metric, changed)
+
+            if added is not None:
+                # Entities reached through the added rows join the kept scopes
+                for scope in list(self._scopes.keys()):
+                    entry = self._scopes[scope]
+                    joined = self._members(cols, scope, within=added) - entry["members"]
+                    entry["members"] = entry["members"] | joined
+                    for board in entry["boards"].values():
+                        for entity_id in joined:
+                            board.add(entity_id)
+
+    def update(self, metric: str, changes: dict):
+        """
+        Move the entities in `changes` (id → new metric tuple, or None
+        when it has none) in every kept ranking of `metric`.
+        """
+        with self._lock:
+            values = self._values.setdefault(metric, {})
+            changed = [i for i, v in changes.items() if values.get(i) != v]
+            if not changed:
+                return
+
+            boards = [
+                (entry["members"], entry["boards"][metric])
+                for entry in self._scopes.values()
+                if metric in entry["boards"]
+            ]
+            for entity_id in changed:
+                touched = [b for members, b in boards if entity_id in members]
+                for b in touched:
+                    b.discard(entity_id)
+                if changes[entity_id] is not None:
+                    values[entity_id] = changes[entity_id]
+                else:
+                    values.pop(entity_id, None)
+                for b in touched:
+                    b.add(entity_id)
+
+    # ---------- queries ----------
+    def top(self, scope, metric: str, k: int, offset: int = 0):
+        """Rows of the top k entities of `scope` by `metric`, after `offset`."""
+        self._subscribe()
+        with self._lock:
+            ids = self._board(tuple(scope), metric).slice(offset, k)
+            rows, all_ids = self._rows(self._cols), self._ids(self._cols)
+            return [rows[int(np.searchsorted(all_ids, i))] for i in ids]
+
+    def members(self, scope):
+        self._subscribe()
+        with self._lock:
+            return self._scope(tuple(scope))["members"]
+
+
+researcher_leaderboards = Leaderboards("researcher", {
+    "h_index": ["r_h"],
+    "rii": ["r_rii"],
+    "h_index_rii": ["r_h", "r_rii"],
+})
+
+institution_leaderboards = Leaderboards("institution", {
+    "average_h_index": ["i_h"],
+    "average_rii": ["i_rii"],
+})
@@ -0,0 +1,464 @@
+"""
+In-memory PostgREST stand-in.
+
+Serves the subset of the PostgREST read API our routes use (select with
+embedded resources, eq/neq/gt/gte/lt/lte/in/like/ilike/is filters, or=,
+order, limit/offset, Prefer: count=..., single-object responses) from
+plain Python rows, behind an httpx transport:
+
+    from db.supabase import set_transport
+    set_transport(LocalPostgrestTransport(tables))
+
+Used by the benchmark harness and by the local snapshot engine.
+"""
+import json
+import re
+from itertools import chain
+
+import httpx
+
+# (table, embedded table) → (foreign key column on `table`, to-one?)
+# To-one: table.fk = embedded.id. To-many: embedded.fk = table.id.
+RELATIONSHIPS = {
+    ("authorships", "articles"): ("article_id", True),
+    ("authorships", "researchers"): ("researcher_id", True),
+    ("authorships", "institution_info"): ("institution_id", True),
+    ("authorships", "country_info"): ("country_id", True),
+    ("institution_info", "country_info"): ("country_id", True),
+    ("articles", "authorships"): ("article_id", False),
+    ("researchers", "authorships"): ("researcher_id", False),
+    ("institution_info", "authorships"): ("institution_id", False),
+    ("country_info", "authorships"): ("country_id", False),
+}
+
+
+class PostgrestError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def key_columns(table: str):
+    """id and the foreign key columns of a table, indexed up front."""
+    columns = {"id"}
+    for (parent, embedded), (fk, to_one) in RELATIONSHIPS.items():
+        if (parent if to_one else embedded) == table:
+            columns.add(fk)
+    return columns
+
+
+# --------------------------------------------------
+# Table: rows + hash indexes (given columns up front, others on first use)
+# --------------------------------------------------
+class Table:
+    def __init__(self, rows, indexed=()):
+        self.rows = list(rows)
+        self._indexes = {}
+        self._types = {}
+        for column in indexed:
+            self.index(column)
+
+    def index(self, column: str):
+        """value → positions of the rows with that value in `column`, ascending."""
+        idx = self._indexes.get(column)
+        if idx is None:
+            idx = {}
+            for pos, r in enumerate(self.rows):
+                idx.setdefault(r.get(column), []).append(pos)
+            self._indexes[column] = idx
+        return idx
+
+    def lookup(self, column: str, values):
+        """Positions of the rows whose `column` is one of `values`, in table order."""
+        idx = self.index(column)
+        found = [idx.get(v, ()) for v in values]
+        if len(found) == 1:
+            return list(found[0])
+        return sorted(chain.from_iterable(found))
+
+    def coerce(self, column: str, raw: str):
+        """Turn a query-string value into the column's Python type."""
+        if raw == "null":
+            return None
+        kind = self._types.get(column)
+        if kind is None:
+            sample = next((r[column] for r in self.rows if r.get(column) is not None), "")
+            kind = self._types[column] = type(sample)
+        try:
+            if kind is bool:
+                return raw == "true"
+            if kind is int:
+                return int(raw) if re.fullmatch(r"-?\d+", raw) else float(raw)
+            if kind is float:
+                return float(raw)
+        except ValueError:
+            pass
+        return raw
+
+
+# --------------------------------------------------
+# Parsing helpers
+# --------------------------------------------------
+def split_top_level(text: str, sep: str = ","):
+    """Split on `sep` outside parentheses and double quotes."""
+    parts, depth, quoted, current = [], 0, False, ""
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == sep and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+    if current:
+        parts.append(current)
+    return parts
+
+
+def parse_select(text: str):
+    """
+    'id,researchers!inner(id,full_name)' →
+        [("id", None), ("researchers", {"inner": True, "columns": [...]})]
+    """
+    items = []
+    for part in split_top_level(re.sub(r"\s+", "", text or "*")):
+        if "(" in part:
+            head, inner = part.split("(", 1)
+            alias = None
+            if ":" in head:
+                alias, head = head.split(":", 1)
+            name, _, hint = head.partition("!")
+            items.append((name, {
+                "alias": alias or name,
+                "inner": hint == "inner",
+                "columns": parse_select(inner[:-1]),
+            }))
+        else:
+            alias = None
+            if ":" in part:
+                alias, part = part.split(":", 1)
+            items.append((part, {"alias": alias or part} if alias else None))
+    return items
+
+
+def _strip_quotes(v: str):
+    return v[1:-1] if len(v) >= 2 and v[0] == v[-1] == '"' else v
+
+
+def _like_regex(pattern: str, flags=0):
+    out = ""
+    for ch in pattern:
+        if ch in "%*":
+            out += ".*"
+        elif ch == "_":
+            out += "."
+        else:
+            out += re.escape(ch)
+    return re.compile(f"^{out}$", flags | re.DOTALL)
+
+
+def _compare(op: str, cell, value):
+    if op == "is":
+        if value is None:
+            return cell is None
+        return cell is value
+    if cell is None:
+        return False  # NULL compares as unknown in Postgres
+    if op == "eq":
+        return cell == value
+    if op == "neq":
+        return cell != value
+    try:
+        if op == "gt":
+            return cell > value
+        if op == "gte":
+            return cell >= value
+        if op == "lt":
+            return cell < value
+        if op == "lte":
+            return cell <= value
+    except TypeError:
+        return False
+    raise PostgrestError(400, "PGRST100", f"unsupported operator {op}")
+
+
+# --------------------------------------------------
+# Filters: one predicate per (column, "op.value") pair
+# --------------------------------------------------
+def make_filter(table: Table, column: str, expr: str):
+    negate = expr.startswith("not.")
+    if negate:
+        expr = expr[4:]
+    op, _, raw = expr.partition(".")
+
+    if op == "in":
+        values = {table.coerce(column, _strip_quotes(v)) for v in split_top_level(raw.strip("()"))}
+
+        def pred(row):
+            return row.get(column) in values
+    elif op in ("like", "ilike"):
+        regex = _like_regex(raw, re.IGNORECASE if op == "ilike" else 0)
+
+        def pred(row):
+            cell = row.get(column)
+            return cell is not None and bool(regex.match(str(cell)))
+    elif op == "is":
+        value = {"null": None, "true": True, "false": False}.get(raw.lower(), raw)
+
+        def pred(row):
+            return _compare("is", row.get(column), value)
+    else:
+        value = table.coerce(column, _strip_quotes(raw))
+
+        def pred(row):
+            return _compare(op, row.get(column), value)
+
+    if negate:
+        return lambda row: not pred(row)
+    return pred
+
+
+def index_values(table: Table, column: str, expr: str):
+    """
+    Values an eq/in filter matches, so rows can be found through the
+    column's index; None for any other filter.
+    """
+    op, _, raw = expr.partition(".")
+    if op == "eq":
+        values = {table.coerce(column, _strip_quotes(raw))}
+    elif op == "in":
+        values = {table.coerce(column, _strip_quotes(v)) for v in split_top_level(raw.strip("()"))}
+    else:
+        return None
+    # NULL never equals anything
+    values.discard(None)
+    return values
+
+
+def make_logic_filter(table: Table, kind: str, body: str):
+    """or=(a.eq.1,and(b.gt.2,c.is.null))"""
+    preds = []
+    for part in split_top_level(body.strip()[1:-1]):
+        if part.startswith(("and(", "or(")):
+            sub_kind, _, rest = part.partition("(")
+            preds.append(make_logic_filter(table, sub_kind, "(" + rest))
+        else:
+            column, _, expr = part.partition(".")
+            preds.append(make_filter(table, column, expr))
+
+    if kind == "or":
+        return lambda row: any(p(row) for p in preds)
+    return lambda row: all(p(row) for p in preds)
+
+
+def _sort_key(column, desc, nulls_first):
+    def key(row):
+        v = row.get(column)
+        # None sorts first/last regardless of direction
+        if v is None:
+            return (0 if nulls_first != desc else 1, 0)
+        return (1 if nulls_first != desc else 0, v)
+    return key
+
+
+def apply_order(rows, order: str):
+    # Stable sorts applied from the last key to the first
+    for term in reversed(order.split(",")):
+        parts = term.split(".")
+        column = parts[0]
+        desc = "desc" in parts[1:]
+        if "nullsfirst" in parts[1:]:
+            nulls_first = True
+        elif "nullslast" in parts[1:]:
+            nulls_first = False
+        else:
+            nulls_first = desc  # Postgres default
+        rows.sort(key=_sort_key(column, desc, nulls_first), reverse=desc)
+    return rows
+
+
+# --------------------------------------------------
+# Query engine
+# --------------------------------------------------
+class LocalPostgrest:
+    def __init__(self, tables: dict):
+        self.tables = {
+            name: t if isinstance(t, Table) else Table(t, key_columns(name))
+            for name, t in tables.items()
+        }
+
+    def table(self, name: str):
+        t = self.tables.get(name)
+        if t is None:
+            raise PostgrestError(404, "PGRST205", f"table {name} not found")
+        return t
+
+    def _embed(self, parent: str, rows, name: str, spec: dict, filters):
+        rel = RELATIONSHIPS.get((parent, name))
+        if rel is None:
+            raise PostgrestError(400, "PGRST200", f"no relationship {parent} → {name}")
+        fk, to_one = rel
+        child = self.table(name)
+        preds = [make_filter(child, col, expr) for col, expr in filters]
+
+        index = child.index("id" if to_one else fk)
+        out = []
+        for row in rows:
+            match = [child.rows[p] for p in index.get(row.get(fk if to_one else "id"), ())]
+            match = [m for m in match if all(p(m) for p in preds)]
+            if spec["inner"] and not match:
+                continue
+            out.append((row, match[0] if to_one and match else (None if to_one else match)))
+        return out
+
+    def _embedding_rows(self, parent: str, name: str, filters):
+        """
+        Positions of the `parent` rows an inner embed of `name` can keep,
+        found from the child rows matching the filters through the key
+        indexes; None when no filter can use an index.
+        """
+        fk, to_one = RELATIONSHIPS[(parent, name)]
+        child = self.table(name)
+        found = [
+            child.lookup(col, values)
+            for col, expr in filters
+            if (values := index_values(child, col, expr)) is not None
+        ]
+        if not found:
+            return None
+        preds = [make_filter(child, col, expr) for col, expr in filters]
+        matches = [m for m in (child.rows[p] for p in min(found, key=len)) if all(p(m) for p in preds)]
+
+        keys = {m.get("id" if to_one else fk) for m in matches}
+        keys.discard(None)
+        return self.table(parent).lookup(fk if to_one else "id", keys)
+
+    def _project(self, table: str, row, select, embedded):
+        out = {}
+        for name, spec in select:
+            if spec is None or "columns" not in spec:
+                if name == "*":
+                    out.update(row)
+                else:
+                    out[spec["alias"] if spec else name] = row.get(name)
+                continue
+            value = embedded[name].get(id(row))
+            sub_select = spec["columns"]
+            if isinstance(value, list):
+                out[spec["alias"]] = [self._project(name, v, sub_select, {}) for v in value]
+            else:
+                out[spec["alias"]] = self._project(name, value, sub_select, {}) if value else None
+        return out
+
+    def query(self, name: str, params):
+        """
+        Run one GET. `params` is a list of (key, value) pairs as sent on
+        the query string. Returns (rows, total) where total is the
+        filtered row count before limit/offset.
+        """
+        table = self.table(name)
+        select = parse_select(dict(params).get("select", "*"))
+        embeds = {n: s for n, s in select if s and "columns" in s}
+
+        found = []  # row positions from index lookups
+        preds = []
+        embed_filters = {n: [] for n in embeds}
+        order = limit = None
+        offset = 0
+        for key, value in params:
+            if key == "order":
+                order = value
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            elif key in ("or", "and"):
+                preds.append(make_logic_filter(table, key, value))
+            elif key == "select" or key.endswith((".order", ".limit", ".offset")):
+                continue
+            elif "." in key and key.split(".", 1)[0] in embeds:
+                emb, col = key.split(".", 1)
+                embed_filters[emb].append((col, value))
+            else:
+                preds.append(make_filter(table, key, value))
+                values = index_values(table, key, value)
+                if values is not None:
+                    found.append(table.lookup(key, values))
+
+        # Inner embeds with a filter on the embedded table limit the rows too
+        for emb, spec in embeds.items():
+            if spec["inner"] and embed_filters[emb] and (name, emb) in RELATIONSHIPS:
+                positions = self._embedding_rows(name, emb, embed_filters[emb])
+                if positions is not None:
+                    found.append(positions)
+
+        # Scan only the rows of the most selective lookup (every filter
+        # is still checked on them)
+        rows = [table.rows[p] for p in min(found, key=len)] if found else table.rows
+        rows = [r for r in rows if all(p(r) for p in preds)]
+
+        embedded = {}
+        for emb, spec in embeds.items():
+            pairs = self._embed(name, rows, emb, spec, embed_filters[emb])
+            rows = [row for row, _ in pairs]
+            embedded[emb] = {id(row): value for row, value in pairs}
+
+        if order:
+            rows = apply_order(list(rows), order)
+
+        total = len(rows)
+        rows = rows[offset:offset + limit] if limit is not None else rows[offset:]
+        return [self._project(name, r, select, embedded) for r in rows], total
+
+
+# --------------------------------------------------
+# httpx transport
+# --------------------------------------------------
+class LocalPostgrestTransport(httpx.BaseTransport):
+    """Answers PostgREST GETs from a LocalPostgrest engine, no network."""
+
+    def __init__(self, engine):
+        self.engine = engine if isinstance(engine, LocalPostgrest) else LocalPostgrest(engine)
+
+    def _json(self, status, body, headers=None):
+        return httpx.Response(
+            status,
+            content=json.dumps(body, default=str).encode(),
+            headers={"Content-Type": "application/json", **(headers or {})},
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method not in ("GET", "HEAD"):
+            return self._json(405, {"code": "PGRST105", "message": "read-only stand-in"})
+
+        name = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+        prefer = request.headers.get("prefer", "")
+        try:
+            rows, total = self.engine.query(name, list(request.url.params.multi_items()))
+        except PostgrestError as e:
+            return self._json(e.status, {"code": e.code, "message": e.message, "details": None, "hint": None})
+
+        offset = int(request.url.params.get("offset", 0))
+        end = offset + len(rows) - 1
+        count = str(total) if "count=" in prefer else "*"
+        headers = {"Content-Range": f"{offset}-{end}/{count}" if rows else f"*/{count}"}
+
+        if request.headers.get("accept", "").startswith("application/vnd.pgrst.object+json"):
+            if len(rows) != 1:
+                return self._json(406, {
+                    "code": "PGRST116",
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "details": f"The result contains {len(rows)} rows",
+                    "hint": None,
+                })
+            return self._json(200, rows[0], headers)
+
+        if request.method == "HEAD":
+            return httpx.Response(200, headers=headers)
+        return self._json(200, rows, headers)
@@ -0,0 +1,172 @@
+import bisect
+import contextvars
+import threading
+import time
+
+import httpx
+
+# Stats for the Flask request currently being served (None outside requests)
+_current = contextvars.ContextVar("upstream_stats", default=None)
+
+
+# --------------------------------------------------
+# Per-request upstream accounting
+# --------------------------------------------------
+class UpstreamStats:
+    __slots__ = ("calls", "seconds", "bytes", "_lock")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, nbytes: int):
+        # fan_out threads report into the same object
+        with self._lock:
+            self.calls += 1
+            self.seconds += seconds
+            self.bytes += nbytes
+
+
+def start_request():
+    stats = UpstreamStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Token from another context (e.g. a streamed body finished elsewhere)
+        _current.set(None)
+
+
+def current_stats():
+    return _current.get()
+
+
+class AccountingTransport(httpx.BaseTransport):
+    """Wraps the PostgREST transport and charges each call to the current request."""
+
+    def __init__(self, inner: httpx.BaseTransport):
+        self.inner = inner
+
+    def handle_request(self, request):
+        start = time.perf_counter()
+        response = self.inner.handle_request(request)
+        body = response.read()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(time.perf_counter() - start, len(body))
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+class AsyncAccountingTransport(httpx.AsyncBaseTransport):
+    """Same accounting for the asyncio client (asgi.py)."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self.inner = inner
+
+    async def handle_async_request(self, request):
+        start = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        body = await response.aread()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(time.perf_counter() - start, len(body))
+        return response
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+# --------------------------------------------------
+# Prometheus-style histograms, labelled by route
+# --------------------------------------------------
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = list(buckets)
+        self._lock = threading.Lock()
+        # route → [bucket counts..., +Inf count], sum
+        self._series = {}
+
+    def observe(self, route: str, value: float):
+        with self._lock:
+            counts, total = self._series.get(route, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._series[route] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {r: (list(c), s) for r, (c, s) in self._series.items()}
+        for route in sorted(series):
+            counts, total = series[route]
+            label = route.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for le, n in zip(self.buckets + ["+Inf"], counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{route="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{route="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{route="{label}"}} {cumulative}')
+        return "\n".join(lines)
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time spent serving the request.",
+    [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+)
+UPSTREAM_CALLS = Histogram(
+    "upstream_calls_per_request", "PostgREST calls made by one request.",
+    [0, 1, 2, 4, 8, 16, 32, 64, 128],
+)
+UPSTREAM_SECONDS = Histogram(
+    "upstream_seconds_per_request", "Summed PostgREST call time of one request.",
+    [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+)
+UPSTREAM_BYTES = Histogram(
+    "upstream_bytes_per_request", "PostgREST response bytes read by one request.",
+    [1e3, 1e4, 1e5, 1e6, 1e7, 1e8],
+)
+SINGLEFLIGHT_WAITERS = Histogram(
+    "singleflight_waiters", "Callers that shared one coalesced computation (route or upstream table).",
+    [0, 1, 2, 4, 8, 16, 32, 64],
+)
+
+HISTOGRAMS = [REQUEST_SECONDS, UPSTREAM_CALLS, UPSTREAM_SECONDS, UPSTREAM_BYTES, SINGLEFLIGHT_WAITERS]
+
+
+# Not observed: the scrape itself
+UNOBSERVED_ROUTES = ("/metrics",)
+
+
+def observe(route: str, elapsed: float, stats: UpstreamStats):
+    REQUEST_SECONDS.observe(route, elapsed)
+    UPSTREAM_CALLS.observe(route, stats.calls)
+    UPSTREAM_SECONDS.observe(route, stats.seconds)
+    UPSTREAM_BYTES.observe(route, stats.bytes)
+
+
+def render_metrics():
+    return "\n\n".join(h.render() for h in HISTOGRAMS) + "\n"
+
+
+def server_timing(elapsed: float, stats: UpstreamStats):
+    """Server-Timing header value: total time plus upstream calls/time/bytes."""
+    return (
+        f'upstream;dur={stats.seconds * 1000:.1f};desc="{stats.calls} calls, {stats.bytes} bytes", '
+        f"total;dur={elapsed * 1000:.1f}"
+    )
+
+
+def finish_request(route: str, elapsed: float, stats: UpstreamStats):
+    """Observe a finished request (unless its route is unobserved); returns its Server-Timing value."""
+    if route not in UNOBSERVED_ROUTES:
+        observe(route, elapsed, stats)
+    return server_timing(elapsed, stats)
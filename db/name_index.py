@@ -0,0 +1,284 @@
+import bisect
+import os
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+from pyroaring import BitMap
+
+from db.background import start_refresher
+from db.data_version import data_version, fingerprint
+from db.streaming import iter_rows
+
+REFRESH_SECONDS = float(os.getenv("NAME_INDEX_REFRESH_SECONDS", "300"))
+# Fuzzy matching only ranks this many trigram candidates
+FUZZY_CANDIDATES = 200
+
+_WORD = re.compile(r"\w+")
+
+
+# --------------------------------------------------
+# Helper: normalize a name for matching
+# --------------------------------------------------
+def normalize_name(name: str):
+    """
+    'Amélie  Dupont-Roy' → 'amelie dupont-roy'
+    (case-folded, accents stripped, whitespace collapsed)
+    """
+    if not name:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# --------------------------------------------------
+# Helper: edit distance from q to the closest prefix of target
+# --------------------------------------------------
+def prefix_distance(q: str, target: str, max_edits: int):
+    """
+    Levenshtein distance between q and the best prefix of target, so a
+    half-typed name with a typo still matches. Returns max_edits + 1 as
+    soon as no prefix can get within max_edits.
+    """
+    target = target[:len(q) + max_edits]
+    prev = list(range(len(target) + 1))
+    for i, qc in enumerate(q, 1):
+        cur = [i]
+        for j, tc in enumerate(target, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (qc != tc)))
+        if min(cur) > max_edits:
+            return max_edits + 1
+        prev = cur
+    return min(prev[max(0, len(q) - max_edits):])
+
+
+# --------------------------------------------------
+# One build of the index
+# --------------------------------------------------
+class NameData:
+    """
+    Everything is addressed by rank: the position of a researcher in the
+    list sorted by normalized name, so "sort by name" is "sort by rank".
+
+        keys / rows          – normalized names and (id, full_name), by rank
+        token_keys / _ranks  – every word of every name, sorted; a prefix
+                               search is a bisect (a flattened trie)
+        grams                – trigram → BitMap of ranks, for substring
+                               and typo-tolerant lookups
+        blob / offsets       – names joined by "\\n", for 1–2 char substrings
+    """
+
+    def __init__(self, researchers):
+        entries = sorted(
+            (normalize_name(r.get("full_name")), r["id"], r.get("full_name"))
+            for r in researchers
+            if r.get("full_name")
+        )
+        self.keys = [key for key, _, _ in entries]
+        self.rows = [(rid, name) for _, rid, name in entries]
+
+        tokens = []
+        grams: dict[str, BitMap] = {}
+        offsets = []
+        pos = 0
+        for rank, key in enumerate(self.keys):
+            tokens.extend((m.group(), rank) for m in _WORD.finditer(key))
+            for g in trigrams(key):
+                bm = grams.get(g)
+                if bm is None:
+                    bm = grams[g] = BitMap()
+                bm.add(rank)
+            offsets.append(pos)
+            pos += len(key) + 1
+        tokens.sort()
+
+        for bm in grams.values():
+            bm.run_optimize()
+
+        self.token_keys = [t for t, _ in tokens]
+        self.token_ranks = [r for _, r in tokens]
+        self.grams = grams
+        self.blob = "\n".join(self.keys)
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.keys)
+
+    # ---------- match tiers, each in rank order ----------
+    def name_prefix(self, q: str, limit: int):
+        start = bisect.bisect_left(self.keys, q)
+        end = bisect.bisect_left(self.keys, q + "\U0010ffff", lo=start)
+        return range(start, min(end, start + limit))
+
+    def word_prefix(self, q: str, limit: int):
+        start = bisect.bisect_left(self.token_keys, q)
+        end = bisect.bisect_left(self.token_keys, q + "\U0010ffff", lo=start)
+        # ordered by matched word, then name; a name can match twice
+        return self.token_ranks[start:end][:limit * 2]
+
+    def substring(self, q: str, limit: int):
+        if len(q) < 3:
+            found = []
+            pos = self.blob.find(q)
+            while pos != -1 and len(found) < limit:
+                rank = bisect.bisect_right(self.offsets, pos) - 1
+                found.append(rank)
+                pos = self.blob.find(q, self.offsets[rank] + len(self.keys[rank]) + 1)
+            return found
+
+        bitmaps = [self.grams.get(g) for g in trigrams(q)]
+        if any(bm is None for bm in bitmaps):
+            return []
+        candidates = BitMap.intersection(*bitmaps)
+        found = []
+        for rank in candidates:
+            if q in self.keys[rank]:
+                found.append(rank)
+                if len(found) == limit:
+                    break
+        return found
+
+    def _gram_counts(self, grams, within):
+        """rank → how many of `grams` the name has, for ranks in `within` (others 0)."""
+        found = [np.asarray((self.grams[g] & within).to_array(), dtype=np.int64) for g in grams]
+        return np.bincount(np.concatenate(found), minlength=len(self.keys))
+
+    def fuzzy(self, q: str, limit: int):
+        q_grams = [g for g in trigrams(q) if g in self.grams]
+        if len(q) < 4 or not q_grams:
+            return []
+
+        max_edits = 1 if len(q) <= 6 else 2
+        # One edit breaks at most three trigrams of q
+        needed = max(1, len(trigrams(q)) - 3 * max_edits)
+        if len(q_grams) < needed:
+            return []
+
+        # A name sharing `needed` of the grams has at least one of the
+        # len - needed + 1 rarest ones: only those names are counted
+        q_grams.sort(key=lambda g: len(self.grams[g]))
+        seeds = BitMap.union(*(self.grams[g] for g in q_grams[:len(q_grams) - needed + 1]))
+
+        # Shared grams per candidate; the FUZZY_CANDIDATES best are scored
+        counts = self._gram_counts(q_grams, seeds)
+        ranks = np.flatnonzero(counts >= needed)
+        if len(ranks) > FUZZY_CANDIDATES:
+            ranks = ranks[np.argpartition(-counts[ranks], FUZZY_CANDIDATES - 1)[:FUZZY_CANDIDATES]]
+        ranks = ranks[np.lexsort((ranks, -counts[ranks]))]
+
+        # Each missing gram is at least a third of an edit, so once enough
+        # names are as close as the next one could be, stop
+        total = len(trigrams(q))
+        window = len(q) + max_edits
+        q_chars = set(q)
+        distances = {}
+        scored = []
+        for rank, count in zip(ranks.tolist(), counts[ranks].tolist()):
+            bound = -(-(total - count) // 3)
+            if len(scored) >= limit and sorted(d for d, _ in scored)[limit - 1] <= bound:
+                break
+            key = self.keys[rank]
+            distance = max_edits + 1
+            # match against the whole name or starting at any of its words
+            for m in _WORD.finditer(key):
+                target = key[m.start():m.start() + window]
+                d = distances.get(target)
+                if d is None:
+                    # each character of q missing from the target costs an edit
+                    if len(target) < len(q) - max_edits or len(q_chars.difference(target)) > max_edits:
+                        d = max_edits + 1
+                    else:
+                        d = prefix_distance(q, target, max_edits)
+                    distances[target] = d
+                distance = min(distance, d)
+                if distance == bound:
+                    break
+            if distance <= max_edits:
+                scored.append((distance, rank))
+        scored.sort()
+        return [rank for _, rank in scored[:limit]]
+
+
+# --------------------------------------------------
+# Researcher name index (one per process)
+# --------------------------------------------------
+class NameIndex:
+    """
+    In-memory autocomplete over researchers.full_name.
+
+    search() ranks name prefixes first, then word prefixes ("garc" →
+    "Leila Garcia"), then substrings, then names within one or two typos.
+    Built on first use in each worker and rebuilt every REFRESH_SECONDS
+    in the background, like the field index.
+    """
+
+    def __init__(self, refresh_seconds: float = REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.loaded_at = None
+        # Content fingerprint of the current build, part of the data version
+        self.generation = None
+        self._lock = threading.Lock()
+        self._pid = None
+        self._data = NameData([])
+        data_version.track("name-index", lambda: self.generation)
+
+    def refresh(self):
+        data = NameData(iter_rows("researchers", "id,full_name"))
+        self._data = data
+        self.loaded_at = time.time()
+
+        generation = fingerprint(data.rows)
+        if generation != self.generation:
+            self.generation = generation
+            data_version.invalidate()
+
+    def _ensure_loaded(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self.refresh()
+            self._pid = pid
+            start_refresher("name-index", self.refresh_seconds, self.refresh)
+
+    def count(self):
+        self._ensure_loaded()
+        return len(self._data)
+
+    def search(self, q: str, limit: int = 10, fuzzy: bool = True):
+        """[{"id", "full_name"}, ...] best matches for q, at most limit."""
+        self._ensure_loaded()
+        data = self._data
+        q = normalize_name(q)
+        if not q:
+            return []
+
+        tiers = [data.name_prefix, data.word_prefix, data.substring]
+        if fuzzy:
+            tiers.append(data.fuzzy)
+
+        seen = set()
+        result = []
+        for tier in tiers:
+            for rank in tier(q, limit):
+                if rank not in seen:
+                    seen.add(rank)
+                    result.append(rank)
+                    if len(result) == limit:
+                        break
+            if len(result) == limit:
+                break
+
+        return [{"id": data.rows[r][0], "full_name": data.rows[r][1]} for r in result]
+
+
+researcher_name_index = NameIndex()
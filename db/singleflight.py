@@ -0,0 +1,246 @@
+import asyncio
+import os
+import threading
+from collections import Counter
+from functools import wraps
+
+import httpx
+from flask import request, make_response
+
+from db.cache import cache_key
+from db.metrics import SINGLEFLIGHT_WAITERS
+
+ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Route rules to leave uncoalesced, e.g. "/analytics,/api/field/overview"
+DISABLED_ROUTES = {r.strip() for r in os.getenv("SINGLEFLIGHT_DISABLED_ROUTES", "").split(",") if r.strip()}
+
+# Upstream response headers that no longer apply once the body is read
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+# --------------------------------------------------
+# One in-flight computation
+# --------------------------------------------------
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+# --------------------------------------------------
+# Single-flight group: one computation per key at a time
+# --------------------------------------------------
+class SingleFlight:
+    """
+    Concurrent do(key, fn) calls with the same key share one run of fn:
+    the first caller (the leader) runs it, later callers block until it
+    finishes and get the same result, or the same exception.
+    Nothing is kept once the call is done; that is the response cache's
+    job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = Counter()
+        self.shared = Counter()
+
+    def do(self, key, fn, label: str = ""):
+        """(result, waiters): waiters is how many callers shared this run."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared[label] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions[label] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, call.waiters
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            # no one can join any more, so the count is final
+            SINGLEFLIGHT_WAITERS.observe(label, call.waiters)
+            call.done.set()
+        return call.result, call.waiters
+
+    def stats(self):
+        with self._lock:
+            labels = sorted(set(self.executions) | set(self.shared))
+            return {
+                "in_flight": len(self._calls),
+                "routes": {
+                    label: {"executions": self.executions[label], "shared": self.shared[label]}
+                    for label in labels
+                },
+            }
+
+
+class AsyncSingleFlight(SingleFlight):
+    """SingleFlight for coroutines, within one event loop (asgi.py)."""
+
+    async def do(self, key, fn, label: str = ""):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared[label] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                call.done = asyncio.get_running_loop().create_future()
+                self.executions[label] += 1
+                leader = True
+
+        if not leader:
+            # shield: a cancelled waiter must not cancel the shared future
+            await asyncio.shield(call.done)
+            if call.error is not None:
+                raise call.error
+            return call.result, call.waiters
+
+        try:
+            call.result = await fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            SINGLEFLIGHT_WAITERS.observe(label, call.waiters)
+            call.done.set_result(None)
+        return call.result, call.waiters
+
+
+# Identical Flask requests, and identical upstream queries
+request_flights = SingleFlight()
+upstream_flights = SingleFlight()
+# The same for the asyncio entry point
+async_request_flights = AsyncSingleFlight()
+async_upstream_flights = AsyncSingleFlight()
+
+
+# --------------------------------------------------
+# Decorator: coalesce identical concurrent requests to a view
+# --------------------------------------------------
+def coalesced(view):
+    """
+    Requests with the same path and normalized query args that arrive
+    while one is being computed wait for it and get a copy of its
+    response. Goes under @cached, so only cache misses coalesce.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        route = request.url_rule.rule if request.url_rule else request.path
+        if not ENABLED or route in DISABLED_ROUTES:
+            return view(*args, **kwargs)
+
+        own = {}
+
+        def compute():
+            response = own["response"] = make_response(view(*args, **kwargs))
+            if response.is_streamed:
+                # a stream can only be consumed once
+                return None
+            return response.get_data(), response.status_code, list(response.headers.items())
+
+        shared, waiters = request_flights.do(cache_key(), compute, route)
+        if "response" in own:
+            response = own["response"]
+        elif shared is None:
+            response = make_response(view(*args, **kwargs))
+        else:
+            body, status, headers = shared
+            response = make_response(body, status, headers)
+        response.headers["X-Coalesced-Waiters"] = str(waiters)
+        return response
+
+    # asgi.py coalesces the route's async handler as well
+    wrapper.coalesced = True
+    return wrapper
+
+
+# --------------------------------------------------
+# Transport: coalesce identical concurrent PostgREST reads
+# --------------------------------------------------
+def _flight_key(request):
+    return (
+        str(request.url),
+        request.headers.get("accept"),
+        request.headers.get("prefer"),
+        request.headers.get("range"),
+    )
+
+
+def _flight_label(request):
+    return "upstream:" + request.url.path.rsplit("/", 1)[-1]
+
+
+def _snapshot(response, body):
+    headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _HOP_HEADERS]
+    return response.status_code, headers, body
+
+
+class CoalescingTransport(httpx.BaseTransport):
+    """
+    Concurrent GETs with the same URL and the same Accept / Prefer /
+    Range headers go upstream once. Each caller gets its own copy of
+    the response.
+    """
+
+    def __init__(self, inner: httpx.BaseTransport):
+        self.inner = inner
+
+    def handle_request(self, request):
+        if request.method != "GET":
+            return self.inner.handle_request(request)
+
+        def fetch():
+            response = self.inner.handle_request(request)
+            return _snapshot(response, response.read())
+
+        (status, headers, body), _ = upstream_flights.do(_flight_key(request), fetch, _flight_label(request))
+        return httpx.Response(status, headers=headers, content=body, request=request)
+
+    def close(self):
+        self.inner.close()
+
+
+class AsyncCoalescingTransport(httpx.AsyncBaseTransport):
+    """CoalescingTransport for the asyncio client."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self.inner = inner
+
+    async def handle_async_request(self, request):
+        if request.method != "GET":
+            return await self.inner.handle_async_request(request)
+
+        async def fetch():
+            response = await self.inner.handle_async_request(request)
+            return _snapshot(response, await response.aread())
+
+        (status, headers, body), _ = await async_upstream_flights.do(
+            _flight_key(request), fetch, _flight_label(request)
+        )
+        return httpx.Response(status, headers=headers, content=body, request=request)
+
+    async def aclose(self):
+        await self.inner.aclose()
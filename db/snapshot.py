@@ -0,0 +1,182 @@
+"""
+Local columnar snapshot of the core tables.
+
+    python -m db.snapshot sync [--target DIR]
+
+copies articles, authorships, researchers, institution_info and
+country_info from Supabase into SUPABASE_SNAPSHOT_DIR (any fsspec URL:
+a local path, s3://..., gs://...). Each table is stored column by
+column, one gzipped JSON array per column, under a versioned directory;
+a CURRENT file is switched to the new version only once every table has
+been written, so readers never see a half-synced snapshot.
+
+With SUPABASE_READ_SNAPSHOT=1 the app's PostgREST client reads from the
+snapshot through db.local_postgrest instead of the network, and only the
+sync talks to the database.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import fsspec
+
+from db.background import start_refresher
+from db.data_version import bump
+from db.local_postgrest import LocalPostgrest, LocalPostgrestTransport
+
+TABLES = ["articles", "authorships", "researchers", "institution_info", "country_info"]
+PAGE_SIZE = 1000
+RELOAD_SECONDS = 30
+
+
+# --------------------------------------------------
+# Helper: rows ↔ columns
+# --------------------------------------------------
+def to_columns(rows):
+    names = []
+    for r in rows:
+        for k in r:
+            if k not in names:
+                names.append(k)
+    return {name: [r.get(name) for r in rows] for name in names}
+
+
+def to_rows(columns):
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(columns[n] for n in names))]
+
+
+# --------------------------------------------------
+# Sync: Supabase → versioned columnar files
+# --------------------------------------------------
+def _fetch_table(client, table: str):
+    rows = []
+    last_id = None
+    while True:
+        query = client.table(table).select("*").order("id").limit(PAGE_SIZE)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        page = query.execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        last_id = page[-1]["id"]
+
+
+def _write_json(fs, path: str, obj, compression=None):
+    with fs.open(path, "wb", compression=compression) as f:
+        f.write(json.dumps(obj, default=str, separators=(",", ":")).encode())
+
+
+def _read_json(fs, path: str, compression=None):
+    with fs.open(path, "rb", compression=compression) as f:
+        return json.loads(f.read())
+
+
+def sync(target: str, tables=TABLES):
+    """Copy every table into a new snapshot version; returns its name."""
+    from db.supabase import make_client, make_http_transport
+
+    # Always the remote database, even if this process reads the snapshot
+    client = make_client(make_http_transport())
+    fs, root = fsspec.core.url_to_fs(target)
+    version = f"v{int(time.time() * 1000)}"
+
+    meta = {"version": version, "synced_at": time.time(), "tables": {}}
+    for table in tables:
+        columns = to_columns(_fetch_table(client, table))
+        base = f"{root}/{version}/{table}"
+        fs.makedirs(base, exist_ok=True)
+        for name, values in columns.items():
+            _write_json(fs, f"{base}/{name}.json.gz", values, compression="gzip")
+        meta["tables"][table] = {
+            "columns": list(columns),
+            "rows": len(next(iter(columns.values()), [])),
+        }
+
+    _write_json(fs, f"{root}/{version}/_meta.json", meta)
+    # Commit point: readers switch over only after this write
+    _write_json(fs, f"{root}/CURRENT", {"version": version})
+    bump()
+    return version
+
+
+# --------------------------------------------------
+# Read side
+# --------------------------------------------------
+def current_version(source: str):
+    fs, root = fsspec.core.url_to_fs(source)
+    try:
+        return _read_json(fs, f"{root}/CURRENT")["version"]
+    except FileNotFoundError:
+        return None
+
+
+def load(source: str, version: str | None = None):
+    """table name → list of row dicts for one snapshot version."""
+    fs, root = fsspec.core.url_to_fs(source)
+    version = version or current_version(source)
+    if version is None:
+        raise FileNotFoundError(f"no snapshot in {source}; run `python -m db.snapshot sync` first")
+
+    meta = _read_json(fs, f"{root}/{version}/_meta.json")
+    tables = {}
+    for table, info in meta["tables"].items():
+        columns = {
+            name: _read_json(fs, f"{root}/{version}/{table}/{name}.json.gz", compression="gzip")
+            for name in info["columns"]
+        }
+        tables[table] = to_rows(columns)
+    return tables
+
+
+class SnapshotTransport(LocalPostgrestTransport):
+    """
+    PostgREST transport backed by the newest snapshot version. A new
+    version is loaded (checked every RELOAD_SECONDS) in a background
+    thread of each worker and swapped in, without a restart; requests
+    keep being served from the previous one meanwhile.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.version = current_version(source)
+        self._lock = threading.Lock()
+        self._pid = None
+        super().__init__(LocalPostgrest(load(source, self.version)))
+
+    def reload(self):
+        version = current_version(self.source)
+        if version and version != self.version:
+            self.engine = LocalPostgrest(load(self.source, version))
+            self.version = version
+
+    def _ensure_refresher(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            start_refresher("snapshot", RELOAD_SECONDS, self.reload)
+
+    def handle_request(self, request):
+        self._ensure_refresher()
+        return super().handle_request(request)
+
+
+if __name__ == "__main__":
+    from db.supabase import SNAPSHOT_DIR
+
+    parser = argparse.ArgumentParser(description="Snapshot the core tables into columnar files.")
+    parser.add_argument("command", choices=["sync"])
+    parser.add_argument("--target", default=SNAPSHOT_DIR, help="fsspec URL (default: SUPABASE_SNAPSHOT_DIR)")
+    args = parser.parse_args()
+    if not args.target:
+        parser.error("set SUPABASE_SNAPSHOT_DIR or pass --target")
+
+    version = sync(args.target)
+    print(f"snapshot {version} written to {args.target}")
@@ -0,0 +1,90 @@
+import json
+
+from flask import Response, request, stream_with_context
+from db.supabase import supabase
+from db.compression import VARY, compress_stream, negotiate
+
+PAGE_SIZE = 1000
+
+
+# --------------------------------------------------
+# Helper: yield a table's rows page by page (keyset on id)
+# --------------------------------------------------
+def iter_rows(table: str, columns: str = "*", page_size: int = PAGE_SIZE):
+    """
+    Yield every row of `table`, fetching one page at a time.
+    Pages are keyed on id (id > last seen id), so each page costs the
+    same no matter how deep into the table we are.
+    """
+    last_id = None
+    while True:
+        query = supabase.table(table).select(columns).order("id").limit(page_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+
+        rows = query.execute().data or []
+        yield from rows
+
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def _dumps(item):
+    return json.dumps(item, default=str, separators=(",", ":"))
+
+
+# --------------------------------------------------
+# Generators: JSON array / NDJSON, one item at a time
+# --------------------------------------------------
+def json_array(items):
+    yield "["
+    first = True
+    for item in items:
+        yield _dumps(item) if first else "," + _dumps(item)
+        first = False
+    yield "]\n"
+
+
+def ndjson(items):
+    for item in items:
+        yield _dumps(item) + "\n"
+
+
+# --------------------------------------------------
+# Helper: streaming response, ?format=ndjson picks NDJSON
+# --------------------------------------------------
+def stream_response(items):
+    """
+    Stream `items` (any iterable, typically a generator over upstream
+    pages) as a JSON array, or as NDJSON when ?format=ndjson is given.
+    Only one page is held in memory at a time. The stream is gzip/brotli
+    compressed on the fly when the client accepts it.
+    """
+    if request.args.get("format") == "ndjson":
+        chunks, mimetype = ndjson(items), "application/x-ndjson"
+    else:
+        chunks, mimetype = json_array(items), "application/json"
+
+    encoding = negotiate(request.headers.get("Accept-Encoding"))
+    if encoding:
+        chunks = compress_stream(chunks, encoding)
+
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add(VARY)
+    return response
+
+
+# --------------------------------------------------
+# Helper: same formats for a list already in memory, serialized once
+# --------------------------------------------------
+def list_response(items):
+    """
+    Like stream_response, but the body is built in one go, so @cached can
+    keep the encoded bytes (and their compressed variants).
+    """
+    if request.args.get("format") == "ndjson":
+        return Response("".join(ndjson(items)), mimetype="application/x-ndjson")
+    return Response("".join(json_array(items)), mimetype="application/json")
@@ -11,26 +11,146 @@
 
 from postgrest import SyncPostgrestClient
 import os
+import threading
 from dotenv import load_dotenv
 import httpx
 from httpx import Timeout
 
+from db.metrics import AccountingTransport
+from db.singleflight import CoalescingTransport
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
-# Create a custom HTTP client with longer timeouts
+# Transport tuning (all optional)
+POOL_MAX_CONNECTIONS = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "100"))
+POOL_MAX_KEEPALIVE = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "60"))
+HTTP2 = os.getenv("SUPABASE_HTTP2", "false").lower() in ("1", "true", "yes")
+
+# Local columnar snapshot (see db/snapshot.py); reads are served from it
+# instead of Supabase when SUPABASE_READ_SNAPSHOT is on.
+SNAPSHOT_DIR = os.getenv("SUPABASE_SNAPSHOT_DIR")
+READ_SNAPSHOT = os.getenv("SUPABASE_READ_SNAPSHOT", "false").lower() in ("1", "true", "yes")
+# Share one upstream call between identical concurrent reads
+COALESCE = os.getenv("SUPABASE_COALESCE", "true").lower() in ("1", "true", "yes")
+
+# Longer timeouts than httpx's defaults
 timeout = Timeout(timeout=30.0, connect=10.0)
-http_client = httpx.Client(timeout=timeout)
-
-# Use SyncPostgrestClient for synchronous operations
-supabase = SyncPostgrestClient(
-    base_url=f"{SUPABASE_URL}/rest/v1",
-    headers={
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json"
-    },
-    http_client=http_client
-)
\ No newline at end of file
+
+_transport_override = None
+_snapshot_transport = None
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+# --------------------------------------------------
+# Transport: pooled, keepalive-tuned, optionally HTTP/2
+# --------------------------------------------------
+def make_http_transport():
+    # With HTTP/2 one connection multiplexes many concurrent queries,
+    # so fan-outs do not need a connection each.
+    return httpx.HTTPTransport(
+        http2=HTTP2,
+        limits=httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def make_transport():
+    global _snapshot_transport
+    if _transport_override is not None:
+        inner = _transport_override
+    elif READ_SNAPSHOT and SNAPSHOT_DIR:
+        # Serve reads from the local columnar snapshot (db/snapshot.py)
+        from db.snapshot import SnapshotTransport
+        inner = _snapshot_transport = SnapshotTransport(SNAPSHOT_DIR)
+    else:
+        inner = make_http_transport()
+
+    # Every call is charged to the Flask request that made it (db/metrics.py);
+    # identical concurrent reads are coalesced first, so only one is charged
+    transport = AccountingTransport(inner)
+    if COALESCE:
+        transport = CoalescingTransport(transport)
+    return transport
+
+
+def make_client(transport=None):
+    http_client = httpx.Client(timeout=timeout, transport=transport or make_transport())
+
+    # Use SyncPostgrestClient for synchronous operations
+    return SyncPostgrestClient(
+        base_url=f"{SUPABASE_URL or 'http://localhost'}/rest/v1",
+        headers={
+            "apikey": SUPABASE_KEY or "",
+            "Authorization": f"Bearer {SUPABASE_KEY}",
+            "Content-Type": "application/json"
+        },
+        http_client=http_client
+    )
+
+
+# --------------------------------------------------
+# One client per process
+# --------------------------------------------------
+def get_client():
+    """
+    The PostgREST client for the current process. gunicorn forks its
+    workers after importing the app, so the client is created lazily
+    and re-created in every child: pooled sockets are never shared
+    between workers.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client_pid != pid:
+        with _client_lock:
+            if _client_pid != pid:
+                _client = make_client()
+                _client_pid = pid
+    return _client
+
+
+def snapshot_transport():
+    """This process's SnapshotTransport, or None when reading Supabase."""
+    if not (READ_SNAPSHOT and SNAPSHOT_DIR) or _transport_override is not None:
+        return None
+    get_client()
+    return _snapshot_transport
+
+
+def snapshot_version():
+    """Snapshot version this process is serving, or None when reading Supabase."""
+    return getattr(snapshot_transport(), "version", None)
+
+
+def set_transport(transport):
+    """Swap the underlying httpx transport (benchmarks, local stand-ins)."""
+    global _transport_override, _client_pid
+    _transport_override = transport
+    _client_pid = None
+
+
+def _after_fork():
+    global _client, _client_pid, _client_lock
+    # The parent's client (and its lock) must not be touched in the child.
+    _client, _client_pid, _client_lock = None, None, threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+class _ClientProxy:
+    """`supabase.table(...)` etc. resolve to this process's client."""
+
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
+
+
+supabase = _ClientProxy()
@@ -0,0 +1,104 @@
+import hmac
+import os
+from functools import wraps
+
+from flask import Blueprint, request, jsonify
+from db.cache import response_cache
+from db.data_version import bump, data_version, invalidate_prefix
+from db.incremental import refresh_engine
+from db.singleflight import (
+    request_flights,
+    upstream_flights,
+    async_request_flights,
+    async_upstream_flights,
+)
+
+admin_bp = Blueprint("admin", __name__)
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+# --------------------------------------------------
+# Helper: admin routes need the X-Admin-Token header
+# --------------------------------------------------
+def admin_required(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # No token configured → admin routes are disabled
+        token = request.headers.get("X-Admin-Token", "")
+        if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+            return jsonify({"error": "forbidden"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+# --------------------------------------------------
+# 1️⃣ Response cache stats (hits / misses per route)
+# --------------------------------------------------
+@admin_bp.route("/admin/cache/stats", methods=["GET"])
+@admin_required
+def cache_stats():
+    # Each worker has its own cache: these are the serving worker's
+    return jsonify({**response_cache.stats(), "pid": os.getpid()})
+
+
+# --------------------------------------------------
+# 2️⃣ Invalidate cached responses by path prefix
+# --------------------------------------------------
+@admin_bp.route("/admin/cache/invalidate", methods=["POST"])
+@admin_required
+def cache_invalidate():
+    # e.g. prefix=/api/overview  (empty prefix clears everything)
+    prefix = request.args.get("prefix", "")
+    # Every other worker drops its entries when it next reads the data
+    # version (within DATA_VERSION_RELOAD_SECONDS); this one does it now
+    invalidate_prefix(prefix)
+    removed = response_cache.invalidate(prefix)
+    return jsonify({"prefix": prefix, "removed": removed, "pid": os.getpid()})
+
+
+# --------------------------------------------------
+# 3️⃣ Request / upstream coalescing stats
+# --------------------------------------------------
+@admin_bp.route("/admin/singleflight/stats", methods=["GET"])
+@admin_required
+def singleflight_stats():
+    return jsonify({
+        "requests": request_flights.stats(),
+        "upstream": upstream_flights.stats(),
+        "async_requests": async_request_flights.stats(),
+        "async_upstream": async_upstream_flights.stats(),
+    })
+
+
+# --------------------------------------------------
+# 4️⃣ Data-version token (drives ETags); bump after an ingest
+# --------------------------------------------------
+@admin_bp.route("/admin/data-version", methods=["GET"])
+@admin_required
+def data_version_show():
+    return jsonify({"version": data_version.current()})
+
+
+@admin_bp.route("/admin/data-version/bump", methods=["POST"])
+@admin_required
+def data_version_bump():
+    bump()
+    data_version.invalidate()
+    return jsonify({"version": data_version.current()})
+
+
+# --------------------------------------------------
+# 5️⃣ Incremental index refresh (watermarks, rows applied)
+# --------------------------------------------------
+@admin_bp.route("/admin/refresh/stats", methods=["GET"])
+@admin_required
+def refresh_stats():
+    return jsonify(refresh_engine.stats())
+
+
+@admin_bp.route("/admin/refresh/run", methods=["POST"])
+@admin_required
+def refresh_run():
+    # One delta cycle now, in the worker that serves this request
+    return jsonify(refresh_engine.refresh())
@@ -1,19 +1,57 @@
+import numpy as np
 from flask import Blueprint, request, jsonify
+from pyroaring import BitMap
 from db.supabase import supabase
+from db.field_index import field_index
+from db.authorship_index import authorship_index, top_k
+from db.leaderboards import researcher_leaderboards, institution_leaderboards
+from db.singleflight import coalesced
 
 analytics_bp = Blueprint("analytics", __name__)
 
 # --------------------------------------------------
 # Helper
 # --------------------------------------------------
-def avg(values):
-    return round(sum(values) / len(values), 2) if values else 0
+def nan_avg(values):
+    # null metrics are NaN in the index and do not count
+    values = values[~np.isnan(values)]
+    return round(float(values.mean()), 2) if len(values) else 0
 
 
 # --------------------------------------------------
-# MAIN ANALYTICS ENDPOINT
+# Helper: researcher / institution cards
+# --------------------------------------------------
+def researcher_cards(rows):
+    return [
+        {
+            "id": r["id"],
+            "name": r["full_name"],
+            "h_index": r["h_index"],
+            "rii": r["rii"],
+            "total_publications": r["total_publications"],
+            "total_citations": r["total_citations"]
+        }
+        for r in rows
+    ]
+
+
+def institution_cards(rows):
+    return [
+        {
+            "id": inst["id"],
+            "name": inst["name"],
+            "average_h_index": inst["average_h_index"],
+            "average_rii": inst["average_rii"]
+        }
+        for inst in rows
+    ]
+
+
+# --------------------------------------------------
+# MAIN ANALYTICS ENDPOINT (vectorized over the authorship index)
 # --------------------------------------------------
 @analytics_bp.route("/analytics", methods=["GET"])
+@coalesced
 def analytics():
     country_id = request.args.get("country_id")
     institution_id = request.args.get("institution_id")
@@ -22,6 +60,12 @@ def analytics():
     if institution_id and not country_id:
         return jsonify({"error": "country_id is required when institution_id is provided"}), 400
 
+    try:
+        country_filter = int(country_id) if country_id else None
+        institution_filter = int(institution_id) if institution_id else None
+    except ValueError:
+        return jsonify({"error": "country_id and institution_id must be integers"}), 400
+
     # --------------------------------------------------
     # 1️⃣ FILTER ARTICLES BY FIELD
     # --------------------------------------------------
@@ -30,18 +74,12 @@ def analytics():
     if field:
         field_normalized = " ".join(field.strip().lower().split())
 
-        articles = (
-            supabase
-            .table("articles")
-            .select("id")
-            .ilike("research_area_path", f"%{field_normalized}%")
-            .execute()
-            .data
-        )
+        # Same matches as ilike '%field%': every field containing the text
+        bitmaps = [field_index.articles(f) for f in field_index.search(field_normalized)]
+        matched = BitMap.union(*bitmaps) if bitmaps else BitMap()
+        article_ids = np.asarray(matched.to_array(), dtype=np.int64)
 
-        article_ids = [a["id"] for a in articles]
-
-        if not article_ids:
+        if not len(article_ids):
             return jsonify({
                 "filters": {
                     "country_id": country_id,
@@ -60,98 +98,56 @@ def analytics():
             })
 
     # --------------------------------------------------
-    # 2️⃣ QUERY AUTHORSHIPS
+    # 2️⃣ MASK AUTHORSHIPS
     # --------------------------------------------------
-    query = (
-        supabase
-        .table("authorships")
-        .select("""
-            researcher_id,
-            institution_id,
-            country_id,
-            researchers(
-                id,
-                full_name,
-                h_index,
-                rii,
-                total_publications,
-                total_citations
-            ),
-            institution_info(
-                id,
-                name,
-                average_h_index,
-                average_rii
-            )
-        """)
-    )
-
-    if article_ids:
-        query = query.in_("article_id", article_ids)
-
-    if country_id:
-        query = query.eq("country_id", country_id)
-
-    if institution_id:
-        query = query.eq("institution_id", institution_id)
-
-    rows = query.execute().data or []
+    cols = authorship_index.get()
+    mask = cols.mask(article_ids, country_filter, institution_filter)
+    researchers = cols.researchers_in(mask)
 
     # --------------------------------------------------
-    # 3️⃣ AGGREGATION
-    # --------------------------------------------------
-    researcher_map = {}
-    institution_map = {}
-
-    for row in rows:
-        r = row.get("researchers")
-        inst = row.get("institution_info")
-
-        if r:
-            researcher_map[r["id"]] = {
-                "id": r["id"],
-                "name": r["full_name"],
-                "h_index": r["h_index"],
-                "rii": r["rii"],
-                "total_publications": r["total_publications"],
-                "total_citations": r["total_citations"]
-            }
-
-        if inst:
-            institution_map[inst["id"]] = {
-                "id": inst["id"],
-                "name": inst["name"],
-                "average_h_index": inst["average_h_index"],
-                "average_rii": inst["average_rii"]
-            }
-
-    researchers = list(researcher_map.values())
-    institutions = list(institution_map.values())
-
-    # --------------------------------------------------
-    # 4️⃣ METRICS
+    # 3️⃣ METRICS
     # --------------------------------------------------
     metrics = {
-        "average_h_index": avg([r["h_index"] for r in researchers]),
-        "average_rii": avg([r["rii"] for r in researchers])
+        "average_h_index": nan_avg(cols.r_h[researchers]),
+        "average_rii": nan_avg(cols.r_rii[researchers])
     }
 
     # --------------------------------------------------
-    # 5️⃣ TOP RESEARCHERS
+    # 4️⃣ TOP RESEARCHERS
     # --------------------------------------------------
-    top_researchers = {
-        "by_h_index": sorted(researchers, key=lambda x: x["h_index"], reverse=True)[:10],
-        "by_rii": sorted(researchers, key=lambda x: x["rii"], reverse=True)[:10]
-    }
+    # Unfiltered and per-country rankings are precomputed leaderboards
+    # over the same authorship rows as the metrics; narrower filters rank
+    # just the masked researchers.
+    scope = None
+    if article_ids is None and not institution_id:
+        scope = ("country", country_filter) if country_id else ("authored",)
+
+    if scope:
+        top_researchers = {
+            "by_h_index": researcher_cards(researcher_leaderboards.top(scope, "h_index", 10)),
+            "by_rii": researcher_cards(researcher_leaderboards.top(scope, "rii", 10))
+        }
+    else:
+        top_researchers = {
+            "by_h_index": researcher_cards(cols.r_rows[p] for p in top_k(cols.r_h, cols.r_ids, researchers, 10)),
+            "by_rii": researcher_cards(cols.r_rows[p] for p in top_k(cols.r_rii, cols.r_ids, researchers, 10))
+        }
 
     # --------------------------------------------------
-    # 6️⃣ TOP INSTITUTIONS (ONLY WHEN COUNTRY LEVEL)
+    # 5️⃣ TOP INSTITUTIONS (ONLY WHEN COUNTRY LEVEL)
     # --------------------------------------------------
     top_institutions = None
-    if country_id and not institution_id:
+    if country_id and not institution_id and article_ids is None:
+        scope = ("country", country_filter)
+        top_institutions = {
+            "by_h_index": institution_cards(institution_leaderboards.top(scope, "average_h_index", 10)),
+            "by_rii": institution_cards(institution_leaderboards.top(scope, "average_rii", 10))
+        }
+    elif country_id and not institution_id:
+        institutions = cols.institutions_in(mask)
         top_institutions = {
-            "by_h_index": sorted(institutions, key=lambda x: x["average_h_index"], reverse=True)[:10],
-            "by_rii": sorted(institutions, key=lambda x: x["average_rii"], reverse=True)[:10]
+            "by_h_index": institution_cards(cols.i_rows[p] for p in top_k(cols.i_h, cols.i_ids, institutions, 10)),
+            "by_rii": institution_cards(cols.i_rows[p] for p in top_k(cols.i_rii, cols.i_ids, institutions, 10))
         }
 
     return jsonify({
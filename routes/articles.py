@@ -1,10 +1,10 @@
-from flask import Blueprint, request, jsonify
-from db.supabase import supabase
+from flask import Blueprint
+from db.streaming import iter_rows, stream_response
 
 articles_bp = Blueprint("articles", __name__)
 
 
 @articles_bp.route("/articles", methods=["GET"])
 def get_articles():
-    response = supabase.table("articles").select("*").execute()
-    return jsonify(response.data)
+    # Streamed page by page so memory stays flat as the table grows
+    return stream_response(iter_rows("articles", "*"))
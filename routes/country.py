@@ -1,22 +1,18 @@
 from flask import Blueprint, request, jsonify
 from db.supabase import supabase
+from db.async_supabase import async_supabase
+from db.async_views import async_view
+from db.batch import BatchLoader, ids_arg
+from db.cache import cached
+from db.concurrency import QueryBatch, AsyncQueryBatch
+from db.histograms import field_histograms
+from db.leaderboards import institution_leaderboards
+from db.singleflight import coalesced
+from db.field_index import normalize_fields
 from collections import Counter
 
 country_bp = Blueprint("country", __name__)
 
-# --------------------------------------------------
-# Helper: normalize research field
-# --------------------------------------------------
-def normalize_fields(path: str):
-    """
-    'Computer Science > Quantum Computing'
-    → ['computer science', 'quantum computing']
-    """
-    if not path:
-        return []
-    return [p.strip().lower() for p in path.split(">") if p.strip()]
-
-
 # --------------------------------------------------
 # 1️⃣ Country autocomplete (type → closest match)
 # --------------------------------------------------
@@ -44,18 +40,54 @@ def search_countries():
 # 2️⃣ Country overview (stats card)
 # --------------------------------------------------
 @country_bp.route("/api/country/<country_id>/overview", methods=["GET"])
+@cached(ttl=600)
+@coalesced
 def country_overview(country_id):
-    country = (
-        supabase
+    country = country_overview_query(supabase, country_id).execute().data
+
+    return jsonify(country)
+
+
+@async_view("country.country_overview")
+async def country_overview_async(args, country_id):
+    return (await country_overview_query(async_supabase, country_id).execute()).data
+
+
+def country_overview_query(client, country_id):
+    return (
+        client
         .table("country_info")
-        .select("id,name,average_h_index,average_rii,ranking")
+        .select(COUNTRY_CARD_COLUMNS)
         .eq("id", country_id)
         .single()
-        .execute()
-        .data
     )
 
-    return jsonify(country)
+
+COUNTRY_CARD_COLUMNS = "id,name,average_h_index,average_rii,ranking"
+country_cards = BatchLoader("country_info", COUNTRY_CARD_COLUMNS)
+
+
+# --------------------------------------------------
+# Country cards for a list of ids (?ids=1,2,3), keyed by id
+# --------------------------------------------------
+@country_bp.route("/api/countries/batch", methods=["GET"])
+def countries_batch():
+    try:
+        ids = ids_arg(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(country_cards.load(ids))
+
+
+@async_view("country.countries_batch")
+async def countries_batch_async(args):
+    try:
+        ids = ids_arg(args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    return await country_cards.load_async(ids)
 
 
 # --------------------------------------------------
@@ -63,42 +95,26 @@ def country_overview(country_id):
 # --------------------------------------------------
 @country_bp.route("/api/country/<country_id>/institutions", methods=["GET"])
 def country_best_institutions(country_id):
-    rows = (
-        supabase
-        .table("authorships")
-        .select("""
-            institution_info(
-                id,
-                name,
-                average_h_index,
-                average_rii
-            )
-        """)
-        .eq("country_id", country_id)
-        .execute()
-        .data or []
-    )
+    try:
+        scope = ("country", int(country_id))
+    except ValueError:
+        return jsonify({"error": "country_id must be an integer"}), 400
+
+    return jsonify(best_institutions(scope))
 
-    inst_map = {}
-    for r in rows:
-        inst = r.get("institution_info")
-        if inst:
-            inst_map[inst["id"]] = inst
-
-    institutions = list(inst_map.values())
-
-    return jsonify({
-        "by_h_index": sorted(
-            institutions,
-            key=lambda x: x["average_h_index"],
-            reverse=True
-        )[:5],
-        "by_rii": sorted(
-            institutions,
-            key=lambda x: x["average_rii"],
-            reverse=True
-        )[:5]
-    })
+
+def best_institutions(scope):
+    # Precomputed per-country institution rankings
+    return {
+        "by_h_index": [
+            {k: inst[k] for k in ("id", "name", "average_h_index", "average_rii")}
+            for inst in institution_leaderboards.top(scope, "average_h_index", 5)
+        ],
+        "by_rii": [
+            {k: inst[k] for k in ("id", "name", "average_h_index", "average_rii")}
+            for inst in institution_leaderboards.top(scope, "average_rii", 5)
+        ]
+    }
 
 
 # --------------------------------------------------
@@ -107,15 +123,25 @@ def country_best_institutions(country_id):
 @country_bp.route("/api/country/<country_id>/fields", methods=["GET"])
 def country_field_stats(country_id):
 
-    rows = (
-        supabase
+    # Served from the precomputed histograms once the batch job has run
+    stats = field_histograms.top("countries", country_id, 10)
+    if stats is not None:
+        return jsonify(stats)
+
+    rows = country_fields_query(supabase, country_id).execute().data or []
+    return jsonify(field_stats(rows))
+
+
+def country_fields_query(client, country_id):
+    return (
+        client
         .table("authorships")
         .select("article_id, articles(research_area_path)")
         .eq("country_id", country_id)
-        .execute()
-        .data or []
     )
 
+
+def field_stats(rows):
     field_counter = Counter()
     total = 0
 
@@ -140,7 +166,55 @@ def country_field_stats(country_id):
 
     stats.sort(key=lambda x: x["count"], reverse=True)
 
-    return jsonify(stats[:10])  # top 10 research domains
+    return stats[:10]  # top 10 research domains
+
+
+# --------------------------------------------------
+# 5️⃣ Country dashboard (overview + institutions + fields)
+# --------------------------------------------------
+@country_bp.route("/api/country/<country_id>/dashboard", methods=["GET"])
+@cached(ttl=600)
+@coalesced
+def country_dashboard(country_id):
+    try:
+        scope = ("country", int(country_id))
+    except ValueError:
+        return jsonify({"error": "country_id must be an integer"}), 400
+
+    fields = field_histograms.top("countries", country_id, 10)
+    batch = QueryBatch().add_all(dashboard_queries(supabase, country_id, fields))
+    return jsonify(dashboard(batch.execute(), scope, fields))
+
+
+@async_view("country.country_dashboard")
+async def country_dashboard_async(args, country_id):
+    try:
+        scope = ("country", int(country_id))
+    except ValueError:
+        return {"error": "country_id must be an integer"}, 400
+
+    fields = field_histograms.top("countries", country_id, 10)
+    batch = AsyncQueryBatch().add_all(dashboard_queries(async_supabase, country_id, fields))
+    return dashboard(await batch.execute(), scope, fields)
+
+
+def dashboard_queries(client, country_id, fields):
+    # The overview and (without a histogram snapshot) the authorship
+    # slice are fetched together; the rankings come from memory.
+    queries = {"overview": country_overview_query(client, country_id)}
+    if fields is None:
+        queries["fields"] = country_fields_query(client, country_id)
+    return queries
+
+
+def dashboard(res, scope, fields):
+    if fields is None:
+        fields = field_stats(res["fields"].data or [])
+    return {
+        "overview": res["overview"].data,
+        "institutions": best_institutions(scope),
+        "fields": fields,
+    }
 
 @country_bp.route("/api/countries", methods=["GET"])
 def get_all_countries():
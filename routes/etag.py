@@ -0,0 +1,38 @@
+from flask import Blueprint, g, request, make_response
+from db.cache import cache_key
+from db.compression import VARY, negotiate
+from db.etag import etag_headers, if_none_match, request_etag
+
+etag_bp = Blueprint("etag", __name__)
+
+
+def add_etag_headers(response, etag):
+    for name, value in etag_headers(etag, response.status_code):
+        response.headers.setdefault(name, value)
+    response.vary.add(VARY)
+    return response
+
+
+# --------------------------------------------------
+# Hooks: conditional GET for every read endpoint of the app
+# --------------------------------------------------
+@etag_bp.before_app_request
+def check_if_none_match():
+    g.etag = request_etag(
+        request.method,
+        request.path,
+        cache_key(),
+        negotiate(request.headers.get("Accept-Encoding")),
+    )
+    if g.etag is not None and if_none_match(request.headers.get("If-None-Match"), g.etag):
+        # Nothing has changed since the client's copy: no view, no Supabase
+        return add_etag_headers(make_response("", 304), g.pop("etag"))
+    return None
+
+
+@etag_bp.after_app_request
+def set_etag(response):
+    etag = g.pop("etag", None)
+    if etag is not None and response.status_code == 200:
+        add_etag_headers(response, etag)
+    return response
@@ -1,61 +1,31 @@
+import anyio
 from flask import Blueprint, request, jsonify
 from db.supabase import supabase
+from db.async_supabase import async_supabase
+from db.async_views import async_view
+from db.field_index import field_index
+from db.concurrency import fan_out, async_fan_out
+from db.streaming import list_response
+from db.cache import cached
+from db.leaderboards import researcher_leaderboards
+from db.singleflight import coalesced
 from collections import Counter
 
 field_bp = Blueprint("field", __name__)
 
 
 # --------------------------------------------------
-# Helper: normalize research fields
+# Helper: get article ids for a field from the inverted index
 # --------------------------------------------------
-def normalize_fields(path: str):
-    if not path:
-        return []
-    return [p.strip().lower() for p in path.split(">") if p.strip()]
-
-
-# --------------------------------------------------
-# Helper: get article ids for a field using server-side filtering
-# --------------------------------------------------
-def get_articles_with_field(field: str, max_ids: int | None = None):
+def get_articles_with_field(field: str):
     """
-    Fetch article ids whose research_area_path contains a given normalized field.
-    Uses pagination with server-side ilike filtering to avoid full table scans.
+    Fetch ids of articles whose research_area_path contains a given
+    normalized field. Exact match on the normalized field, no truncation.
     """
     field = field.strip().lower()
     if not field:
         return []
-
-    page = 0
-    page_size = 1000
-    ids: list[int] = []
-
-    # Use ilike on research_area_path so Postgres does the filtering.
-    # You can improve this further with a generated column and index in SQL.
-    while True:
-        res = (
-            supabase
-            .table("articles")
-            .select("id, research_area_path")
-            .ilike("research_area_path", f"%{field}%")
-            .range(page * page_size, (page + 1) * page_size - 1)
-            .execute()
-        )
-        rows = res.data or []
-        if not rows:
-            break
-
-        for r in rows:
-            # Extra safety: still normalize client-side to avoid false positives
-            if field in normalize_fields(r.get("research_area_path")):
-                ids.append(r["id"])
-
-        if max_ids is not None and len(ids) >= max_ids:
-            return ids[:max_ids]
-
-        page += 1
-
-    return ids
+    return list(field_index.articles(field))
 
 
 # --------------------------------------------------
@@ -67,115 +37,57 @@ def chunked(iterable, size):
 
 
 # --------------------------------------------------
-# 1️⃣ Search all fields (cached-ish & lighter)
+# 1️⃣ Search all fields (served from the in-memory field index)
 # --------------------------------------------------
 @field_bp.route("/api/fields/search", methods=["GET"])
+@cached(ttl=300)
 def search_fields():
     q = request.args.get("q", "").strip().lower()
-    field_set = set()
-    page = 0
-    page_size = 2000  # bigger page reduces round-trips
-
-    while True:
-        res = (
-            supabase
-            .table("articles")
-            .select("research_area_path")
-            .range(page * page_size, (page + 1) * page_size - 1)
-            .execute()
-        )
-        rows = res.data or []
-        if not rows:
-            break
+    match = request.args.get("match", "contains")
 
-        for r in rows:
-            for f in normalize_fields(r.get("research_area_path")):
-                if not q or q in f:
-                    field_set.add(f)
+    # In memory already: serialize once, cache the (compressed) bytes
+    if match == "prefix":
+        return list_response(field_index.prefix(q))
 
-        page += 1
+    return list_response(field_index.search(q))
 
-    # For very large sets you might want to limit results here
-    return jsonify(sorted(field_set))
+
+# --------------------------------------------------
+# Helper: ?offset= for leaderboard pages
+# --------------------------------------------------
+def offset_arg():
+    try:
+        return max(0, int(request.args.get("offset", 0)))
+    except ValueError:
+        return 0
+
+
+def researcher_card(r, *columns):
+    return {c: r[c] for c in ("id", "full_name", "h_index", "rii") + columns}
 
 
 # --------------------------------------------------
-# 2️⃣ Best researchers in a field (server-side group)
+# 2️⃣ Best researchers in a field (precomputed leaderboard)
 # --------------------------------------------------
 @field_bp.route("/api/field/overview", methods=["GET"])
+@coalesced
 def field_overview():
     field = request.args.get("field")
     if not field:
         return jsonify({"error": "field is required"}), 400
 
-    # We only care about distinct researchers and their metrics, not every authorship row.
-    # So: fetch article_ids (limited) then query authorships joined to researchers.
-    article_ids = get_articles_with_field(field, max_ids=20000)
-    if not article_ids:
-        return jsonify({"by_h_index": [], "by_rii": []})
-
-    # To reduce duplicates, we keep a map in Python but we don't bring extra columns.
-    researcher_map = {}
-
-    for chunk in chunked(article_ids, 500):
-        res = (
-            supabase
-            .table("authorships")
-            .select(
-                """
-                researcher_id,
-                researchers (
-                    id,
-                    full_name,
-                    h_index,
-                    rii
-                )
-                """
-            )
-            .in_("article_id", chunk)
-            .execute()
-        )
-        rows = res.data or []
-        for r in rows:
-            rs = r.get("researchers")
-            if rs:
-                rid = rs["id"]
-                # Keep the "best" record if duplicates appear with nulls
-                existing = researcher_map.get(rid)
-                if existing is None:
-                    researcher_map[rid] = rs
-                else:
-                    # Prefer non-null metrics
-                    if existing.get("h_index") is None and rs.get("h_index") is not None:
-                        researcher_map[rid] = rs
-                    elif existing.get("rii") is None and rs.get("rii") is not None:
-                        researcher_map[rid] = rs
-
-    researchers = list(researcher_map.values())
-
-    # Filter out null metrics to avoid weird ordering
-    by_h_index = [
-        r for r in researchers if r.get("h_index") is not None
-    ]
-    by_rii = [
-        r for r in researchers if r.get("rii") is not None
-    ]
-
-    by_h_index_sorted = sorted(
-        by_h_index,
-        key=lambda x: (x["h_index"], x["id"]),
-        reverse=True
-    )[:6]
-
-    by_rii_sorted = sorted(
-        by_rii,
-        key=lambda x: (x["rii"], x["id"]),
-        reverse=True
-    )[:6]
+    scope = ("field", field.strip().lower())
+    offset = offset_arg()
 
     return jsonify({
-        "by_h_index": by_h_index_sorted,
-        "by_rii": by_rii_sorted,
+        "by_h_index": [
+            researcher_card(r)
+            for r in researcher_leaderboards.top(scope, "h_index", 6, offset)
+        ],
+        "by_rii": [
+            researcher_card(r)
+            for r in researcher_leaderboards.top(scope, "rii", 6, offset)
+        ],
     })
 
 
@@ -183,34 +95,61 @@ def field_overview():
 # 3️⃣ Country contribution (lighter aggregation)
 # --------------------------------------------------
 @field_bp.route("/api/field/countries", methods=["GET"])
+@coalesced
 def field_country_contribution():
     field = request.args.get("field")
     if not field:
         return jsonify({"error": "field is required"}), 400
 
-    article_ids = get_articles_with_field(field, max_ids=20000)
+    article_ids = get_articles_with_field(field)
     if not article_ids:
         return jsonify([])
 
-    all_rows = []
-    for chunk in chunked(article_ids, 500):
-        res = (
-            supabase
-            .table("authorships")
-            .select(
-                """
-                country_id,
-                country_info (
-                    id,
-                    name,
-                    iso_code
-                )
-                """
+    def fetch(chunk):
+        return contribution_query(supabase, chunk).execute().data or []
+
+    return jsonify(country_contribution(fan_out(fetch, chunked(article_ids, 500))))
+
+
+@async_view("field.field_country_contribution")
+async def field_country_contribution_async(args):
+    field = args.get("field")
+    if not field:
+        return {"error": "field is required"}, 400
+
+    # The field index builds with blocking calls on first use
+    article_ids = await anyio.to_thread.run_sync(get_articles_with_field, field)
+    if not article_ids:
+        return []
+
+    async def fetch(chunk):
+        return (await contribution_query(async_supabase, chunk).execute()).data or []
+
+    return country_contribution(await async_fan_out(fetch, chunked(article_ids, 500)))
+
+
+def contribution_query(client, article_ids):
+    return (
+        client
+        .table("authorships")
+        .select(
+            """
+            country_id,
+            country_info (
+                id,
+                name,
+                iso_code
             )
-            .in_("article_id", chunk)
-            .execute()
+            """
         )
-        all_rows.extend(res.data or [])
+        .in_("article_id", article_ids)
+    )
+
+
+def country_contribution(pages):
+    all_rows = []
+    for rows in pages:
+        all_rows.extend(rows)
 
     country_counter = Counter()
     country_meta = {}
@@ -236,85 +175,33 @@ def field_country_contribution():
     ]
 
     result.sort(key=lambda x: x["count"], reverse=True)
-    return jsonify(result)
+    return result
 
 
 # --------------------------------------------------
-# 4️⃣ Best researchers in a field for a country (filtered + dedup)
+# 4️⃣ Best researchers in a field for a country (precomputed leaderboard)
 # --------------------------------------------------
 @field_bp.route("/api/field/country/researchers", methods=["GET"])
+@coalesced
 def field_country_researchers():
     field = request.args.get("field")
     country_id = request.args.get("country_id")
     if not field or not country_id:
         return jsonify({"error": "field and country_id are required"}), 400
 
-    article_ids = get_articles_with_field(field, max_ids=20000)
-    if not article_ids:
-        return jsonify([])
-
-    researcher_map = {}
-
-    for chunk in chunked(article_ids, 500):
-        res = (
-            supabase
-            .table("authorships")
-            .select(
-                """
-                researcher_id,
-                country_id,
-                researchers (
-                    id,
-                    full_name,
-                    h_index,
-                    rii,
-                    total_publications,
-                    total_citations
-                )
-                """
-            )
-            .eq("country_id", country_id)
-            .in_("article_id", chunk)
-            .execute()
-        )
-        rows = res.data or []
-        for r in rows:
-            rs = r.get("researchers")
-            if rs:
-                rid = rs["id"]
-                # Deduplicate same researcher across many articles
-                existing = researcher_map.get(rid)
-                if existing is None:
-                    researcher_map[rid] = rs
-                else:
-                    # Prefer non-null metrics
-                    if existing.get("h_index") is None and rs.get("h_index") is not None:
-                        researcher_map[rid] = rs
-                    elif existing.get("rii") is None and rs.get("rii") is not None:
-                        researcher_map[rid] = rs
-
-    researchers = list(researcher_map.values())
-
-    by_h_index = [
-        r for r in researchers if r.get("h_index") is not None
-    ]
-    by_rii = [
-        r for r in researchers if r.get("rii") is not None
-    ]
-
-    by_h_index_sorted = sorted(
-        by_h_index,
-        key=lambda x: (x["h_index"], x["id"]),
-        reverse=True
-    )[:8]
-
-    by_rii_sorted = sorted(
-        by_rii,
-        key=lambda x: (x["rii"], x["id"]),
-        reverse=True
-    )[:8]
+    try:
+        scope = ("field_country", field.strip().lower(), int(country_id))
+    except ValueError:
+        return jsonify({"error": "country_id must be an integer"}), 400
+    offset = offset_arg()
 
     return jsonify({
-        "by_h_index": by_h_index_sorted,
-        "by_rii": by_rii_sorted,
+        "by_h_index": [
+            researcher_card(r, "total_publications", "total_citations")
+            for r in researcher_leaderboards.top(scope, "h_index", 8, offset)
+        ],
+        "by_rii": [
+            researcher_card(r, "total_publications", "total_citations")
+            for r in researcher_leaderboards.top(scope, "rii", 8, offset)
+        ],
     })
@@ -1,22 +1,16 @@
 from flask import Blueprint, request, jsonify
 from db.supabase import supabase
+from db.async_supabase import async_supabase
+from db.async_views import async_view
+from db.histograms import field_histograms
+from db.cache import cached
+from db.batch import BatchLoader, ids_arg
+from db.authorship_index import authorship_index
+from db.field_index import normalize_fields
 from collections import Counter
 
 institution_bp = Blueprint("institution", __name__)
 
-# --------------------------------------------------
-# Helper: normalize research fields
-# --------------------------------------------------
-def normalize_fields(path: str):
-    """
-    'Computer Science > Quantum Computing'
-    → ['computer science', 'quantum computing']
-    """
-    if not path:
-        return []
-    return [p.strip().lower() for p in path.split(">") if p.strip()]
-
-
 # # --------------------------------------------------
 # # 1️⃣ Institution autocomplete (AFTER country chosen)
 # # --------------------------------------------------
@@ -61,33 +55,19 @@ def search_institutions_by_country():
 
     if not country_id:
         return jsonify({"error": "country_id is required"}), 400
-
-    # Get distinct institutions in that country
-    rows = (
-        supabase
-        .table("authorships")
-        .select("""
-            institution_id,
-            institution_info(
-                id,
-                name,
-                average_h_index,
-                average_rii
-            )
-        """)
-        .eq("country_id", country_id)
-        .execute()
-        .data or []
-    )
-
-    inst_map = {}
-    for r in rows:
-        inst = r.get("institution_info")
-        if not inst:
-            continue
-
-        name_l = inst["name"].lower()
-        if q and q not in name_l:
+    try:
+        country_id = int(country_id)
+    except ValueError:
+        return jsonify({"error": "country_id must be an integer"}), 400
+
+    # Distinct institutions of the country, from the precomputed
+    # country → institution mapping (no authorship scan per keystroke)
+    cols = authorship_index.get()
+
+    institutions = []
+    for pos in cols.country_institutions(country_id):
+        inst = cols.i_rows[pos]
+        if q and q not in (inst.get("name") or "").lower():
             continue
 
         # Filter: ignore 0 or null averages
@@ -96,19 +76,16 @@ def search_institutions_by_country():
         if avg_h <= 0 and avg_rii <= 0:
             continue
 
-        inst_map[inst["id"]] = {
+        institutions.append({
             "id": inst["id"],
             "name": inst["name"],
             "average_h_index": avg_h,
             "average_rii": avg_rii,
-            # no ranking at all
-        }
+        })
 
-    institutions = list(inst_map.values())
     # Sort by average_rii DESC (highest first)
     institutions.sort(key=lambda x: x["average_rii"], reverse=True)
 
-    # You can still limit to 40 if you want
     return jsonify(institutions[:40])
 
 
@@ -120,40 +97,82 @@ def search_institutions_by_country():
 @institution_bp.route("/api/institution/<institution_id>/overview", methods=["GET"])
 def institution_overview(institution_id):
 
-    institution = (
-        supabase
+    institution = institution_overview_query(supabase, institution_id).execute().data
+
+    return jsonify(institution or {})
+
+
+@async_view("institution.institution_overview")
+async def institution_overview_async(args, institution_id):
+    return (await institution_overview_query(async_supabase, institution_id).execute()).data or {}
+
+
+def institution_overview_query(client, institution_id):
+    return (
+        client
         .table("institution_info")
-        .select("id,name,average_h_index,average_rii,ranking")
+        .select(INSTITUTION_CARD_COLUMNS)
         .eq("id", institution_id)
         .single()
-        .execute()
-        .data
     )
 
-    return jsonify(institution or {})
+
+INSTITUTION_CARD_COLUMNS = "id,name,average_h_index,average_rii,ranking"
+institution_cards = BatchLoader("institution_info", INSTITUTION_CARD_COLUMNS)
+
+
+# --------------------------------------------------
+# Institution cards for a list of ids (?ids=1,2,3), keyed by id
+# --------------------------------------------------
+@institution_bp.route("/api/institutions/batch", methods=["GET"])
+def institutions_batch():
+    try:
+        ids = ids_arg(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(institution_cards.load(ids))
+
+
+@async_view("institution.institutions_batch")
+async def institutions_batch_async(args):
+    try:
+        ids = ids_arg(args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    return await institution_cards.load_async(ids)
 
 
 # --------------------------------------------------
-# 2️⃣ Institution field statistics (no indexes, no views)
+# 2️⃣ Institution field statistics (precomputed, live fallback)
 # --------------------------------------------------
 @institution_bp.route("/api/institution/<institution_id>/fields", methods=["GET"])
 def institution_field_stats(institution_id):
 
+    # Served from the precomputed histograms once the batch job has run
+    stats = field_histograms.top("institutions", institution_id, 10)
+    if stats is not None:
+        return jsonify(stats)
+
     field_counter = Counter()
     total = 0
 
     page_size = 500
-    offset = 0
-    max_rows = 5000  # safety limit
+    last_id = 0
 
-    while offset < max_rows:
+    # Keyset pages on authorship id: a stable order, so no row is
+    # counted twice or skipped between pages
+    while True:
 
         rows = (
             supabase
             .table("authorships")
-            .select("articles(research_area_path)")
+            .select("id, articles(research_area_path)")
             .eq("institution_id", institution_id)
-            .range(offset, offset + page_size - 1)
+            .gt("id", last_id)
+            .order("id")
+            .limit(page_size)
             .execute()
             .data or []
         )
@@ -171,7 +190,7 @@ def institution_field_stats(institution_id):
                 field_counter[f] += 1
                 total += 1
 
-        offset += page_size
+        last_id = rows[-1]["id"]
 
     stats = [
         {
@@ -191,6 +210,7 @@ def institution_field_stats(institution_id):
 # 3️⃣ Get all institutions
 # --------------------------------------------------
 @institution_bp.route("/api/institutions/all", methods=["GET"])
+@cached(ttl=600)
 def get_all_institutions():
     institutions = (
         supabase
@@ -0,0 +1,49 @@
+import time
+
+from flask import Blueprint, Response, g, request
+from db.metrics import (
+    start_request,
+    end_request,
+    finish_request,
+    render_metrics,
+)
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+# --------------------------------------------------
+# Hooks: account upstream calls for every request of the app
+# --------------------------------------------------
+@metrics_bp.before_app_request
+def start_upstream_accounting():
+    g.request_started = time.perf_counter()
+    g.upstream_stats, g.upstream_token = start_request()
+
+
+@metrics_bp.after_app_request
+def report_upstream_accounting(response):
+    stats = g.pop("upstream_stats", None)
+    if stats is None:
+        return response
+
+    # Streamed bodies keep fetching after this point; only the calls
+    # made before the first byte are counted for them.
+    elapsed = time.perf_counter() - g.request_started
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    response.headers["Server-Timing"] = finish_request(route, elapsed, stats)
+    return response
+
+
+@metrics_bp.teardown_app_request
+def stop_upstream_accounting(_exc):
+    token = g.pop("upstream_token", None)
+    if token is not None:
+        end_request(token)
+
+
+# --------------------------------------------------
+# Prometheus scrape endpoint (per worker process)
+# --------------------------------------------------
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
@@ -1,201 +1,146 @@
+import anyio
 from flask import Blueprint, jsonify
 from db.supabase import supabase
+from db.async_supabase import async_supabase
+from db.async_views import async_view
+from db.cache import cached
+from db.field_index import field_index
+from db.concurrency import QueryBatch, AsyncQueryBatch
+from db.singleflight import coalesced
 
 overview_bp = Blueprint("overview", __name__)
 
+# --------------------------------------------------
+# Helper: top 10 by h-index / rii + total count, as independent queries
+# --------------------------------------------------
+def top_card_queries(client, table: str, name_col: str, h_col: str, rii_col: str):
+    return {
+        "by_h": (client
+                 .table(table)
+                 .select(f"id,{name_col},{h_col}")
+                 .order(h_col, desc=True)
+                 .limit(10)),
+        "by_rii": (client
+                   .table(table)
+                   .select(f"id,{name_col},{rii_col}")
+                   .order(rii_col, desc=True)
+                   .limit(10)),
+        "total": (client
+                  .table(table)
+                  .select("id", count="exact")),
+    }
+
+
+def top_card(res):
+    return {
+        "total": res["total"].count or 0,
+        "by_h_index": res["by_h"].data or [],
+        "by_rii": res["by_rii"].data or []
+    }
+
+
+CARDS = {
+    "countries": ("country_info", "name", "average_h_index", "average_rii"),
+    "institutions": ("institution_info", "name", "average_h_index", "average_rii"),
+    "researchers": ("researchers", "full_name", "h_index", "rii"),
+}
+
+
+def run_card(card: str):
+    return top_card(QueryBatch().add_all(top_card_queries(supabase, *CARDS[card])).execute())
+
+
+async def run_card_async(card: str):
+    return top_card(await AsyncQueryBatch().add_all(top_card_queries(async_supabase, *CARDS[card])).execute())
+
+
 # --------------------------------------------------
 # COUNTRIES OVERVIEW
 # --------------------------------------------------
 @overview_bp.route("/api/overview/countries", methods=["GET"])
+@cached(ttl=300)
+@coalesced
 def overview_countries():
-    by_h = (
-        supabase
-        .table("country_info")
-        .select("id,name,average_h_index")
-        .order("average_h_index", desc=True)
-        .limit(10)
-        .execute()
-        .data or []
-    )
-
-    by_rii = (
-        supabase
-        .table("country_info")
-        .select("id,name,average_rii")
-        .order("average_rii", desc=True)
-        .limit(10)
-        .execute()
-        .data or []
-    )
-
-    total = (
-        supabase
-        .table("country_info")
-        .select("id", count="exact")
-        .execute()
-        .count or 0
-    )
+    return jsonify(run_card("countries"))
 
-    return jsonify({
-        "total": total,
-        "by_h_index": by_h,
-        "by_rii": by_rii
-    })
+
+@async_view("overview.overview_countries")
+async def overview_countries_async(args):
+    return await run_card_async("countries")
 
 
 # --------------------------------------------------
 # INSTITUTIONS OVERVIEW
 # --------------------------------------------------
 @overview_bp.route("/api/overview/institutions", methods=["GET"])
+@cached(ttl=300)
+@coalesced
 def overview_institutions():
-    by_h = (
-        supabase
-        .table("institution_info")
-        .select("id,name,average_h_index")
-        .order("average_h_index", desc=True)
-        .limit(10)
-        .execute()
-        .data or []
-    )
-
-    by_rii = (
-        supabase
-        .table("institution_info")
-        .select("id,name,average_rii")
-        .order("average_rii", desc=True)
-        .limit(10)
-        .execute()
-        .data or []
-    )
-
-    total = (
-        supabase
-        .table("institution_info")
-        .select("id", count="exact")
-        .execute()
-        .count or 0
-    )
+    return jsonify(run_card("institutions"))
 
-    return jsonify({
-        "total": total,
-        "by_h_index": by_h,
-        "by_rii": by_rii
-    })
+
+@async_view("overview.overview_institutions")
+async def overview_institutions_async(args):
+    return await run_card_async("institutions")
 
 
 # --------------------------------------------------
 # RESEARCHERS OVERVIEW
 # --------------------------------------------------
 @overview_bp.route("/api/overview/researchers", methods=["GET"])
+@cached(ttl=300)
+@coalesced
 def overview_researchers():
-    by_h = (
-        supabase
-        .table("researchers")
-        .select("id,full_name,h_index")
-        .order("h_index", desc=True)
-        .limit(10)
-        .execute()
-        .data or []
-    )
-
-    by_rii = (
-        supabase
-        .table("researchers")
-        .select("id,full_name,rii")
-        .order("rii", desc=True)
-        .limit(10)
-        .execute()
-        .data or []
-    )
-
-    total = (
-        supabase
-        .table("researchers")
-        .select("id", count="exact")
-        .execute()
-        .count or 0
-    )
+    return jsonify(run_card("researchers"))
 
-    return jsonify({
-        "total": total,
-        "by_h_index": by_h,
-        "by_rii": by_rii
-    })
+
+@async_view("overview.overview_researchers")
+async def overview_researchers_async(args):
+    return await run_card_async("researchers")
 
 
 # --------------------------------------------------
-# FIELDS OVERVIEW (derived from articles)
+# FIELDS OVERVIEW (from the in-memory field index)
 # --------------------------------------------------
 @overview_bp.route("/api/overview/fields", methods=["GET"])
+@cached(ttl=300)
+@coalesced
 def overview_fields():
-    rows = (
-        supabase
-        .table("articles")
-        .select("research_area_path")
-        .execute()
-        .data or []
-    )
-
-    field_set = set()
-
-    for r in rows:
-        path = r.get("research_area_path")
-        if not path:
-            continue
-        parts = [p.strip().lower() for p in path.split(">") if p.strip()]
-        field_set.update(parts)
-
     return jsonify({
-        "total": len(field_set)
+        "total": field_index.count()
     })
 
 
 # --------------------------------------------------
 # GLOBAL OVERVIEW (ALL COUNTS IN ONE CALL)
 # --------------------------------------------------
+def stats_queries(client):
+    return {
+        "researchers": client.table("researchers").select("id", count="exact"),
+        "countries": client.table("country_info").select("id", count="exact"),
+        "institutions": client.table("institution_info").select("id", count="exact"),
+    }
+
+
+def stats_card(res, fields: int):
+    return {
+        "researchers": res["researchers"].count or 0,
+        "countries": res["countries"].count or 0,
+        "institutions": res["institutions"].count or 0,
+        "fields": fields
+    }
+
+
 @overview_bp.route("/api/overview/stats", methods=["GET"])
+@cached(ttl=300)
+@coalesced
 def overview_stats():
-    researchers = (
-        supabase.table("researchers")
-        .select("id", count="exact")
-        .execute()
-        .count or 0
-    )
-
-    countries = (
-        supabase.table("country_info")
-        .select("id", count="exact")
-        .execute()
-        .count or 0
-    )
-
-    institutions = (
-        supabase.table("institution_info")
-        .select("id", count="exact")
-        .execute()
-        .count or 0
-    )
-
-    rows = (
-        supabase
-        .table("articles")
-        .select("research_area_path")
-        .execute()
-        .data or []
-    )
-
-    field_set = set()
-    for r in rows:
-        if r.get("research_area_path"):
-            field_set.update(
-                p.strip().lower()
-                for p in r["research_area_path"].split(">")
-                if p.strip()
-            )
+    res = QueryBatch().add_all(stats_queries(supabase)).execute()
+    return jsonify(stats_card(res, field_index.count()))
 
-    return jsonify({
-        "researchers": researchers,
-        "countries": countries,
-        "institutions": institutions,
-        "fields": len(field_set)
-    })
+
+@async_view("overview.overview_stats")
+async def overview_stats_async(args):
+    res = await AsyncQueryBatch().add_all(stats_queries(async_supabase)).execute()
+    # The field index builds with blocking calls on first use
+    return stats_card(res, await anyio.to_thread.run_sync(field_index.count))
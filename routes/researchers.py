@@ -1,22 +1,22 @@
+import math
+import threading
+from datetime import datetime
+
+from cachetools import TTLCache, cached as ttl_cached
 from flask import Blueprint, request, jsonify
 from db.supabase import supabase
+from db.async_supabase import async_supabase
+from db.async_views import async_view
+from db.batch import BatchLoader, ids_arg
+from db.cache import cached
+from db.coauthor_graph import coauthor_graph
+from db.histograms import field_histograms
+from db.leaderboards import researcher_leaderboards
+from db.name_index import researcher_name_index
 from collections import Counter, defaultdict
 
 researcher_bp = Blueprint("researcher", __name__)
 
-# --------------------------------------------------
-# Helper: normalize research fields
-# --------------------------------------------------
-def normalize_fields(path: str):
-    """
-    'Computer Science > Quantum Computing'
-    → ['computer science', 'quantum computing']
-    """
-    if not path:
-        return []
-    return [p.strip().lower() for p in path.split(">") if p.strip()]
-
-
 # --------------------------------------------------
 # 1️⃣ Researcher autocomplete (type → closest name)
 # --------------------------------------------------
@@ -45,149 +45,183 @@ def normalize_fields(path: str):
 # --------------------------------------------------
 @researcher_bp.route("/api/researcher/<researcher_id>/overview", methods=["GET"])
 def researcher_overview(researcher_id):
-    researcher = (
-        supabase
+    researcher = researcher_overview_query(supabase, researcher_id).execute().data
+
+    return jsonify(researcher)
+
+
+@async_view("researcher.researcher_overview")
+async def researcher_overview_async(args, researcher_id):
+    return (await researcher_overview_query(async_supabase, researcher_id).execute()).data
+
+
+def researcher_overview_query(client, researcher_id):
+    return (
+        client
         .table("researchers")
-        .select("""
-            id,
-            full_name,
-            orcid,
-            h_index,
-            rii,
-            total_publications,
-            total_citations
-        """)
+        .select(RESEARCHER_CARD_COLUMNS)
         .eq("id", researcher_id)
         .single()
-        .execute()
-        .data
     )
 
-    return jsonify(researcher)
+
+RESEARCHER_CARD_COLUMNS = "id,full_name,orcid,h_index,rii,total_publications,total_citations"
+researcher_cards = BatchLoader("researchers", RESEARCHER_CARD_COLUMNS)
 
 
 # --------------------------------------------------
-# 3️⃣ Researcher articles
+# Researcher cards for a list of ids (?ids=1,2,3), keyed by id
 # --------------------------------------------------
-@researcher_bp.route("/api/researcher/<researcher_id>/articles", methods=["GET"])
-def researcher_articles(researcher_id):
-    rows = (
-        supabase
-        .table("authorships")
-        .select("""
-            articles(
-                id,
-                title,
-                publication_date,
-                journal_name,
-                cited_by_count
-            )
-        """)
-        .eq("researcher_id", researcher_id)
-        .execute()
-        .data or []
-    )
+@researcher_bp.route("/api/researchers/batch", methods=["GET"])
+def researchers_batch():
+    try:
+        ids = ids_arg(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(researcher_cards.load(ids))
+
 
-    articles = [r["articles"] for r in rows if r.get("articles")]
-    return jsonify(articles)
+@async_view("researcher.researchers_batch")
+async def researchers_batch_async(args):
+    try:
+        ids = ids_arg(args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    return await researcher_cards.load_async(ids)
 
 
 # --------------------------------------------------
-# 4️⃣ Co-author network
+# 3️⃣ Researcher articles
 # --------------------------------------------------
-# @researcher_bp.route("/api/researcher/<researcher_id>/coauthors", methods=["GET"])
-# def researcher_coauthors(researcher_id):
+ARTICLE_COLUMNS = ("id", "title", "publication_date", "journal_name", "cited_by_count")
 
-#     # articles written by researcher
-#     article_rows = (
-#         supabase
-#         .table("authorships")
-#         .select("article_id")
-#         .eq("researcher_id", researcher_id)
-#         .execute()
-#         .data or []
-#     )
+# ?order= → how cursor values of that column are validated
+ARTICLE_ORDERS = {
+    "publication_date": datetime.fromisoformat,
+    "cited_by_count": int,
+}
 
-#     article_ids = [r["article_id"] for r in article_rows]
-#     if not article_ids:
-#         return jsonify([])
 
-#     rows = (
-#         supabase
-#         .table("authorships")
-#         .select("""
-#             researcher_id,
-#             researchers(
-#                 id,
-#                 full_name,
-#                 h_index,
-#                 rii
-#             )
-#         """)
-#         .in_("article_id", article_ids)
-#         .neq("researcher_id", researcher_id)
-#         .execute()
-#         .data or []
-#     )
+# Articles of a researcher, newest or most cited first. Without ?limit=,
+# ?cursor= or ?order= the whole list is returned, as before paging;
+# with any of them, a page keyset-paginated on (order column, id).
+# ?fields= picks the columns (id and the order column are always
+# included, the cursor is built from them).
+@researcher_bp.route("/api/researcher/<researcher_id>/articles", methods=["GET"])
+def researcher_articles(researcher_id):
+    paged = any(p in request.args for p in ("limit", "cursor", "order"))
+    try:
+        researcher_id = int(researcher_id)
+        limit = min(max(1, int(request.args.get("limit", 20))), 200)
+    except ValueError:
+        return jsonify({"error": "researcher_id and limit must be integers"}), 400
+
+    order = request.args.get("order", "publication_date")
+    if order not in ARTICLE_ORDERS:
+        return jsonify({"error": f"order must be one of {', '.join(ARTICLE_ORDERS)}"}), 400
+
+    fields = request.args.get("fields")
+    columns = [c.strip() for c in fields.split(",") if c.strip()] if fields else list(ARTICLE_COLUMNS)
+    unknown = [c for c in columns if c not in ARTICLE_COLUMNS]
+    if unknown:
+        return jsonify({"error": f"unknown fields: {', '.join(unknown)}"}), 400
+    columns = [c for c in ARTICLE_COLUMNS if c in columns or c in ("id", order)]
+
+    # Filter articles through the join instead of embedding them, so the
+    # ordering and the cursor apply to article columns
+    query = (
+        supabase
+        .table("articles")
+        .select(f"{','.join(columns)},authorships!inner(researcher_id)")
+        .eq("authorships.researcher_id", researcher_id)
+        .order(order, desc=True, nullsfirst=False)
+        .order("id", desc=True)
+    )
+    if paged:
+        query = query.limit(limit)
 
-#     coauthor_counter = defaultdict(int)
-#     coauthors = {}
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            query = apply_cursor(query, cursor, order, ARTICLE_ORDERS[order])
+        except ValueError:
+            return jsonify({"error": "invalid cursor"}), 400
 
-#     for r in rows:
-#         res = r.get("researchers")
-#         if res:
-#             coauthor_counter[res["id"]] += 1
-#             coauthors[res["id"]] = res
+    articles = query.execute().data or []
+    for a in articles:
+        a.pop("authorships", None)
 
-#     result = [
-#         {
-#             "id": rid,
-#             "name": coauthors[rid]["full_name"],
-#             "h_index": coauthors[rid]["h_index"],
-#             "rii": coauthors[rid]["rii"],
-#             "shared_articles": coauthor_counter[rid]
-#         }
-#         for rid in coauthors
-#     ]
+    if not paged:
+        return jsonify(articles)
+
+    return jsonify({
+        "articles": articles,
+        "order": order,
+        "limit": limit,
+        "next_cursor": encode_cursor(articles[-1], order) if len(articles) == limit else None
+    })
 
-#     result.sort(key=lambda x: x["shared_articles"], reverse=True)
 
-#     return jsonify(result)
+# --------------------------------------------------
+# Helper: ?limit=k
+# --------------------------------------------------
+def limit_arg():
+    """?limit=k (top-k by weight); None when absent or invalid."""
+    try:
+        return max(0, int(request.args["limit"]))
+    except (KeyError, ValueError):
+        return None
 
 
+# --------------------------------------------------
+# 4️⃣ Co-author network (in-memory co-authorship graph)
+# --------------------------------------------------
+def coauthor_card(cols, node, **extra):
+    r = cols.r_rows[node]
+    return {"id": r["id"], "name": r["full_name"], "h_index": r.get("h_index"), "rii": r.get("rii"), **extra}
+
 
 @researcher_bp.route("/api/researcher/<researcher_id>/coauthors", methods=["GET"])
 def researcher_coauthors(researcher_id):
-
-    row = (
-        supabase
-        .table("researchers")
-        .select("full_name, co_authorship")
-        .eq("id", researcher_id)
-        .single()
-        .execute()
-    )
-
-    data = row.data
-    if not data or not data.get("co_authorship"):
+    try:
+        researcher_id = int(researcher_id)
+    except ValueError:
+        return jsonify({"error": "researcher_id must be an integer"}), 400
+
+    graph = coauthor_graph.get()
+    node = graph.node(researcher_id)
+    if node is None:
         return jsonify([])
 
-    researcher_name = data["full_name"].strip()
+    # Strongest collaborations first (shared articles, then id)
+    nodes, weights = graph.coauthors(node, limit_arg())
+    return jsonify([
+        coauthor_card(graph.cols, n, shared_articles=int(w))
+        for n, w in zip(nodes, weights)
+    ])
 
-    coauthors = [
-        name.strip()
-        for name in data["co_authorship"].split("/")
-        if name.strip() and name.strip() != researcher_name
-    ]
 
-    result = [
-        {
-            "name": name
-        }
-        for name in sorted(set(coauthors))
-    ]
+@researcher_bp.route("/api/researcher/<researcher_id>/coauthors/second-degree", methods=["GET"])
+def researcher_second_degree(researcher_id):
+    try:
+        researcher_id = int(researcher_id)
+    except ValueError:
+        return jsonify({"error": "researcher_id must be an integer"}), 400
 
-    return jsonify(result)
+    graph = coauthor_graph.get()
+    node = graph.node(researcher_id)
+    if node is None:
+        return jsonify([])
+
+    # Co-authors of co-authors, by how many co-authors they share
+    limit = limit_arg()
+    nodes, via, strength = graph.second_degree(node, 20 if limit is None else limit)
+    return jsonify([
+        coauthor_card(graph.cols, n, shared_coauthors=int(v), strength=int(s))
+        for n, v, s in zip(nodes, via, strength)
+    ])
 
 
 
@@ -236,6 +270,11 @@ def researcher_coauthors(researcher_id):
 @researcher_bp.route("/api/researcher/<researcher_id>/fields", methods=["GET"])
 def researcher_field_stats(researcher_id):
 
+    # Served from the precomputed histograms once the batch job has run
+    stats = field_histograms.top("researchers", researcher_id, 5)
+    if stats is not None:
+        return jsonify(stats)
+
     rows = (
         supabase
         .table("authorships")
@@ -284,112 +323,111 @@ def researcher_field_stats(researcher_id):
 # 6️⃣ Top 5 researchers (h-index vs RII comparison)
 # --------------------------------------------------
 @researcher_bp.route("/api/researchers/top5/hindex-rii", methods=["GET"])
+@cached(ttl=600)
 def top5_researchers_hindex_rii():
-    rows = (
-        supabase
-        .table("researchers")
-        .select("""
-            id,
-            full_name,
-            h_index,
-            rii
-        """)
-        .order("h_index", desc=True)
-        .order("rii", desc=True)
-        .limit(5)
-        .execute()
-        .data or []
-    )
+    # Precomputed ranking: h_index desc, then rii desc
+    rows = researcher_leaderboards.top(("global",), "h_index_rii", 5)
 
     result = [
         {
             "id": r["id"],
             "name": r["full_name"],
             "h_index": r["h_index"],
-            "rii": float(r["rii"])
+            "rii": float(r["rii"]) if r["rii"] is not None else None
         }
         for r in rows
     ]
 
     return jsonify(result)
 
-# Add this new endpoint to get all researchers with pagination
-@researcher_bp.route("/api/researchers/all", methods=["GET"])
-def get_all_researchers():
-    page = int(request.args.get("page", 1))
-    limit = int(request.args.get("limit", 20))
-    offset = (page - 1) * limit
-
-    # Get total count
-    count_res = (
+# --------------------------------------------------
+# Helper: researcher total, cached and refreshed every 5 minutes
+# --------------------------------------------------
+@ttl_cached(TTLCache(maxsize=1, ttl=300), lock=threading.Lock())
+def researchers_total():
+    # Planner estimate: cheap on big tables, exact enough for page counts
+    return (
         supabase
         .table("researchers")
-        .select("id", count="exact")
+        .select("id", count="estimated")
+        .limit(1)
         .execute()
+        .count or 0
     )
-    total_count = count_res.count
 
-    # Get paginated researchers
-    researchers = (
+
+# --------------------------------------------------
+# Helper: (column, id) keyset cursor  →  "12:345" / "null:345"
+# --------------------------------------------------
+def encode_cursor(row, column: str = "h_index"):
+    v = row.get(column)
+    return f"{'null' if v is None else v}:{row['id']}"
+
+
+def apply_cursor(query, cursor: str, column: str = "h_index", parse=float):
+    """Rows strictly after the cursor in (column desc nulls last, id desc) order."""
+    v, rid = cursor.rsplit(":", 1)
+    rid = int(rid)
+    if v == "null":
+        return query.is_(column, "null").lt("id", rid)
+
+    # reject anything that is not a value of the column
+    value = parse(v)
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"non-finite cursor value {v!r}")
+    return query.or_(f"{column}.lt.{v},and({column}.eq.{v},id.lt.{rid}),{column}.is.null")
+
+
+# Get all researchers, keyset-paginated on (h_index, id)
+@researcher_bp.route("/api/researchers/all", methods=["GET"])
+def get_all_researchers():
+    try:
+        page = max(1, int(request.args.get("page", 1)))
+        limit = max(1, int(request.args.get("limit", 20)))
+    except ValueError:
+        return jsonify({"error": "page and limit must be integers"}), 400
+    cursor = request.args.get("cursor")
+
+    query = (
         supabase
         .table("researchers")
         .select("id,full_name,h_index,rii,total_publications,total_citations")
-        .order("h_index", desc=True)
-        .range(offset, offset + limit - 1)
-        .execute()
-        .data or []
+        .order("h_index", desc=True, nullsfirst=False)
+        .order("id", desc=True)
+        .limit(limit)
     )
 
+    if cursor:
+        try:
+            query = apply_cursor(query, cursor)
+        except ValueError:
+            return jsonify({"error": "invalid cursor"}), 400
+    elif page > 1:
+        # Legacy ?page=N still works, but deep pages cost an OFFSET scan;
+        # follow next_cursor instead.
+        query = query.offset((page - 1) * limit)
+
+    researchers = query.execute().data or []
+    total_count = researchers_total()
+
     return jsonify({
         "researchers": researchers,
         "total": total_count,
         "page": page,
         "limit": limit,
-        "total_pages": (total_count + limit - 1) // limit
+        "total_pages": (total_count + limit - 1) // limit,
+        "next_cursor": encode_cursor(researchers[-1]) if len(researchers) == limit else None
     })
 
-# Update the search endpoint to search from first letter
+# --------------------------------------------------
+# Researcher autocomplete (served from the in-memory name index)
+# --------------------------------------------------
 @researcher_bp.route("/api/researchers/search", methods=["GET"])
 def search_researchers():
-    q = request.args.get("q", "").strip().lower()
-    
+    q = request.args.get("q", "").strip()
     if not q:
         return jsonify([])
-    
-    # Search for researchers whose name starts with the search term
-    # Then also include researchers whose name contains the search term
-    query = supabase.table("researchers").select("id,full_name")
-    
-    # First try exact start match
-    start_match = (
-        query
-        .ilike("full_name", f"{q}%")
-        .order("full_name")
-        .limit(10)
-        .execute()
-        .data or []
-    )
-    
-    # If we have less than 10, add contains matches
-    if len(start_match) < 10:
-        contains_match = (
-            supabase
-            .table("researchers")
-            .select("id,full_name")
-            .ilike("full_name", f"%{q}%")
-            .order("full_name")
-            .limit(10 - len(start_match))
-            .execute()
-            .data or []
-        )
-        
-        # Combine results, avoiding duplicates
-        start_ids = {r["id"] for r in start_match}
-        combined = start_match.copy()
-        for r in contains_match:
-            if r["id"] not in start_ids:
-                combined.append(r)
-        
-        return jsonify(combined[:10])
-    
-    return jsonify(start_match[:10])
+
+    # Name prefix first, then word prefix, substring, and typo matches
+    fuzzy = request.args.get("fuzzy", "1") != "0"
+    return jsonify(researcher_name_index.search(q, 10, fuzzy=fuzzy))
@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+import pytest
+
+# Read when db.* is imported: no real Supabase, no background delta loop,
+# and a data-version file of our own
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test")
+os.environ.setdefault("INCREMENTAL_REFRESH", "false")
+os.environ.setdefault("DATA_VERSION_RELOAD_SECONDS", "0")
+os.environ.setdefault("DATA_VERSION_PATH", os.path.join(tempfile.mkdtemp(), "DATA_VERSION"))
+
+from bench.synthetic import generate  # noqa: E402
+from db.local_postgrest import LocalPostgrestTransport  # noqa: E402
+from db.supabase import set_transport  # noqa: E402
+
+
+@pytest.fixture
+def serve():
+    """serve(tables): answer db.supabase queries from these tables."""
+    def serve(tables):
+        set_transport(LocalPostgrestTransport(tables))
+        return tables
+
+    yield serve
+    set_transport(None)
+
+
+@pytest.fixture(scope="session")
+def tables():
+    tables = generate(600)
+    # Like the real data, some authorships have no institution
+    for a in tables["authorships"][::25]:
+        a["institution_id"] = None
+    return tables
+
+
+@pytest.fixture
+def client(serve, tables):
+    """Flask test client over the synthetic tables."""
+    from app import app
+
+    serve(tables)
+    return app.test_client()
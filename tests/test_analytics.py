@@ -0,0 +1,42 @@
+import numpy as np
+
+from db.authorship_index import AuthorshipColumns
+from db.leaderboards import Leaderboards
+
+METRICS = {"h_index": ["r_h"], "rii": ["r_rii"]}
+
+
+def columns(tables):
+    return AuthorshipColumns(tables["authorships"], tables["researchers"], tables["institution_info"])
+
+
+def test_mask_unknown_institution_matches_nothing(tables):
+    cols = columns(tables)
+    # the data has authorships without an institution: they must not match
+    assert (cols.institution < 0).any()
+    assert not cols.mask(institution_id=999999).any()
+    assert not cols.mask(country_id=2, institution_id=999999).any()
+
+    known = int(cols.i_ids[0])
+    assert (cols.institution[cols.mask(institution_id=known)] == 0).all()
+
+
+def test_unknown_institution_scope_is_empty(tables):
+    boards = Leaderboards("researcher", METRICS)
+    boards._subscribed = True
+    boards._sync(columns(tables))
+    assert boards.top(("institution", 999999), "h_index", 10) == []
+
+
+def test_analytics_unknown_institution(client):
+    body = client.get("/analytics?country_id=2&institution_id=999999").get_json()
+    assert body["metrics"] == {"average_h_index": 0, "average_rii": 0}
+    assert body["top_researchers"] == {"by_h_index": [], "by_rii": []}
+
+
+def test_analytics_filters_agree_with_rows(client, tables):
+    body = client.get("/analytics?country_id=2").get_json()
+    authors = {a["researcher_id"] for a in tables["authorships"] if a["country_id"] == 2}
+    h = [r["h_index"] for r in tables["researchers"] if r["id"] in authors and r["h_index"] is not None]
+    assert body["metrics"]["average_h_index"] == round(float(np.mean(h)), 2)
+    assert {r["id"] for r in body["top_researchers"]["by_h_index"]} <= authors
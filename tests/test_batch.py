@@ -0,0 +1,40 @@
+import pytest
+
+from db.batch import BatchLoader, ids_arg
+
+
+def test_ids_arg():
+    assert ids_arg({"ids": "3,1, 2,,3"}) == [3, 1, 2]
+    assert ids_arg({}) == []
+    with pytest.raises(ValueError):
+        ids_arg({"ids": "1,x"})
+    with pytest.raises(ValueError):
+        ids_arg({"ids": "1,2,3"}, max_ids=2)
+
+
+def test_load_caches_rows_and_misses(serve):
+    serve({"countries": [{"id": 1, "name": "Algeria"}, {"id": 2, "name": "Tunisia"}]})
+    loader = BatchLoader("countries", "id,name")
+    assert loader.load([2, 9, 1]) == {2: {"id": 2, "name": "Tunisia"}, 9: None, 1: {"id": 1, "name": "Algeria"}}
+
+    # served from memory until invalidated, misses included
+    serve({"countries": [{"id": 1, "name": "Algérie"}, {"id": 9, "name": "Morocco"}]})
+    assert loader.load([1, 9]) == {1: {"id": 1, "name": "Algeria"}, 9: None}
+
+    loader.invalidate()
+    assert loader.load([1, 9]) == {1: {"id": 1, "name": "Algérie"}, 9: {"id": 9, "name": "Morocco"}}
+
+
+def test_batch_endpoint(client, tables):
+    countries = {c["id"]: c for c in tables["country_info"]}
+    known = sorted(countries)[:2]
+
+    response = client.get(f"/api/countries/batch?ids={known[1]},999999,{known[0]}")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["999999"] is None
+    assert [body[str(i)]["name"] for i in known] == [countries[i]["name"] for i in known]
+
+    response = client.get("/api/countries/batch?ids=1,x")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
@@ -0,0 +1,43 @@
+from db.cache import CachedResponse, response_cache, versioned_key
+from db.data_version import DataVersion, invalidate_prefix
+
+
+def store(key):
+    response_cache.set(versioned_key(key, "1"), CachedResponse(b"{}", 200, "application/json", 60))
+
+
+def cached(key):
+    return response_cache.get(versioned_key(key, "1"), "test") is not None
+
+
+def test_prefix_invalidation_reaches_other_workers(tmp_path):
+    token, invalidations = str(tmp_path / "DATA_VERSION"), str(tmp_path / "invalidations")
+    # what another gunicorn worker does when it re-reads the token
+    worker = DataVersion(token, invalidations)
+    worker.current()
+
+    store("/api/overview/countries")
+    store("/api/country/2/overview")
+    invalidate_prefix("/api/overview", invalidations)
+    assert cached("/api/overview/countries")
+
+    worker.invalidate()
+    worker.current()
+    assert not cached("/api/overview/countries")
+    assert cached("/api/country/2/overview")
+
+    # applied once: later checks leave new entries alone
+    store("/api/overview/countries")
+    worker.invalidate()
+    worker.current()
+    assert cached("/api/overview/countries")
+
+
+def test_new_worker_skips_old_invalidations(tmp_path):
+    invalidations = str(tmp_path / "invalidations")
+    invalidate_prefix("", invalidations)
+    store("/api/overview/stats")
+
+    worker = DataVersion(str(tmp_path / "DATA_VERSION"), invalidations)
+    worker.current()
+    assert cached("/api/overview/stats")
@@ -0,0 +1,81 @@
+from collections import Counter, defaultdict
+
+import pytest
+
+import db.coauthor_graph as coauthor_graph
+from db.authorship_index import AuthorshipColumns
+from db.coauthor_graph import CoauthorGraph
+
+
+@pytest.fixture(scope="module")
+def cols(tables):
+    return AuthorshipColumns(tables["authorships"], tables["researchers"], tables["institution_info"])
+
+
+def shared_articles(authorships, max_authors):
+    """researcher id → Counter(co-author id → shared articles), the slow way."""
+    authors = defaultdict(set)
+    for a in authorships:
+        if a["researcher_id"] is not None:
+            authors[a["article_id"]].add(a["researcher_id"])
+
+    shared = defaultdict(Counter)
+    for members in authors.values():
+        if len(members) > max_authors:
+            continue
+        for a in members:
+            for b in members - {a}:
+                shared[a][b] += 1
+    return shared
+
+
+def ids(cols, nodes):
+    return cols.r_ids[nodes].tolist()
+
+
+@pytest.mark.parametrize("max_authors", [200, 3])
+def test_coauthors_match_shared_articles(monkeypatch, tables, cols, max_authors):
+    monkeypatch.setattr(coauthor_graph, "MAX_AUTHORS", max_authors)
+    graph = CoauthorGraph(cols)
+    shared = shared_articles(tables["authorships"], max_authors)
+
+    for researcher_id in cols.r_ids[::7].tolist():
+        nodes, weights = graph.coauthors(graph.node(researcher_id))
+        expected = sorted(shared[researcher_id].items(), key=lambda kv: (-kv[1], -kv[0]))
+        assert list(zip(ids(cols, nodes), weights.tolist())) == expected
+
+
+def test_second_degree(tables, cols):
+    graph = CoauthorGraph(cols)
+    shared = shared_articles(tables["authorships"], coauthor_graph.MAX_AUTHORS)
+    researcher_id = max(shared, key=lambda r: len(shared[r]))
+    direct = shared[researcher_id]
+
+    via, strength = Counter(), Counter()
+    for c, w1 in direct.items():
+        for d, w2 in shared[c].items():
+            if d != researcher_id and d not in direct:
+                via[d] += 1
+                strength[d] += min(w1, w2)
+    expected = sorted(via, key=lambda d: (-via[d], -strength[d], -d))
+
+    nodes, shared_coauthors, total = graph.second_degree(graph.node(researcher_id))
+    assert ids(cols, nodes) == expected
+    assert shared_coauthors.tolist() == [via[d] for d in expected]
+    assert total.tolist() == [strength[d] for d in expected]
+
+    # k keeps the best
+    nodes, _, _ = graph.second_degree(graph.node(researcher_id), k=3)
+    assert ids(cols, nodes) == expected[:3]
+
+
+def test_unknown_researcher(cols):
+    assert CoauthorGraph(cols).node(-1) is None
+
+
+def test_chunked_build_matches(monkeypatch, cols):
+    graph = CoauthorGraph(cols)
+    monkeypatch.setattr(coauthor_graph, "CHUNK_PAIRS", 16)
+    chunked = CoauthorGraph(cols)
+    for name in ("indptr", "indices", "weights"):
+        assert getattr(graph, name).tolist() == getattr(chunked, name).tolist()
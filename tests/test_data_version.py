@@ -0,0 +1,52 @@
+from collections import Counter
+
+from db import histograms
+from db.cache import response_cache
+from db.data_version import data_version
+from db.histograms import FieldHistograms
+from db.name_index import NameIndex
+
+
+def test_index_refresh_moves_data_version(serve):
+    rows = [{"id": 1, "full_name": "Leila Garcia"}]
+    serve({"researchers": rows})
+    index = NameIndex()
+    index.refresh()
+    before = data_version.current()
+
+    # a rebuild over the same rows keeps the token (and clients' ETags)
+    index.refresh()
+    assert data_version.current() == before
+
+    serve({"researchers": rows + [{"id": 2, "full_name": "Yacine Dubois"}]})
+    index.refresh()
+    assert data_version.current() != before
+
+
+def save(path, fields):
+    counts = histograms._empty_counts()
+    counts["countries"]["2"] = Counter(fields)
+    histograms._save(counts, 1, path)  # bumps the data version
+
+
+def test_histograms_reload_with_the_data_version(tmp_path):
+    path = str(tmp_path / "field_histograms.json")
+    save(path, ["networks"])
+    stats = FieldHistograms(path)
+    assert stats.top("countries", 2)[0]["field"] == "networks"
+
+    # well within RELOAD_SECONDS: only the bump makes it look again
+    save(path, ["genetics", "genetics", "networks"])
+    data_version.current()
+    assert stats.top("countries", 2)[0]["field"] == "genetics"
+
+
+def test_bump_empties_the_response_cache(client):
+    path = "/api/overview/countries"
+    first = client.get(path).get_json()
+    assert response_cache.stats()["size"] > 0
+
+    histograms.bump()
+    assert data_version.current()
+    assert response_cache.stats()["size"] == 0
+    assert client.get(path).get_json() == first
@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+import pytest
+
+from db.compression import SUPPORTED, negotiate
+from db.etag import if_none_match, make_etag
+
+
+# --------------------------------------------------
+# Content negotiation
+# --------------------------------------------------
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0", None),
+    ("GZIP;q=0.5", "gzip"),
+    ("gzip;q=bogus", None),
+    ("*", SUPPORTED[0]),
+    ("*, gzip;q=0", "br" if "br" in SUPPORTED else None),
+])
+def test_negotiate(header, expected):
+    assert negotiate(header) == expected
+
+
+def test_negotiate_prefers_higher_q():
+    if "br" not in SUPPORTED:
+        pytest.skip("brotli not installed")
+    assert negotiate("gzip, br") == "br"
+    assert negotiate("gzip;q=1, br;q=0.5") == "gzip"
+
+
+# --------------------------------------------------
+# Conditional GET
+# --------------------------------------------------
+def test_if_none_match():
+    etag = make_etag("1.2", "/api/x?a=1", "gzip")
+    assert etag == make_etag("1.2", "/api/x?a=1", "gzip")
+    assert etag != make_etag("1.2", "/api/x?a=1", None)
+    assert etag != make_etag("1.3", "/api/x?a=1", "gzip")
+
+    assert if_none_match(etag, etag)
+    assert if_none_match(f'"other", W/{etag}', etag)
+    assert if_none_match("*", etag)
+    assert not if_none_match(None, etag)
+    assert not if_none_match('"other"', etag)
+
+
+# --------------------------------------------------
+# Same headers from app.py and asgi.py
+# --------------------------------------------------
+SHARED_HEADERS = ("ETag", "Cache-Control", "Vary", "Access-Control-Allow-Origin", "Content-Type")
+
+
+def test_entry_points_send_the_same_headers(client, tables):
+    from asgi import app as asgi_app
+
+    ids = ",".join(str(r["id"]) for r in tables["researchers"][:5])
+    # a route asgi.py serves natively, not through the Flask app
+    path = f"/api/researchers/batch?ids={ids}"
+    accept = {"Accept-Encoding": "gzip"}
+
+    async def asgi_get(headers):
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await ac.get(path, headers=headers)
+
+    flask_full = client.get(path, headers=accept)
+    asgi_full = asyncio.run(asgi_get(accept))
+    conditional = {**accept, "If-None-Match": flask_full.headers["ETag"]}
+    flask_304 = client.get(path, headers=conditional)
+    asgi_304 = asyncio.run(asgi_get(conditional))
+
+    for flask_response, asgi_response, status in [(flask_full, asgi_full, 200), (flask_304, asgi_304, 304)]:
+        assert flask_response.status_code == asgi_response.status_code == status
+        for name in SHARED_HEADERS:
+            if name == "Content-Type" and status == 304:
+                continue
+            assert flask_response.headers.get(name) == asgi_response.headers.get(name), (status, name)
+        assert "Server-Timing" in flask_response.headers and "server-timing" in asgi_response.headers
@@ -0,0 +1,272 @@
+import numpy as np
+import pytest
+
+import db.incremental as incremental
+import db.coauthor_graph as coauthor_graph
+from db.authorship_index import AuthorshipColumns, AuthorshipIndex, _ids, _upsert, added_rows
+from db.coauthor_graph import CoauthorGraph
+from db.field_index import FieldIndex
+from db.incremental import DeltaFeed, RefreshEngine
+from db.leaderboards import Leaderboards
+
+COLUMNS = [
+    "r_ids", "r_h", "r_rii", "i_ids", "i_h", "i_rii",
+    "ids", "article", "country", "researcher", "institution",
+    "ci_country", "ci_institution",
+]
+METRICS = {"h_index": ["r_h"], "rii": ["r_rii"], "h_index_rii": ["r_h", "r_rii"]}
+
+
+def split(tables, keep: float = 0.8):
+    """(base, full): base holds the oldest `keep` of every table's rows by id."""
+    base = {}
+    for name, rows in tables.items():
+        rows = sorted(rows, key=lambda r: r["id"])
+        base[name] = rows[:int(len(rows) * keep)]
+    return base, tables
+
+
+def assert_same_columns(a, b):
+    for name in COLUMNS:
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name), err_msg=name)
+    assert [r["id"] for r in a.r_rows] == [r["id"] for r in b.r_rows]
+    assert [i["id"] for i in a.i_rows] == [i["id"] for i in b.i_rows]
+
+
+# --------------------------------------------------
+# _upsert
+# --------------------------------------------------
+def values(rows):
+    return [_ids(r["v"] for r in rows)]
+
+
+def test_upsert_inserts_and_replaces_by_id():
+    ids = np.array([1, 3, 5], dtype=np.int64)
+    arrays = [np.array([10, 30, 50], dtype=np.int64)]
+    rows = [{"id": 1, "v": 10}, {"id": 3, "v": 30}, {"id": 5, "v": 50}]
+    delta = [{"id": 4, "v": 40}, {"id": 3, "v": 33}, {"id": 0, "v": 0}, {"id": 4, "v": 41}]
+
+    new_ids, (new_values,), new_rows = _upsert(ids, arrays, rows, delta, values)
+
+    assert new_ids.tolist() == [0, 1, 3, 4, 5]
+    # the last row of a repeated id wins
+    assert new_values.tolist() == [0, 10, 33, 41, 50]
+    assert [r["v"] for r in new_rows] == [0, 10, 33, 41, 50]
+    # copy on write: the old snapshot is untouched
+    assert ids.tolist() == [1, 3, 5]
+    assert arrays[0].tolist() == [10, 30, 50]
+    assert [r["v"] for r in rows] == [10, 30, 50]
+
+
+def test_upsert_without_rows():
+    ids = np.array([2], dtype=np.int64)
+    new_ids, (new_values,), new_rows = _upsert(ids, [np.array([20])], None, [{"id": 1, "v": 10}], values)
+    assert new_ids.tolist() == [1, 2]
+    assert new_values.tolist() == [10, 20]
+    assert new_rows is None
+
+
+# --------------------------------------------------
+# DeltaFeed marks
+# --------------------------------------------------
+def test_delta_feed_id_marks(serve):
+    rows = [{"id": i, "name": f"r{i}"} for i in range(1, 6)]
+    serve({"researchers": rows})
+    feed = DeltaFeed("researchers", "id,name", page_size=2)
+
+    assert feed.fetch() == []  # nothing before the first scan
+    assert [r["id"] for r in feed.scan()] == [1, 2, 3, 4, 5]
+    assert feed.mark == (5, 5)
+
+    serve({"researchers": rows + [{"id": i, "name": f"r{i}"} for i in range(6, 11)]})
+    # more than one page past the mark
+    assert [r["id"] for r in feed.fetch()] == [6, 7, 8, 9, 10]
+    assert feed.mark == (10, 10)
+    assert feed.fetch() == []
+
+
+def test_delta_feed_updated_at_marks(serve, monkeypatch):
+    monkeypatch.setitem(incremental.MARK_COLUMNS, "researchers", "updated_at")
+    rows = [
+        {"id": 1, "updated_at": "2025-01-01T00:00:00+00:00"},
+        {"id": 2, "updated_at": "2025-01-02T00:00:00+00:00"},
+        {"id": 3, "updated_at": None},
+    ]
+    serve({"researchers": rows})
+    feed = DeltaFeed("researchers", "id", page_size=2)
+    assert feed.columns == "id,updated_at"
+
+    list(feed.scan())
+    # rows without a value do not move the mark
+    assert feed.mark == ("2025-01-02T00:00:00+00:00", 2)
+
+    changed = [
+        {"id": 1, "updated_at": "2025-01-03T00:00:00+00:00"},
+        # same timestamp as the mark: only ids past it are new
+        {"id": 4, "updated_at": "2025-01-02T00:00:00+00:00"},
+        rows[1],
+        {"id": 5, "updated_at": "2025-01-03T00:00:00+00:00"},
+    ]
+    serve({"researchers": changed + [rows[2]]})
+    assert [r["id"] for r in feed.fetch()] == [4, 1, 5]
+    assert feed.mark == ("2025-01-03T00:00:00+00:00", 5)
+    assert feed.fetch() == []
+
+
+# --------------------------------------------------
+# Delta apply vs full rebuild
+# --------------------------------------------------
+@pytest.fixture
+def applied(serve, tables):
+    """(index built from the oldest rows, then given the rest as deltas; full rebuild)."""
+    base, full = split(tables)
+    serve(base)
+    index = AuthorshipIndex()
+    index.refresh()
+    old = index._columns
+
+    serve(full)
+    engine = RefreshEngine()
+    engine.register("authorship-index", index._feeds.values(), index.apply)
+    applied = engine.refresh()
+    assert applied["authorship-index"] > 0
+
+    rebuilt = AuthorshipColumns(full["authorships"], full["researchers"], full["institution_info"])
+    return old, index._columns, rebuilt
+
+
+def test_delta_apply_matches_full_rebuild(applied):
+    _old, cols, rebuilt = applied
+    assert_same_columns(cols, rebuilt)
+
+
+def test_added_rows(applied):
+    old, cols, _rebuilt = applied
+
+    added = added_rows(old, cols)
+    new = ~np.isin(cols.ids, old.ids)
+    assert added[new].all()
+    # rows already there only count when their researcher/institution just appeared
+    pos = np.searchsorted(cols.ids, old.ids)
+    assert (added[pos] == ((old.researcher < 0) & (cols.researcher[pos] >= 0)
+                           | (old.institution < 0) & (cols.institution[pos] >= 0))).all()
+
+    # a row whose article changed is not an addition
+    moved = cols.updated(authorships=[{
+        "id": int(old.ids[0]), "article_id": -5, "researcher_id": int(old.researcher_ids[0]),
+        "institution_id": int(old.institution_ids[0]), "country_id": int(old.country[0]),
+    }])
+    assert added_rows(old, moved) is None
+
+
+def test_leaderboards_follow_deltas(applied):
+    old, cols, rebuilt = applied
+    scopes = [("global",), ("authored",), ("country", 2), ("institution", 3)]
+
+    # synced by hand rather than through the process-wide authorship index
+    boards = Leaderboards("researcher", METRICS)
+    boards._subscribed = True
+    boards._sync(old)
+    for scope in scopes:
+        for metric in METRICS:
+            boards.top(scope, metric, 20)
+    boards._sync(cols)
+
+    fresh = Leaderboards("researcher", METRICS)
+    fresh._subscribed = True
+    fresh._sync(rebuilt)
+    for scope in scopes:
+        for metric in METRICS:
+            top = [r["id"] for r in boards.top(scope, metric, 20)]
+            assert top == [r["id"] for r in fresh.top(scope, metric, 20)], (scope, metric)
+
+
+def test_leaderboards_move_changed_metrics(applied):
+    _old, cols, _rebuilt = applied
+    boards = Leaderboards("researcher", METRICS)
+    boards._subscribed = True
+    boards._sync(cols)
+    first, last = boards.top(("global",), "h_index", 2)
+
+    boards._sync(cols.updated(researchers=[{**first, "h_index": None}, {**last, "h_index": 10**6}]))
+    top = [r["id"] for r in boards.top(("global",), "h_index", 2)]
+    assert top[0] == last["id"]
+    # no value any more: not ranked
+    assert first["id"] not in [r["id"] for r in boards.top(("global",), "h_index", len(cols.r_ids))]
+
+
+@pytest.mark.parametrize("max_authors", [200, 3])
+def test_coauthor_graph_update_matches_full_rebuild(applied, monkeypatch, max_authors):
+    # with a low cap, some articles pass it through the delta and lose their edges
+    monkeypatch.setattr(coauthor_graph, "MAX_AUTHORS", max_authors)
+    old, cols, rebuilt = applied
+
+    graph = CoauthorGraph(old).updated(cols)
+    fresh = CoauthorGraph(rebuilt)
+    for name in ("indptr", "indices", "weights"):
+        np.testing.assert_array_equal(getattr(graph, name), getattr(fresh, name), err_msg=name)
+
+
+def test_coauthor_graph_not_updated_past_changed_rows(applied):
+    old, cols, _rebuilt = applied
+    moved = cols.updated(authorships=[{
+        "id": int(cols.ids[0]), "article_id": -5, "researcher_id": int(cols.researcher_ids[0]),
+        "institution_id": int(cols.institution_ids[0]), "country_id": int(cols.country[0]),
+    }])
+    assert CoauthorGraph(old).updated(moved) is None
+
+
+# --------------------------------------------------
+# Field index
+# --------------------------------------------------
+def bitmaps(index):
+    return {f: list(bm) for f, bm in index._articles.items()}
+
+
+def test_field_index_delta_matches_full_rebuild(serve, tables):
+    base, full = split(tables)
+    serve(base)
+    index = FieldIndex()
+    index.refresh()
+
+    serve(full)
+    index.apply({"articles": index._feed.fetch()})
+
+    rebuilt = FieldIndex()
+    rebuilt.refresh()
+    assert index._data == rebuilt._data
+    assert bitmaps(index) == bitmaps(rebuilt)
+
+
+def test_field_index_drops_changed_article_from_old_fields(serve, monkeypatch):
+    monkeypatch.setitem(incremental.MARK_COLUMNS, "articles", "updated_at")
+    serve({"articles": [
+        {"id": 1, "research_area_path": "Computer Science > Networks", "updated_at": "2025-01-01"},
+        {"id": 2, "research_area_path": "Computer Science > AI", "updated_at": "2025-01-01"},
+    ]})
+    index = FieldIndex()
+    index.refresh()
+
+    serve({"articles": [
+        {"id": 1, "research_area_path": "Biology > Genetics", "updated_at": "2025-01-02"},
+        {"id": 2, "research_area_path": "Computer Science > AI", "updated_at": "2025-01-01"},
+    ]})
+    index.apply({"articles": index._feed.fetch()})
+
+    assert bitmaps(index) == {"computer science": [2], "ai": [2], "biology": [1], "genetics": [1]}
+    # no article left in it: gone from the taxonomy, as after a rebuild
+    assert index._data[0] == ["ai", "biology", "computer science", "genetics"]
+
+
+def test_field_index_generation(serve, tables):
+    base, full = split(tables)
+    serve(base)
+    index = FieldIndex()
+    index.refresh()
+    built = index.generation
+    index.refresh()
+    assert index.generation == built
+
+    serve(full)
+    index.apply({"articles": index._feed.fetch()})
+    assert index.generation not in (None, built)
@@ -0,0 +1,48 @@
+import pytest
+
+from db.authorship_index import AuthorshipColumns
+from db.leaderboards import Leaderboards
+
+METRICS = {"h_index": ["r_h"], "h_index_rii": ["r_h", "r_rii"]}
+
+
+@pytest.fixture(scope="module")
+def boards(tables):
+    cols = AuthorshipColumns(tables["authorships"], tables["researchers"], tables["institution_info"])
+    # synced by hand rather than through the process-wide authorship index
+    boards = Leaderboards("researcher", METRICS)
+    boards._subscribed = True
+    boards._sync(cols)
+    return boards
+
+
+def ranked(researchers, ids, metric):
+    """Ids of `researchers` in `ids` with a value, best first (ties by id desc)."""
+    def key(r):
+        return tuple(-(r[m] if r[m] is not None else float("-inf")) for m in metric) + (-r["id"],)
+
+    return [r["id"] for r in sorted(
+        (r for r in researchers if r["id"] in ids and r[metric[0]] is not None), key=key,
+    )]
+
+
+@pytest.mark.parametrize("scope", [("global",), ("authored",), ("country", 2), ("institution", 3)])
+@pytest.mark.parametrize("metric, columns", [("h_index", ["h_index"]), ("h_index_rii", ["h_index", "rii"])])
+def test_top_matches_sorted_rows(boards, tables, scope, metric, columns):
+    rows = tables["authorships"]
+    if scope[0] == "global":
+        ids = {r["id"] for r in tables["researchers"]}
+    else:
+        field = {"authored": None, "country": "country_id", "institution": "institution_id"}[scope[0]]
+        ids = {a["researcher_id"] for a in rows if field is None or a[field] == scope[1]}
+
+    expected = ranked(tables["researchers"], ids, columns)
+    assert expected
+    assert [r["id"] for r in boards.top(scope, metric, len(expected) + 5)] == expected
+    # pages are slices of the same ranking
+    assert [r["id"] for r in boards.top(scope, metric, 5, offset=3)] == expected[3:8]
+
+
+def test_unknown_scope(boards):
+    with pytest.raises(ValueError):
+        boards.top(("planet", 1), "h_index", 5)
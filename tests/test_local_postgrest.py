@@ -0,0 +1,68 @@
+import fsspec
+import pytest
+
+from db import snapshot
+from db.local_postgrest import LocalPostgrest
+from db.snapshot import SnapshotTransport, to_columns
+
+
+@pytest.fixture(scope="module")
+def engine(tables):
+    return LocalPostgrest(tables)
+
+
+def scanned(engine, name, params):
+    """The same query answered without any index."""
+    plain = LocalPostgrest({n: t.rows for n, t in engine.tables.items()})
+    for t in plain.tables.values():
+        t.lookup = lambda column, values, rows=t.rows: list(range(len(rows)))
+    return plain.query(name, params)
+
+
+@pytest.mark.parametrize("name, params", [
+    ("authorships", [("select", "id"), ("article_id", "gt.10"), ("researcher_id", "in.(1,5,3,null)")]),
+    ("authorships", [("select", "id"), ("country_id", "eq.1"), ("institution_id", "eq.2")]),
+    ("authorships", [("select", "id"), ("researcher_id", "not.in.(1,2)"), ("limit", "20")]),
+    ("authorships", [("select", "id"), ("institution_id", "eq.null")]),
+    ("articles", [("select", "id,authorships!inner(researcher_id)"), ("authorships.researcher_id", "in.(4,9)")]),
+    ("researchers", [
+        ("select", "id,authorships!inner(country_id)"), ("authorships.country_id", "eq.2"),
+        ("order", "id.desc"), ("limit", "5"),
+    ]),
+    ("authorships", [("select", "id,researchers!inner(id)"), ("researchers.id", "eq.3")]),
+])
+def test_index_lookups_match_scans(engine, name, params):
+    rows, total = engine.query(name, params)
+    assert (rows, total) == scanned(engine, name, params)
+
+
+def test_key_columns_indexed_up_front(engine):
+    assert {"id", "article_id", "researcher_id", "institution_id", "country_id"} <= set(
+        engine.table("authorships")._indexes
+    )
+
+
+def test_snapshot_reload(tmp_path):
+    fs = fsspec.filesystem("file")
+
+    def write(version, rows):
+        base = f"{tmp_path}/{version}/country_info"
+        fs.makedirs(base, exist_ok=True)
+        columns = to_columns(rows)
+        for column, values in columns.items():
+            snapshot._write_json(fs, f"{base}/{column}.json.gz", values, compression="gzip")
+        snapshot._write_json(fs, f"{tmp_path}/{version}/_meta.json", {
+            "version": version, "tables": {"country_info": {"columns": list(columns), "rows": len(rows)}},
+        })
+        snapshot._write_json(fs, f"{tmp_path}/CURRENT", {"version": version})
+
+    write("v1", [{"id": 1, "name": "Algeria"}])
+    transport = SnapshotTransport(str(tmp_path))
+    assert transport.engine.query("country_info", [("select", "name")])[0] == [{"name": "Algeria"}]
+
+    write("v2", [{"id": 1, "name": "Algérie"}])
+    served = transport.engine
+    transport.reload()
+    assert transport.version == "v2"
+    assert transport.engine is not served
+    assert transport.engine.query("country_info", [("select", "name")])[0] == [{"name": "Algérie"}]
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from db.name_index import NameData, normalize_name, prefix_distance, researcher_name_index
+
+NAMES = [
+    "Amélie Dupont-Roy", "Leila Garcia", "Garcia Lopez", "Karim Benali",
+    "Sofiane Khan", "Ines Belkacem", "Nour Rossi", "Maya Haddad",
+]
+
+
+@pytest.fixture
+def index(monkeypatch):
+    # loaded by hand rather than from the researchers table
+    data = NameData([{"id": i, "full_name": name} for i, name in enumerate(NAMES, 1)])
+    monkeypatch.setattr(researcher_name_index, "_data", data)
+    monkeypatch.setattr(researcher_name_index, "_pid", os.getpid())
+    return researcher_name_index
+
+
+def names(results):
+    return [r["full_name"] for r in results]
+
+
+def test_normalize_name():
+    assert normalize_name("  Amélie   Dupont-ROY ") == "amelie dupont-roy"
+    assert normalize_name(None) == ""
+
+
+def test_prefix_distance():
+    assert prefix_distance("garc", "garcia lopez", 1) == 0
+    assert prefix_distance("gracia", "garcia lopez", 2) == 2
+    assert prefix_distance("zzzz", "garcia", 1) == 2
+
+
+def test_tiers_in_order(index):
+    # name prefix, then word prefix, then substring
+    assert names(index.search("garc")) == ["Garcia Lopez", "Leila Garcia"]
+    assert names(index.search("ssi")) == ["Nour Rossi"]
+    assert names(index.search("amelie")) == ["Amélie Dupont-Roy"]
+
+
+def test_short_substring(index):
+    assert names(index.search("kh")) == ["Sofiane Khan"]
+
+
+def test_fuzzy(index):
+    assert names(index.search("belkasem")) == ["Ines Belkacem"]
+    assert names(index.search("haddda")) == ["Maya Haddad"]
+    assert index.search("belkasem", fuzzy=False) == []
+
+
+def test_limit_and_empty_query(index):
+    assert len(index.search("a", limit=3)) == 3
+    assert index.search("   ") == []
+    assert index.count() == len(NAMES)
@@ -0,0 +1,83 @@
+from collections import Counter
+
+import pytest
+
+from db.supabase import supabase
+from routes.researchers import apply_cursor, encode_cursor
+
+
+# --------------------------------------------------
+# Keyset cursors
+# --------------------------------------------------
+def test_cursor_pages_cover_every_row_once(serve, tables):
+    serve(tables)
+    expected = sorted(
+        tables["researchers"],
+        key=lambda r: (r["h_index"] is None, -(r["h_index"] or 0), -r["id"]),
+    )
+    assert any(r["h_index"] is None for r in expected)
+
+    seen, cursor = [], None
+    while True:
+        query = (
+            supabase.table("researchers").select("id,h_index")
+            .order("h_index", desc=True, nullsfirst=False).order("id", desc=True)
+            .limit(37)
+        )
+        if cursor:
+            query = apply_cursor(query, cursor)
+        page = query.execute().data
+        seen.extend(r["id"] for r in page)
+        if len(page) < 37:
+            break
+        cursor = encode_cursor(page[-1])
+
+    assert seen == [r["id"] for r in expected]
+
+
+def test_cursor_rejects_bad_values():
+    query = supabase.table("researchers").select("id")
+    with pytest.raises(ValueError):
+        apply_cursor(query, "abc:1")
+    with pytest.raises(ValueError):
+        apply_cursor(query, "12")
+    for value in ("inf", "-inf", "nan", "1e999"):
+        with pytest.raises(ValueError):
+            apply_cursor(query, f"{value}:1")
+
+
+@pytest.mark.parametrize("args", ["page=x", "limit=x", "cursor=inf:5", "cursor=nan:5"])
+def test_all_researchers_bad_args(client, args):
+    response = client.get(f"/api/researchers/all?{args}")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+# --------------------------------------------------
+# Researcher articles
+# --------------------------------------------------
+def test_articles_without_paging_are_a_full_list(client, tables):
+    counts = Counter(a["researcher_id"] for a in tables["authorships"])
+    researcher_id, count = counts.most_common(1)[0]
+    assert count > 20
+
+    body = client.get(f"/api/researcher/{researcher_id}/articles").get_json()
+    assert isinstance(body, list)
+    assert len(body) == len({a["article_id"] for a in tables["authorships"] if a["researcher_id"] == researcher_id})
+
+
+def test_articles_pages(client, tables):
+    researcher_id = Counter(a["researcher_id"] for a in tables["authorships"]).most_common(1)[0][0]
+    everything = client.get(f"/api/researcher/{researcher_id}/articles").get_json()
+
+    seen, cursor = [], None
+    while True:
+        url = f"/api/researcher/{researcher_id}/articles?limit=7"
+        page = client.get(url + (f"&cursor={cursor}" if cursor else "")).get_json()
+        assert page["limit"] == 7 and page["order"] == "publication_date"
+        seen.extend(a["id"] for a in page["articles"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [a["id"] for a in everything]